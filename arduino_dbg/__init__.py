@@ -15,7 +15,13 @@ def _parseArgs():
             description="Serial debugger client for Arduino apps",
             prog="arduino-dbg")
     parser.add_argument("-p", "--port")
+    parser.add_argument("-b", "--baud", metavar="baud|auto",
+                        help="Serial port baud rate, or 'auto' to negotiate the fastest rate")
     parser.add_argument("-f", "--file", metavar="elf_file")
+    parser.add_argument("--record", metavar="wire_file",
+                        help="Record the traffic over the serial port to a file")
+    parser.add_argument("--replay", metavar="wire_file",
+                        help="Replay a recording made with --record in place of a serial port")
     parser.add_argument("-d", "--dump", metavar="dump_file")
     parser.add_argument("-v", "--version", action="version", version=FULL_DBG_VERSION_STR)
 
@@ -34,9 +40,6 @@ def main():
 
     ret = 1
     args = _parseArgs()
-    connection = None
-    if args.port:
-        connection = io.SerialConn(args.port, 57600, 0.1)
 
     main_owns_printer = True
     console_printer = ConsolePrinter()
@@ -51,7 +54,11 @@ def main():
         else:
             # Normal debugger instantiation
             hosted_dbg_serv = None
-            debugger = Debugger(args.file, connection, console_printer.print_q)
+            connection = None
+            if args.replay:
+                connection = io.ReplayConn(args.replay)
+            debugger = Debugger(args.file, connection, console_printer.print_q,
+                                port=args.port, baud=args.baud, record=args.record)
         console_printer.join_q()
         repl = Repl(debugger, console_printer, hosted_dbg_serv)
         main_owns_printer = False
@@ -588,8 +588,11 @@ class ArmThumbArchInterface(arch.ArchInterface):
         push_word_len = self.debugger.get_arch_conf('push_word_len')
 
         # Pop these registers in order.
-        for pop_reg in ['r0', 'r1', 'r2', 'r3', 'r12', 'LR', 'PC', 'CPSR']:
-            regs_out[pop_reg] = self.debugger.get_sram(sp, push_word_len)
+        pop_regs = ['r0', 'r1', 'r2', 'r3', 'r12', 'LR', 'PC', 'CPSR']
+        popped = self.debugger.get_sram_multi(
+            [(sp + i * push_word_len, push_word_len) for i in range(0, len(pop_regs))])
+        for (pop_reg, pop_val) in zip(pop_regs, popped):
+            regs_out[pop_reg] = pop_val
             if pop_reg in ['LR', 'PC']:
                 regs_out[pop_reg] = self.true_pc(regs_out[pop_reg])
 
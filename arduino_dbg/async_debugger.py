@@ -0,0 +1,116 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+An asyncio interface to the Debugger, for driving several devices at once or mixing debugger
+I/O with other async work.
+
+Each AsyncDebugger wraps a Debugger and runs its calls on a worker thread of its own, holding
+the Debugger's cmd lock for the duration of each call. Calls to one AsyncDebugger run one at a
+time, in the order they are awaited; calls to different AsyncDebuggers run concurrently, and
+none of them block the event loop.
+
+    async with await async_debugger.open_serial(elf_name, '/dev/ttyACM0', print_q) as adbg:
+        regs = await adbg.get_registers()
+        frames = await adbg.get_backtrace()
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+import arduino_dbg.debugger as dbg
+
+
+class AsyncDebugger(object):
+    """
+    Awaitable facade over a Debugger.
+
+    The caller must not hold the Debugger's cmd lock while it awaits calls on this object (i.e.,
+    create the Debugger with is_locked=False, or release the lock first).
+    """
+
+    def __init__(self, debugger):
+        self._debugger = debugger
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='AsyncDebugger')
+
+    @property
+    def debugger(self):
+        """ The wrapped Debugger. Only call its methods through call(). """
+        return self._debugger
+
+    def _locked_call(self, fn, *args, **kwargs):
+        self._debugger.get_cmd_lock()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._debugger.release_cmd_lock()
+
+    async def call(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the worker thread while holding the cmd lock, and return its
+        result. `fn` is usually a method of the wrapped Debugger, e.g.
+        `await adbg.call(adbg.debugger.get_sram, addr, 2)`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._locked_call, fn, *args, **kwargs))
+
+    async def send_cmd(self, dbg_cmd, result_type):
+        """ Send a low-level debugger command; see Debugger.send_cmd(). """
+        return await self.call(self._debugger.send_cmd, dbg_cmd, result_type)
+
+    async def send_break(self):
+        """ Pause the sketch; see Debugger.send_break(). """
+        return await self.call(self._debugger.send_break)
+
+    async def send_continue(self):
+        """ Resume the sketch; see Debugger.send_continue(). """
+        return await self.call(self._debugger.send_continue)
+
+    async def get_registers(self):
+        """ Return the device registers; see Debugger.get_registers(). """
+        return await self.call(self._debugger.get_registers)
+
+    async def read_memory(self, addr, length):
+        """ Return a block of `length` bytes of SRAM at `addr`; see Debugger.read_memory(). """
+        return await self.call(self._debugger.read_memory, addr, length)
+
+    async def get_backtrace(self, limit=None, force_unhide=False):
+        """ Return the stack frames; see Debugger.get_backtrace(). """
+        return await self.call(self._debugger.get_backtrace, limit, force_unhide)
+
+    async def close(self):
+        """
+        Close the Debugger (see Debugger.close()) and stop the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._debugger.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __repr__(self):
+        return f'AsyncDebugger({self._debugger.elf_name})'
+
+
+async def open_serial(elf_name, port, print_q, baud=None, **kwargs):
+    """
+    Create a Debugger for `elf_name` connected to the serial port `port`, and return an
+    AsyncDebugger that wraps it. Loading the ELF file and opening the port run on a worker
+    thread.
+
+    @param baud the baud rate (or 'auto'); see Debugger.open_serial().
+    @param kwargs further arguments to the Debugger constructor (e.g. `arduino_platform`).
+    """
+    kwargs['is_locked'] = False
+    loop = asyncio.get_running_loop()
+    debugger = await loop.run_in_executor(
+        None, functools.partial(dbg.Debugger, elf_name, None, print_q, port=port, baud=baud, **kwargs))
+    return AsyncDebugger(debugger)
@@ -0,0 +1,83 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Interface for serving device state to the Debugger in-process, bypassing the wire protocol.
+
+Normally every register and memory access is a command sent over the connection to the
+__dbg_service() on the device (or the HostedDebugService that mimics it for a dump file), with
+arguments and results formatted as text. A DebugBackend installed with Debugger.set_backend()
+answers those data accesses directly. Commands that change the process state (break, continue,
+step...) still go over the connection.
+"""
+
+
+class DebugBackend(object):
+    """
+    Abstract interface for direct access to the registers and memory of the debugged device.
+
+    Each method corresponds to the wire protocol command noted, and must give the same result
+    that the debug service would send in response to that command.
+    """
+
+    def get_register_values(self):
+        """
+        Return the register values as a list of ints, in the order specified by the arch conf
+        'register_list_fmt' (with 'general_regs' expanded to r0...rN). (DBG_OP_REGISTERS)
+        """
+        raise Exception("Unimplemented")
+
+    def read_ram(self, addr, size):
+        """
+        Return the bytes of SRAM in [addr, addr + size). (DBG_OP_RAMADDR)
+        """
+        raise Exception("Unimplemented")
+
+    def read_ram_block(self, addr, size):
+        """
+        Return exactly `size` bytes of SRAM starting at addr. (DBG_OP_RAMBLOCK)
+        """
+        raise Exception("Unimplemented")
+
+    def read_stack(self, offset, size):
+        """
+        Return `size` bytes of SRAM starting at $SP + offset. (DBG_OP_STACKREL)
+        """
+        raise Exception("Unimplemented")
+
+    def checksum_ram(self, addr, size):
+        """
+        Return the CRC-32 (see zlib.crc32()) of `size` bytes of SRAM starting at addr.
+        (DBG_OP_CHECKSUM)
+        """
+        raise Exception("Unimplemented")
+
+    def read_flash(self, addr, size):
+        """
+        Return the bytes of Flash in [addr, addr + size). (DBG_OP_FLASHADDR)
+        """
+        raise Exception("Unimplemented")
+
+    def write_ram(self, addr, size, value):
+        """
+        Write the int `value` as `size` bytes of SRAM starting at addr. (DBG_OP_POKE)
+        """
+        raise Exception("Unimplemented")
+
+    def get_memstats_values(self):
+        """
+        Return the memory usage stats as a list of ints, in the order specified by the arch
+        conf 'mem_list_fmt'. (DBG_OP_MEMSTATS)
+        """
+        raise Exception("Unimplemented")
+
+    def get_gpio_value(self, pin):
+        """
+        Return the value (1 or 0) of a GPIO pin. (DBG_OP_PORT_IN)
+        """
+        raise Exception("Unimplemented")
+
+    def set_gpio_value(self, pin, val):
+        """
+        Drive a GPIO pin with the value 1 or 0. (DBG_OP_PORT_OUT)
+        """
+        raise Exception("Unimplemented")
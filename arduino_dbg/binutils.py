@@ -15,6 +15,10 @@ import arduino_dbg.term as term
 # undesirable suffixes on demangled names
 _clone_regex = re.compile(r'\[clone \.[A-Za-z_]+.*\]$')
 
+# Max number of characters of names to write to c++filt before reading its output. The
+# demangled output of a chunk must fit within the OS pipe buffer (typically 64KB).
+_MAX_BATCH_CHARS = 4096
+
 
 class DemangleThread(threading.Thread):
     """
@@ -81,43 +85,50 @@ class DemangleThread(threading.Thread):
         demangled = None
         try:
             while self._running:
-                name = self._in_q.get()
+                names = self._in_q.get()
+                results = []
                 try:
-                    if name is None:
+                    if names is None:
                         continue
 
                     if self.proc.poll() is not None:
                         # The c++filt instance closed itself. Restart it.
                         self._start_process()
 
-                    # Send a (mangled) name to c++filt on stdin. Get the response line,
-                    # which is the demangled form; return that to the out_q.
-                    try:
-                        self.proc.stdin.write(f'{str(name).strip()}\n')
-                        self.proc.stdin.flush()
-                    except Exception as e:
-                        self._print_q.put((f'Exception on STDIN in {repr(self)}: {e}', term.ERR))
-                        self._print_q.put((f'Last input to demangler: "{name}"', term.ERR))
-                        raise
-
-                    try:
-                        demangled = self.proc.stdout.readline()
-                    except Exception as e:
-                        self._print_q.put((f'Exception on STDOUT in {repr(self)}: {e}', term.ERR))
-                        self._print_q.put((f'Last input to demangler: "{name}"', term.ERR))
-                        raise
+                    # Send the (mangled) names to c++filt on stdin, a chunk at a time, and read
+                    # back one response line per name, which is its demangled form. Chunks are
+                    # bounded in size so c++filt never blocks on a full stdout pipe while we are
+                    # still writing to its stdin.
+                    for chunk in _batch_chunks(names):
+                        name = chunk[-1]
+                        try:
+                            self.proc.stdin.write(''.join([f'{str(n).strip()}\n' for n in chunk]))
+                            self.proc.stdin.flush()
+                        except Exception as e:
+                            self._print_q.put((f'Exception on STDIN in {repr(self)}: {e}', term.ERR))
+                            self._print_q.put((f'Last input to demangler: "{name}"', term.ERR))
+                            raise
+
+                        for name in chunk:
+                            try:
+                                demangled = self.proc.stdout.readline()
+                            except Exception as e:
+                                self._print_q.put((f'Exception on STDOUT in {repr(self)}: {e}', term.ERR))
+                                self._print_q.put((f'Last input to demangler: "{name}"', term.ERR))
+                                raise
+
+                            if demangled is None:
+                                demangled = ''
+                            results.append(demangled.strip())
                 finally:
                     self._in_q.task_done()  # Acknowledge task-complete condition.
 
-                if demangled is None:
-                    demangled = ''
-
-                demangled = demangled.strip()
-                self._out_q.put(demangled)
+                self._out_q.put(results)
         except Exception as e:
             self._print_q.put((f'Exception in {repr(self)}: {e}', term.ERR))
             self._print_q.put((f'Last input to demangler: "{name}"', term.ERR))
             self._print_q.put((f'Last demangler output: "{demangled}"', term.ERR))
+            self._out_q.put_nowait(None)  # Release the caller waiting on these results.
         finally:
             # No matter how we got here (normal shutdown or exception) mark the thread as done.
             self._running = False
@@ -143,6 +154,13 @@ class DemangleThread(threading.Thread):
         """
         Send `name` to c++filt for demangling; return the demangled name.
         """
+        return self.demangle_many([name])[0]
+
+    def demangle_many(self, names):
+        """
+        Send a list of names to c++filt for demangling in as few writes as possible;
+        return the list of demangled names.
+        """
         if not self._running:
             raise Exception(f"Demangler thread ({self}) has shut down")
 
@@ -150,10 +168,12 @@ class DemangleThread(threading.Thread):
         if not acquired:
             raise Exception("Could not lock demangler thread.")
         try:
-            self._in_q.put(name)
+            self._in_q.put(names)
             self._in_q.join()
             demangled = self._out_q.get()
             self._out_q.task_done()  # Acknowledge receipt.
+            if demangled is None:
+                raise Exception(f"Demangler thread ({self}) has shut down")
 
         finally:
             self._user_lock.release()
@@ -161,10 +181,33 @@ class DemangleThread(threading.Thread):
         return demangled
 
 
+def _batch_chunks(names):
+    """
+    Split a list of names into chunks whose total length is at most _MAX_BATCH_CHARS
+    (or single names, if longer).
+    """
+    chunk = []
+    chunk_len = 0
+    for name in names:
+        if chunk and chunk_len + len(name) > _MAX_BATCH_CHARS:
+            yield chunk
+            chunk = []
+            chunk_len = 0
+        chunk.append(name)
+        chunk_len += len(name) + 1
+
+    if chunk:
+        yield chunk
+
+
 # Global instances of DemangleThread; used within demangle()
 _main_demangle_thread = None
 _hide_param_demangle_thread = None
 
+# Memoized results of demangle(); maps (name, hide_params) -> demangled name.
+# Demangling depends only on the name, so this outlives the DemangleThreads.
+_demangle_cache = {}
+
 
 def close_demangle_threads():
     """
@@ -204,31 +247,63 @@ def start_demangle_threads(print_q):
 def demangle(name, hide_params=False):
     """
         Use c++filt in binutils to demangle a C++ name into a human-readable one.
-        @
+        Results are memoized.
     """
     if name is None:
         return None
-    elif name == '':
-        return ''
-
-    global _hide_param_demangle_thread, _main_demangle_thread
-    if hide_params:
-        demangle_thread = _hide_param_demangle_thread
-    else:
-        demangle_thread = _main_demangle_thread
-
-    demangled = demangle_thread.demangle(name)
 
-    # Remove any '[clone .constprop.NN]', etc suffixes.
-    demangled = _clone_regex.sub('', demangled)
+    demangled = _demangle_cache.get((name, hide_params))
+    if demangled is None:
+        demangled = demangle_batch([name], hide_params)[0]
 
     # print(f"Demangled: {name} -> {demangled}")
     return demangled
 
 
+def demangle_batch(names, hide_params=False):
+    """
+        Demangle a list of names; return the list of demangled names in the same order.
+
+        Names not already memoized are sent to c++filt together, rather than one round trip
+        per name. Use this to prime the memo before calling demangle() on many names.
+    """
+    key_names = [(name, hide_params) for name in names]
+    pending = []
+    for key in key_names:
+        name = key[0]
+        if key in _demangle_cache:
+            continue
+        elif name is None:
+            _demangle_cache[key] = None
+        elif not name.startswith('_'):
+            # Mangled C++ names (and c++filt's other special cases) all start with '_'.
+            # Anything else is returned by c++filt as-is.
+            _demangle_cache[key] = name
+        else:
+            pending.append(name)
+
+    if pending:
+        pending = list(dict.fromkeys(pending))  # Remove duplicates; keep order.
+
+        global _hide_param_demangle_thread, _main_demangle_thread
+        if hide_params:
+            demangle_thread = _hide_param_demangle_thread
+        else:
+            demangle_thread = _main_demangle_thread
+
+        for (name, demangled) in zip(pending, demangle_thread.demangle_many(pending)):
+            # Remove any '[clone .constprop.NN]', etc suffixes.
+            _demangle_cache[(name, hide_params)] = _clone_regex.sub('', demangled)
+
+    return [_demangle_cache[key] for key in key_names]
+
+
 def pc_to_source_line(elf_file, addr):
     """
         Given a program counter ($PC) value, establish what line of source it comes from.
+
+        This runs a new addr2line process on each call. The debugger itself uses the
+        in-process Debugger.source_line_for_pc(); this remains as a reference for it.
     """
     if addr is None:
         return None
@@ -191,9 +191,9 @@ class Breakpoint(object):
             debugger.verboseprint(f'New breakpoint at {pc:04x} in method {self.demangled}')
 
         self.inline_chain = debugger.get_debug_info().getMethodsForPC(pc)
-        self.demangled_inline_chain = list(map(binutils.demangle, self.inline_chain))
+        self.demangled_inline_chain = binutils.demangle_batch(self.inline_chain)
 
-        self.source_line = binutils.pc_to_source_line(debugger.elf_name, pc) or None
+        self.source_line = debugger.source_line_for_pc(pc)
 
         self.enabled = not is_dynamic  # SW breakpoints start enabled.
 
@@ -1,22 +1,35 @@
 # (c) Copyright 2021 Aaron Kimball
 
+from elftools.elf.constants import SH_FLAGS
 from elftools.elf.elffile import ELFFile
 from elftools.dwarf.callframe import CIE
 
+import bisect
+import collections
+import concurrent.futures
+import mmap
 import os
 import os.path
 import queue
+import select
 from sortedcontainers import SortedDict, SortedList
+import struct
 import threading
 import time
 import traceback
+import zlib
 
 import arduino_dbg.arch as arch
 import arduino_dbg.binutils as binutils
 import arduino_dbg.breakpoint as breakpoint
 import arduino_dbg.conf_files as conf_files
+import arduino_dbg.debuginfo_cache as debuginfo_cache
+import arduino_dbg.io as io
 import arduino_dbg.protocol as protocol
 import arduino_dbg.serialize as serialize
+import arduino_dbg.source_lines as source_lines
+import arduino_dbg.sram_cache as sram_cache
+import arduino_dbg.wire_stats as wire_stats
 import arduino_dbg.stack as stack
 from arduino_dbg.symbol import Symbol
 import arduino_dbg.term as term
@@ -24,7 +37,7 @@ from arduino_dbg.term import MsgLevel
 import arduino_dbg.types as types
 
 # The maximum protocol version id we speak.
-HOST_MAX_PROTOCOL_VERSION = 1
+HOST_MAX_PROTOCOL_VERSION = 5
 
 _LOCAL_CONF_FILENAME = os.path.expanduser("~/.arduino_dbg.conf")
 _DEFAULT_HISTORY_FILENAME = os.path.expanduser("~/.arduino_dbg_history")
@@ -33,6 +46,18 @@ _DEFAULT_MAX_CONN_RETRIES = 3
 _DEFAULT_MAX_POLL_RETRIES = 20
 _DEFAULT_POLL_TIMEOUT = 100  # milliseconds
 _DEFAULT_MAX_BACKTRACE_DEPTH = 100
+_DEFAULT_PIPELINE_DEPTH = 4  # commands in flight at once
+_DEFAULT_SERIAL_BAUD = 57600
+_SERIAL_TIMEOUT = 0.1  # seconds
+
+# Baud rates to try, fastest first, when negotiating the serial link rate with the device.
+_NEGOTIATED_BAUD_RATES = [1000000, 500000, 230400, 115200]
+_THROUGHPUT_PROBE_LEN = 1024  # Bytes of RAM read to measure the throughput of the link.
+
+# A framed response is DBG_FRAME_START, this header (payload length, opcode), the payload, and
+# the CRC. See protocol.DBG_FRAMING_MIN_PROTOCOL_VERSION.
+_FRAME_HEADER = struct.Struct('<HB')
+_FRAME_CRC = struct.Struct('<I')
 
 _dbg_conf_keys = [
     "arduino.platform",
@@ -41,12 +66,21 @@ _dbg_conf_keys = [
     "dbg.colors",
     "dbg.conf.formatversion",
     "dbg.conn.retries",
+    "dbg.debuginfo.cachedir",  # Where to cache parsed ELF debug info. None disables caching.
+    "dbg.debuginfo.lazy",  # True: parse each compilation unit's debug info when first needed.
+    "dbg.debuginfo.workers",  # Number of processes used to parse all compilation units at once.
+    "dbg.dump.mode",     # What `dump` captures: 'full' RAM, 'sparse' (skip free RAM), or 'mini'.
     "dbg.historyfile",
     "dbg.internal.stack.frames",  # True: show all backtrace frames. False: hide debugger internals.
+    "dbg.mem.cache",     # True: cache SRAM contents read from the device while it is paused.
+    "dbg.pipeline.depth",  # Max number of pipelined commands in flight to the device at once.
     "dbg.poll.retry",    # Attempt to listen how many times in __wait_response() ?
     "dbg.poll.timeout",  # When listening to recv_q in __wait_response(), wait how long?
     "dbg.print_die.offset",
+    "dbg.serial.baud",   # Serial port baud rate, or 'auto' to negotiate the fastest rate that works.
+    "dbg.stats.per_command",  # True: after each REPL command, summarize the wire traffic it caused.
     "dbg.verbose",
+    "dbg.wire.framed",   # True: ask the device to send memory reads as binary frames (protocol v4+).
 ]
 
 # Mapping from CPUID signature bytes to ('friendly name', 'config name')
@@ -138,6 +172,8 @@ class AsyncCmdExecThread(threading.Thread):
             fn()
         except DebuggerIOError as dioe:
             self._debugger.msg_q(MsgLevel.ERR, f'Error while invoking async command: {dioe}')
+        except UnknownMemoryException as ume:
+            self._debugger.msg_q(MsgLevel.ERR, f'Async command read unknown memory: {ume}')
         finally:
             # No matter what happens, we must relinquish this lock when done.
             self._debugger.release_cmd_lock()
@@ -192,13 +228,78 @@ class InvalidConnStateException(DebuggerIOError):
     pass
 
 
+class MalformedResponseException(DebuggerIOError):
+    """ The device sent a response that does not match the shape of the command we sent. """
+    pass
+
+
+class UnknownMemoryException(Exception):
+    """
+    The contents of the memory we tried to read are unknown (e.g., not captured in a dump).
+    The connection itself is fine, so this is not a DebuggerIOError.
+    """
+    pass
+
+
+class ElfSection(dict):
+    """
+    Describes a section of the ELF file: its 'name', 'size', file 'offset', load 'addr', and the
+    pyelftools Section object ('elf').
+
+    The section contents are available under the 'image' key as a read-only memoryview over the
+    Debugger's mmap of the ELF file. This is materialized on first access, so sections that are
+    never sliced directly (e.g., most .debug_* sections) cost nothing to load.
+    """
+
+    def __init__(self, elf_sect, elf_mmap):
+        super().__init__()
+        self["name"] = elf_sect.name
+        self["size"] = elf_sect.header['sh_size']
+        self["offset"] = elf_sect.header['sh_offset']
+        self["addr"] = elf_sect.header['sh_addr']
+        self["elf"] = elf_sect
+        self._elf_mmap = elf_mmap
+
+    def __missing__(self, key):
+        if key != "image":
+            raise KeyError(key)
+
+        elf_sect = self["elf"]
+        if elf_sect.header['sh_type'] == 'SHT_NOBITS':
+            image = memoryview(b'')  # e.g. .bss occupies no space in the file.
+        elif elf_sect.compressed:
+            image = memoryview(elf_sect.data())  # Must be decompressed; can't view the file directly.
+        else:
+            image = memoryview(self._elf_mmap)[self["offset"]:self["offset"] + self["size"]]
+
+        self["image"] = image
+        return image
+
+    def is_memory_image(self):
+        """
+        Return True if this section occupies memory on the device and has its contents in the
+        ELF file (e.g. .text, .data) as opposed to .bss, debug info, symbol tables, etc.
+        """
+        header = self["elf"].header
+        return (header['sh_flags'] & SH_FLAGS.SHF_ALLOC) != 0 and header['sh_type'] != 'SHT_NOBITS' \
+            and self["size"] > 0
+
+    def release(self):
+        """
+        Release the image view (if materialized) so the underlying mmap can be closed.
+        """
+        if "image" in self:
+            self["image"].release()
+            del self["image"]
+
+
 class Debugger(object):
     """
         Main debugger state object.
     """
 
     def __init__(self, elf_name, connection, print_q, arduino_platform=None, force_config=None,
-                 history_change_hook=None, is_locked=False):
+                 history_change_hook=None, is_locked=False, port=None, baud=None, record=None):
         """
         @param elf_name the name of the ELF file holding the binary to debug
         @param connection the Serial connection to device (or pipe connection to local image host)
@@ -209,8 +310,15 @@ class Debugger(object):
             user config file. Also suppresses subsequent writes to user config file if settings
             change.
         @param history_change_hook a function to call when the history filename is changed.
+        @param port if `connection` is None, the serial port to open a connection on.
+        @param baud the baud rate (or 'auto') for the serial port; see open_serial().
+        @param record if not None, the filename to record the serial port traffic to.
         """
         self._protocol_version = None  # Protocol version running on attached sketch.
+        self._framing = None  # True/False if the device frames responses; None if not yet agreed.
+        self._sram_cache = None  # SramPageCache for the current arch; built in _load_arch().
+        self._wire_stats = wire_stats.WireStats()  # Counts of commands sent over the connection.
+        self._bytes_recv = 0  # Total bytes read from the connection by the listener thread.
         self._print_q = print_q  # Data from serial conn to print directly to console.
         self._history_change_hook = history_change_hook
 
@@ -227,6 +335,12 @@ class Debugger(object):
         # may need to make multiple submissions.
         self._submit_lock = threading.Lock()
         self._cmd_event = threading.Event()  # Event to signal a client is waiting to acquire lock.
+        self._listening = threading.Event()  # Set when the listener takes the lock to listen to the device.
+        # While the device runs, the listener thread waits in select() on both the connection and
+        # this pipe. Clients write a byte to the pipe to wake it when they want the lock or have
+        # submitted a command. Opened with the first connection.
+        self._wakeup_r = None
+        self._wakeup_w = None
         if is_locked:
             self._submit_lock.acquire()  # Start with lock owned by caller.
 
@@ -244,10 +358,13 @@ class Debugger(object):
         self._restart_responsibility = ConnRestart.INTERNAL
         self._conn = None               # The serial connection to the device or mock device for dump
                                         # debugging. See impls in arduino_dbg.io package.
+        self._backend = None            # Optional backend.DebugBackend serving register & memory
+                                        # reads in-process for the device behind self._conn.
 
         # The filename of the sketch image.
         self.elf_name = elf_name
         self._elf_file_handle = None
+        self._elf_mmap = None           # Read-only mmap of the ELF file; backs section images.
         if self.elf_name:
             self.elf_name = os.path.realpath(self.elf_name)
 
@@ -268,11 +385,34 @@ class Debugger(object):
         self._try_read_elf()
 
         # Establish connection to the device to debug.
-        self.open(connection)
+        if connection is None and port is not None:
+            if not is_locked:
+                self.get_cmd_lock()
+            try:
+                self.open_serial(port, baud, record)
+            finally:
+                if not is_locked:
+                    self.release_cmd_lock()
+        else:
+            self.open(connection)
 
-    def _init_clear_elf_state(self):
+    def _close_elf_file(self):
+        """
+        Close the ELF file and its mmap, if open.
+        """
+        if self._elf_mmap is not None:
+            for section in self._sections.values():
+                section.release()
+
+            try:
+                self._elf_mmap.close()
+            except BufferError:
+                # A caller is still holding a view returned by get_image_bytes(). The mmap will be
+                # closed when the last such view is garbage-collected.
+                self.verboseprint('ELF image views still in use; deferring close of ELF mmap.')
+
+            self._elf_mmap = None
 
-        # If there's already an open ELF file, close it out.
         if self._elf_file_handle:
             # Close the ELF file we opened at the beginning.
             try:
@@ -282,12 +422,25 @@ class Debugger(object):
 
             self._elf_file_handle = None
 
+    def _init_clear_elf_state(self):
+
+        # If there's already an open ELF file, close it out.
+        self._close_elf_file()
+
         self._loaded_debug_info = False
         self._sections = {}
+        self._image_section_addrs = []  # Sorted start addrs of sections in get_image_bytes() index.
+        self._image_sections = []       # ElfSection for each entry in _image_section_addrs.
         self._addr_to_symbol = SortedDict()
+        # Function-range index for function_sym_by_pc(), in parallel arrays sorted by start addr.
+        self._func_starts = []
+        self._func_ends = []    # Exclusive end addr of each function.
+        self._func_syms = []
         self._symbols = SortedDict()
         self._demangled_to_symbol = SortedDict()
         self._dwarf_info = None
+        self._frame_cie = None
+        self._line_table = None  # source_lines.LineTable; decoded on first use.
         self.elf = None
         self._debug_info_types = types.ParsedDebugInfo(self)  # Must create after config load.
         self._breakpoints = breakpoint.BreakpointDatabase(self)
@@ -350,6 +503,7 @@ class Debugger(object):
             # Wait for existing thread to exit -- unless this is invoked within that thread.
             # (In which case, it's already on the way out and knows it.)
             self._alive = False
+            self.__wake_listener()
             self._listen_thread.join()
             self._listen_thread = None
 
@@ -397,28 +551,213 @@ class Debugger(object):
         self._conn = connection
         self.__start_conn_listener()
 
-    def __start_conn_listener(self):
+    def open_serial(self, port, baud=None, record=None):
+        """
+        Open a serial connection to the device on `port`.
+
+        The caller must hold the cmd lock if the baud rate may be 'auto'.
+
+        @param baud the baud rate; or 'auto' to connect at the default rate and then negotiate
+            the fastest rate the device supports (see negotiate_baud()). If None, use the
+            'dbg.serial.baud' setting.
+        @param record if not None, the filename to record the traffic over the port to, with an
+            io.RecordingConn.
+        """
+        if baud is None:
+            baud = self.get_conf('dbg.serial.baud')
+
+        auto_baud = str(baud).lower() == 'auto'
+        if auto_baud:
+            start_baud = _DEFAULT_SERIAL_BAUD
+        else:
+            start_baud = int(baud)
+
+        connection = io.SerialConn(port, start_baud, _SERIAL_TIMEOUT)
+        if record is not None:
+            connection = io.RecordingConn(connection, record)
+        self.open(connection)
+        if auto_baud and self.is_open():
+            self.negotiate_baud()
+
+    def negotiate_baud(self, rates=None):
+        """
+        Switch the serial link to the fastest baud rate that the device accepts and that passes a
+        throughput probe, falling back to the current rate if none do. Report the chosen rate and
+        its measured throughput.
+
+        @param rates the baud rates to try, in order of preference. Rates no faster than the
+            current one are skipped.
+        @return the baud rate in use.
+        """
+        if rates is None:
+            rates = _NEGOTIATED_BAUD_RATES
+
+        cur_baud = self._conn.get_baud() if self._conn is not None else None
+        if cur_baud is None:
+            self.msg_q(MsgLevel.WARN, f"Connection {self._conn} does not have a baud rate to change.")
+            return cur_baud
+
+        if not self.send_break():  # Learn the protocol version running on the device.
+            self.msg_q(MsgLevel.WARN, f"Could not pause device; staying at {cur_baud} baud.")
+            return cur_baud
+        if self._protocol_version < protocol.DBG_BAUD_MIN_PROTOCOL_VERSION:
+            self.msg_q(MsgLevel.WARN,
+                       f'Device running debugger protocol v{self._protocol_version} cannot change '
+                       f'baud rate; staying at {cur_baud}.')
+            return cur_baud
+
+        base_throughput = self.measure_throughput()
+        for rate in rates:
+            if rate <= cur_baud:
+                continue
+
+            if not self.__switch_baud(rate):
+                continue
+
+            try:
+                throughput = self.measure_throughput()
+            except DebuggerIOError as e:
+                self.msg_q(MsgLevel.WARN, f'Throughput probe failed at {rate} baud: {e}')
+                if not self.__switch_baud(cur_baud):
+                    raise
+                continue
+
+            self.msg_q(MsgLevel.SUCCESS,
+                       f'Serial link at {rate} baud: {throughput:,.0f} bytes/sec '
+                       f'(was {cur_baud} baud: {base_throughput:,.0f} bytes/sec).')
+            return rate
+
+        self.msg_q(MsgLevel.INFO,
+                   f'Serial link at {cur_baud} baud: {base_throughput:,.0f} bytes/sec. '
+                   'No faster rate could be negotiated.')
+        return cur_baud
+
+    def __switch_baud(self, rate):
+        """
+        Ask the device to switch the serial link to `rate`, and confirm that it works.
+
+        @return True if the link is now at `rate`. False if the device refused, or if the link did
+            not work at the new rate, in which case both ends are returned to the prior rate.
+        """
+        prior_rate = self._conn.get_baud()
+        ack = self.send_cmd([protocol.DBG_OP_BAUD, rate], Debugger.RESULT_ONELINE)
+        if ack.strip() != '1':
+            self.verboseprint(f'Device declined baud rate {rate}')
+            return False
+
+        # Take over the connection from the listener thread while we change its rate.
+        process_state = self._process_state
+        self.__stop_conn_listener()
+        try:
+            self._conn.set_baud(rate)
+            if self.__confirm_baud():
+                return True
+
+            self.verboseprint(f'No response at {rate} baud; returning to {prior_rate}')
+            self._conn.set_baud(prior_rate)
+            time.sleep(protocol.DBG_BAUD_CONFIRM_TIMEOUT)  # The device reverts after this time.
+            while self._conn.available():
+                self._conn.readline()  # Drop any garbage received at the wrong rate.
+            if not self.__confirm_baud():
+                self.msg_q(MsgLevel.ERR, f'Lost contact with device after trying {rate} baud.')
+            return False
+        finally:
+            self.__start_conn_listener(announce=False)
+            self._process_state = process_state  # Still paused where it was before.
+
+    def __confirm_baud(self):
+        """
+        With the listener thread stopped, send a BREAK at the connection's current rate and
+        return True if the device answers within DBG_BAUD_CONFIRM_TIMEOUT.
+        """
+        self._conn.write((protocol.DBG_OP_BREAK + protocol.DBG_END).encode('utf-8'))
+        deadline = time.monotonic() + protocol.DBG_BAUD_CONFIRM_TIMEOUT
+        while time.monotonic() < deadline:
+            line = self._conn.readline().decode('utf-8', errors='replace')
+            if line.startswith(protocol.DBG_PAUSE_MSG):
+                return True
+
+        return False
+
+    def measure_throughput(self, length=_THROUGHPUT_PROBE_LEN):
+        """
+        Time a read of `length` bytes of RAM from the device, bypassing the SRAM cache, and
+        check it against the device's checksum of the same memory.
+
+        @throws MalformedResponseException if the memory read does not match the checksum.
+        @return the throughput of the read in bytes/sec.
+        """
+        addr = self.get_arch_conf("RAMSTART")
+        start_time = time.monotonic()
+        data = self.__read_memory_uncached(addr, length)
+        elapsed = time.monotonic() - start_time
+
+        if self._protocol_version >= protocol.DBG_CHECKSUM_MIN_PROTOCOL_VERSION and \
+                zlib.crc32(data) != self.get_ram_checksums([(addr, length)])[0]:
+            raise MalformedResponseException('Memory read in throughput probe does not match its checksum')
+
+        return length / elapsed if elapsed > 0 else float('inf')
+
+    def set_backend(self, backend):
+        """
+        Serve register and memory reads & writes from `backend` (a backend.DebugBackend) rather
+        than by sending commands over the connection. Other commands are still sent over
+        the connection, which must lead to the same device.
+
+        The backend is discarded when the connection is closed. Pass None to go back to
+        using the connection for everything.
+        """
+        self._backend = backend
+        self.clear_mem_cache()
+
+    def get_backend(self):
+        """ Return the backend set with set_backend(), or None. """
+        return self._backend
+
+    def get_print_q(self):
+        """ Return the queue that connects us to stdout/ConsolePrinter. """
+        return self._print_q
+
+    def __start_conn_listener(self, announce=True):
         """
         Set up internal listener thread & associated state after connection is established.
         """
-        self.msg_q(MsgLevel.INFO, f"Opening connection to {self._conn}...")
+        if announce:
+            self.msg_q(MsgLevel.INFO, f"Opening connection to {self._conn}...")
         self._recv_q = queue.Queue(maxsize=16)  # Data from serial conn for debug internal use.
         self._send_q = queue.Queue(maxsize=1)   # Data to send out on serial conn.
+        if self._wakeup_r is None:
+            (self._wakeup_r, self._wakeup_w) = os.pipe()
+            os.set_blocking(self._wakeup_r, False)
+            os.set_blocking(self._wakeup_w, False)
         self._alive = True
         self._disconnect_err = False
         self._process_state = ProcessState.UNKNOWN
+        self._framing = None  # Agreed anew when the device next pauses.
+        self.clear_mem_cache()  # Can't know what happened on the device while disconnected.
         self._restart_responsibility = ConnRestart.INTERNAL
         self._listen_thread = threading.Thread(target=self._conn_listener,
                                                name='Debugger serial listener')
         self._listen_thread.start()
-        if self.is_open():
+        if announce and self.is_open():
             self.msg_q(MsgLevel.SUCCESS, "Connected.")
 
+    def __stop_conn_listener(self):
+        """
+        Stop the listener thread, leaving the connection open for the caller to use directly.
+        """
+        self._alive = False
+        self.__wake_listener()
+        if self._listen_thread and self._listen_thread.ident != threading.get_ident():
+            self._listen_thread.join()
+        self._listen_thread = None
+
     def _close_serial(self):
         """
         Release serial connection resources.
         """
         self._alive = False
+        self.__wake_listener()
         if self._listen_thread and self._listen_thread.ident != threading.get_ident():
             # Wait for existing thread to exit -- unless this is invoked within that thread.
             # (In which case, it's already on the way out and knows it.)
@@ -429,6 +768,7 @@ class Debugger(object):
         if self._conn:
             self._conn.close()
         self._conn = None
+        self._backend = None  # Served the device behind the closed conn.
         self._disconnect_err = False
 
         self._recv_q = None
@@ -441,11 +781,13 @@ class Debugger(object):
         Clean up the debugger and release file resources.
         """
         self._close_serial()
+        self._close_elf_file()
 
-        if self._elf_file_handle:
-            # Close the ELF file we opened at the beginning.
-            self._elf_file_handle.close()
-        self._elf_file_handle = None
+        if self._wakeup_r is not None:
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+            self._wakeup_r = None
+            self._wakeup_w = None
 
     ###### Configuration file / config key management functions.
 
@@ -466,11 +808,20 @@ class Debugger(object):
         conf_map["dbg.colors"] = True
         conf_map["dbg.conf.formatversion"] = serialize.DBG_CONF_FMT_VERSION
         conf_map["dbg.conn.retries"] = _DEFAULT_MAX_CONN_RETRIES
+        conf_map["dbg.debuginfo.cachedir"] = debuginfo_cache.DEFAULT_CACHE_DIR
+        conf_map["dbg.debuginfo.lazy"] = True
+        conf_map["dbg.debuginfo.workers"] = 1
+        conf_map["dbg.dump.mode"] = 'full'
         conf_map["dbg.historyfile"] = _DEFAULT_HISTORY_FILENAME
         conf_map["dbg.internal.stack.frames"] = False
+        conf_map["dbg.mem.cache"] = True
+        conf_map["dbg.pipeline.depth"] = _DEFAULT_PIPELINE_DEPTH
         conf_map["dbg.poll.retry"] = _DEFAULT_MAX_POLL_RETRIES
         conf_map["dbg.poll.timeout"] = _DEFAULT_POLL_TIMEOUT
+        conf_map["dbg.serial.baud"] = _DEFAULT_SERIAL_BAUD
+        conf_map["dbg.stats.per_command"] = False
         conf_map["dbg.verbose"] = False
+        conf_map["dbg.wire.framed"] = True
 
         return conf_map
 
@@ -580,6 +931,14 @@ class Debugger(object):
         mem_map = self.arch_iface.memory_map()  # Initialize and validate memory map
         self.verboseprint('Initialized memory map:\n', mem_map)
 
+        # (Re)create the SRAM cache to span the RAM of the new architecture.
+        ram_start = self.get_arch_conf("RAMSTART")
+        ram_end = self.get_arch_conf("RAMEND")
+        if ram_start is not None and ram_end is not None:
+            self._sram_cache = sram_cache.SramPageCache(ram_start, ram_end)
+        else:
+            self._sram_cache = None
+
         # Clear cached architecture parameters in DWARFExprMachine
         import arduino_dbg.eval_location as el
         el.DWARFExprMachine.hard_reset_state()
@@ -620,6 +979,10 @@ class Debugger(object):
             self._config_history_file()
         elif key == 'dbg.backtrace.limit':
             self.clear_frame_cache()  # Current backtrace result invalidated.
+        elif key == 'dbg.mem.cache':
+            self.clear_mem_cache()  # Don't resume use of stale contents if re-enabled later.
+        elif key == 'dbg.wire.framed' and self._framing is False:
+            self._framing = None  # Ask the device again before the next memory read.
 
         self._persist_config()  # Write changes to conf file.
 
@@ -839,39 +1202,25 @@ class Debugger(object):
 
         # Now we're clear to load the new ELF.
         self._elf_file_handle = open(self.elf_name, 'rb')
+        self._elf_mmap = mmap.mmap(self._elf_file_handle.fileno(), 0, access=mmap.ACCESS_READ)
         self.elf = ELFFile(self._elf_file_handle)
         self.msg_q(MsgLevel.INFO, f"Loading image and symbols from {self.elf_name}")
 
         for elf_sect in self.elf.iter_sections():
-            section = {}
-            section["name"] = elf_sect.name
-            section["size"] = elf_sect.header['sh_size']
-            section["offset"] = elf_sect.header['sh_offset']
-            section["addr"] = elf_sect.header['sh_addr']
-            section["elf"] = elf_sect
-            section["image"] = elf_sect.data()[0: section["size"]]  # Copy out the section image data.
-            self._sections[elf_sect.name] = section
+            # Section images are views over the mmap, materialized on first access.
+            self._sections[elf_sect.name] = ElfSection(elf_sect, self._elf_mmap)
 
             # self.verboseprint("****************************")
             # self.verboseprint(f'Section {elf_sect.name} has header {elf_sect.header}')
             # self.verboseprint(f'off: {elf_sect.header["sh_offset"]}, size: {elf_sect.header["sh_size"]}')
             # print("--data follows--")
-            # print(f'{section["image"]}')
+            # print(f'{self._sections[elf_sect.name]["image"].tobytes()}')
 
-        syms = self.elf.get_section_by_name(".symtab")
-        if syms is not None:
-            for sym in syms.iter_symbols():
-                sym_type = sym.entry['st_info']['type']
-                if sym_type == "STT_NOTYPE" or sym_type == "STT_OBJECT" or sym_type == "STT_FUNC":
-                    # This has a location worth memorizing
-                    if sym_type == "STT_FUNC":
-                        addr = self.arch_iface.sym_addr_to_pc(sym.entry['st_value'])
-                    else:
-                        addr = sym.entry['st_value']
-                    dbg_sym = Symbol(sym, addr)
-                    self._addr_to_symbol[dbg_sym.addr] = dbg_sym
-                    self._symbols[dbg_sym.name] = dbg_sym
-                    self._demangled_to_symbol[dbg_sym.demangled] = dbg_sym
+        # Index the sections that make up the memory image by address, for get_image_bytes().
+        image_sections = [sect for sect in self._sections.values() if sect.is_memory_image()]
+        image_sections.sort(key=lambda sect: sect["addr"])
+        self._image_sections = image_sections
+        self._image_section_addrs = [sect["addr"] for sect in image_sections]
 
         if self.elf.has_dwarf_info():
             self.verboseprint("Loading debug info from program binary")
@@ -880,49 +1229,128 @@ class Debugger(object):
                 # It was just an exception handler unwind table; no good.
                 self._dwarf_info = None
                 self.verboseprint("Warning: empty debug info in program binary.")
-
-            if self._dwarf_info:
-                self._debug_info_types.parseTypeInfo(self._dwarf_info)
-
-                # Link .debug_frame unwind info to symbols:
-                for cfi_e in self._dwarf_info.CFI_entries():
-                    if isinstance(cfi_e, CIE):
-                        # This is the Common Information Entry (CIE). Save with the debugger.
-                        # TODO: What if there are multiple CIEs? (gcc-arm-eabi-none seems to
-                        # generate several CIEs, but they're all identical... but that doesn't
-                        # need to be the case.)
-                        self._frame_cie = cfi_e
-                        continue
-
-                    # We've got an FDE for some method.
-                    # Find the method with the relevant $PC
-                    frame_sym = self.function_sym_by_pc(cfi_e.header['initial_location'])
-                    if frame_sym:
-                        frame_sym.setFrameInfo(cfi_e)
-                        # self.verboseprint("Binding CFI: ", frame_sym, "\n--to--\n", cfi_e.header)
-                        # self.verboseprint(f"Bound CFI to method {frame_sym.name}.")
-                    else:
-                        # We have a CFI that claims to start at this $PC, but no method
-                        # claims this address.
-                        missing_pc = cfi_e.header['initial_location']
-                        if missing_pc is not None and missing_pc != 0:
-                            self.msg_q(MsgLevel.WARN, f"Warning: No method for CFI @ $PC={missing_pc:04x}")
-
-                    # for row in cfi_e.get_decoded().table:
-                    #     row2 = row.copy()
-                    #     pc = row2['pc']
-                    #     del row2['pc']
-                    #     self.msg_q(MsgLevel.DEBUG, f'PC: {pc:04x} {row2}')
-                    # self.msg_q(MsgLevel.DEBUG, "\n\n")
-
         else:
             self.verboseprint("Warning: no debug info in program binary.")
 
+        cache_dir = self.get_conf('dbg.debuginfo.cachedir')
+        cache_key = None
+        if cache_dir:
+            elf_mtime = os.fstat(self._elf_file_handle.fileno()).st_mtime
+            arch_key = (self.get_conf('arduino.arch'), self.get_arch_conf('int_size'),
+                        self.get_arch_conf('ret_addr_size'))
+            cache_key = (cache_dir, debuginfo_cache.elf_digest(self._elf_mmap), elf_mtime, arch_key)
+
+        if cache_key is None or not self._load_cached_debug_info(cache_key):
+            self._read_symbols()
+            self._read_debug_info()
+            if cache_key is not None:
+                self._save_cached_debug_info(cache_key)
+
         end_time = time.time()
         self.msg_q(term.INFO, f'Loaded debug information in {1000*(end_time - start_time):0.01f}ms.')
         self._loaded_debug_info = True
 
 
+    def _read_symbols(self):
+        """
+        Populate the symbol tables from the ELF .symtab section.
+        """
+        syms = self.elf.get_section_by_name(".symtab")
+        if syms is not None:
+            elf_syms = [sym for sym in syms.iter_symbols()
+                        if sym.entry['st_info']['type'] in ["STT_NOTYPE", "STT_OBJECT", "STT_FUNC"]]
+            # Demangle all names in one batch up front, rather than one at a time as each
+            # Symbol is created.
+            binutils.demangle_batch([sym.name for sym in elf_syms])
+            for sym in elf_syms:
+                # This has a location worth memorizing
+                sym_type = sym.entry['st_info']['type']
+                if sym_type == "STT_FUNC":
+                    addr = self.arch_iface.sym_addr_to_pc(sym.entry['st_value'])
+                else:
+                    addr = sym.entry['st_value']
+                dbg_sym = Symbol(sym, addr)
+                self._addr_to_symbol[dbg_sym.addr] = dbg_sym
+                self._symbols[dbg_sym.name] = dbg_sym
+                self._demangled_to_symbol[dbg_sym.demangled] = dbg_sym
+
+        self._build_function_index()
+
+    def _read_debug_info(self):
+        """
+        Parse .debug_info types and bind .debug_frame unwind info to method symbols.
+        """
+        if self._dwarf_info:
+            self._debug_info_types.parseTypeInfo(self._dwarf_info, lazy=self.get_conf('dbg.debuginfo.lazy'))
+
+            # Link .debug_frame unwind info to symbols:
+            for cfi_e in self._dwarf_info.CFI_entries():
+                if isinstance(cfi_e, CIE):
+                    # This is the Common Information Entry (CIE). Save with the debugger.
+                    # TODO: What if there are multiple CIEs? (gcc-arm-eabi-none seems to
+                    # generate several CIEs, but they're all identical... but that doesn't
+                    # need to be the case.)
+                    self._frame_cie = cfi_e
+                    continue
+
+                # We've got an FDE for some method.
+                # Find the method with the relevant $PC
+                frame_sym = self.function_sym_by_pc(cfi_e.header['initial_location'])
+                if frame_sym:
+                    frame_sym.setFrameInfo(cfi_e)
+                    # self.verboseprint("Binding CFI: ", frame_sym, "\n--to--\n", cfi_e.header)
+                    # self.verboseprint(f"Bound CFI to method {frame_sym.name}.")
+                else:
+                    # We have a CFI that claims to start at this $PC, but no method
+                    # claims this address.
+                    missing_pc = cfi_e.header['initial_location']
+                    if missing_pc is not None and missing_pc != 0:
+                        self.msg_q(MsgLevel.WARN, f"Warning: No method for CFI @ $PC={missing_pc:04x}")
+
+                # for row in cfi_e.get_decoded().table:
+                #     row2 = row.copy()
+                #     pc = row2['pc']
+                #     del row2['pc']
+                #     self.msg_q(MsgLevel.DEBUG, f'PC: {pc:04x} {row2}')
+                # self.msg_q(MsgLevel.DEBUG, "\n\n")
+
+    def _load_cached_debug_info(self, cache_key):
+        """
+        Populate the symbol tables and debug info from the debug info cache, if the cache
+        holds an entry for this ELF file.
+
+        @param cache_key tuple of (cache_dir, elf digest, elf mtime, arch key).
+        @return True if loaded from the cache.
+        """
+        (cache_dir, digest, elf_mtime, arch_key) = cache_key
+        state = debuginfo_cache.load(cache_dir, digest, elf_mtime, arch_key, self, self._dwarf_info)
+        if state is None:
+            return False
+
+        self._symbols = state['symbols']
+        self._addr_to_symbol = state['addr_to_symbol']
+        self._demangled_to_symbol = state['demangled_to_symbol']
+        self._debug_info_types = state['debug_info_types']
+        self._frame_cie = state['frame_cie']
+        self._build_function_index()
+        self.verboseprint(f'Loaded cached debug info from {cache_dir}')
+        return True
+
+    def _save_cached_debug_info(self, cache_key):
+        """
+        Write the symbol tables and debug info parsed from the current ELF file to the cache.
+        """
+        (cache_dir, digest, elf_mtime, arch_key) = cache_key
+        state = {
+            'symbols': self._symbols,
+            'addr_to_symbol': self._addr_to_symbol,
+            'demangled_to_symbol': self._demangled_to_symbol,
+            'debug_info_types': self._debug_info_types,
+            'frame_cie': self._frame_cie,
+        }
+        debuginfo_cache.save(cache_dir, digest, elf_mtime, arch_key, self, state)
+
+
     def get_frame_cie(self):
         """
         Return the CIE from .debug_frame. (Default/initial stack frame info for all methods.)
@@ -938,36 +1366,57 @@ class Debugger(object):
 
     def get_image_bytes(self, start_addr, length):
         """
-        Return a `bytes` object containing the "length" in-memory image bytes
-        beginning at "start_addr".
+        Return the "length" in-memory image bytes beginning at "start_addr".
 
-        This may retrieve from sections like .text, .data, .bss, etc.
+        This may retrieve from sections like .text, .data, etc. that have their contents stored
+        in the ELF file.
         * This function does not resolve relocations or perform any post-processing on the ELF.
-        * This function does not return spans across multiple sections. If start_addr + length
-          exceeds the endpoint of the section containing start_addr, it will be truncated to
-          the section in question.
+        * If the range lies within a single section, the result is a read-only `memoryview`: a
+          zero-copy view into the mapped ELF file. If it continues into one or more sections that
+          immediately follow it in memory, the result is a `bytes` object spanning them.
+        * If start_addr + length passes the end of the last contiguous section, the result
+          is truncated at that endpoint.
 
         returns None if the start_addr cannot be localized within any section.
         """
-        img_section = None
-        for (name, section) in self._sections.items():
-            if section["addr"] < start_addr and section["addr"] + section["size"] >= start_addr:
-                img_section = section
-                break
-
-        if img_section is None:
+        idx = bisect.bisect_right(self._image_section_addrs, start_addr) - 1
+        if idx < 0:
             return None
 
+        img_section = self._image_sections[idx]
+        section_end = img_section["addr"] + img_section["size"]
+        if start_addr >= section_end:
+            return None  # In a gap between sections.
+
         # self.verboseprint(f"Image bytes for {start_addr:x} --> {length} in section {img_section['name']}")
-        data = img_section["image"]
         start_within_section = start_addr - img_section["addr"]
-        img_slice = data[start_within_section: start_within_section + length]
-        return img_slice
+        img_slice = img_section["image"][start_within_section: start_within_section + length]
+        if len(img_slice) == length:
+            return img_slice
+
+        # The request spans past the end of this section. Continue into any sections
+        # that are adjacent in memory.
+        pieces = [img_slice]
+        remaining = length - len(img_slice)
+        idx += 1
+        while remaining > 0 and idx < len(self._image_sections) and \
+                self._image_section_addrs[idx] == section_end:
+            next_section = self._image_sections[idx]
+            piece = next_section["image"][0:remaining]
+            pieces.append(piece)
+            remaining -= len(piece)
+            section_end = next_section["addr"] + next_section["size"]
+            idx += 1
+
+        if len(pieces) == 1:
+            return img_slice  # Truncated to the one section.
+
+        return b''.join(pieces)
 
     def image_for_symbol(self, symname):
         """
         Return the image bytes associated with a symbol (the initialized value of a variable
-        in .data, or the machine code within .text for a method)
+        in .data, or the machine code within .text for a method) as a zero-copy memoryview.
         """
         # self.verboseprint(f"Getting image for symbol {symname}")
         symdata = self.lookup_sym(symname)
@@ -1034,36 +1483,81 @@ class Debugger(object):
         """
         if typ is None or name is None:
             return
-        elif self._demangled_to_symbol.get(name):
-            self._demangled_to_symbol[name].setTypeInfo(typ)
-        elif self._symbols.get(name):
-            self._symbols[name].setTypeInfo(typ)
 
-    def function_sym_by_pc(self, pc):
+        sym = self._demangled_to_symbol.get(name) or self._symbols.get(name)
+        if sym is None:
+            return
+        elif sym.type_info is not None and types.cu_order(sym.type_info) > types.cu_order(typ):
+            # Compilation units were parsed out of order (dbg.debuginfo.lazy). Keep the binding
+            # from the later CU, as an in-order parse would have.
+            return
+
+        sym.setTypeInfo(typ)
+
+    def _build_function_index(self):
         """
-        Given a $PC pointing somewhere within a function body, return the name of
-        the symbol for the function.
+        Build the sorted function address-range index used by function_sym_by_pc().
         """
+        self._func_starts = []
+        self._func_ends = []
+        self._func_syms = []
         for (addr, sym) in self._addr_to_symbol.items():
-            if addr > pc:
-                # Definitely not this one. Moreover, since _addr_to_symbol is kept
-                # and iterated in sorted order, we don't have one to return
-                return None
-
             if sym.elf_sym['st_info']['type'] != "STT_FUNC":
                 continue  # Not a function
 
-            if addr + sym.elf_sym['st_size'] > pc:
-                return sym  # Found it.
+            size = sym.elf_sym['st_size']
+            if size <= 0:
+                continue  # Can't contain any $PC.
+
+            self._func_starts.append(addr)
+            self._func_ends.append(addr + size)
+            self._func_syms.append(sym)
+
+    def function_sym_by_pc(self, pc):
+        """
+        Given a $PC pointing somewhere within a function body, return the name of
+        the symbol for the function.
+        """
+        idx = bisect.bisect_right(self._func_starts, pc) - 1
+        if idx < 0:
+            return None  # $PC is before the first function.
+
+        if pc < self._func_ends[idx]:
+            return self._func_syms[idx]  # Found it.
 
         return None
 
+    def source_line_for_pc(self, pc):
+        """
+        Given a $PC, return the source file and line it is compiled from as a string
+        of the form 'filename.cpp:NN', or None if there is no line info for $PC.
+
+        The .debug_line tables are decoded once, on the first call.
+        """
+        if pc is None or not self._loaded_debug_info:
+            return None
+
+        if self._line_table is None:
+            self._line_table = source_lines.LineTable(self._dwarf_info)
+
+        src_line = self._line_table.lookup(pc)
+        if src_line is None:
+            return None
+        return f'{src_line[0]}:{src_line[1]}'
+
     def lookup_sym(self, name):
         """
         Given a symbol name (regular or demangled), return an object
         of type symbol.Symbol with its information.
         """
-        return self._demangled_to_symbol.get(name) or self._symbols.get(name)
+        sym = self._demangled_to_symbol.get(name) or self._symbols.get(name)
+        if sym is not None and not self._debug_info_types.is_fully_parsed():
+            # Parse the debug info that binds sym.type_info, if we haven't already.
+            if sym.elf_sym['st_info']['type'] == "STT_FUNC":
+                self._debug_info_types.parseCUsForPC(sym.addr)
+            else:
+                self._debug_info_types.parseAllCUs()  # Can't tell which CU defines a variable.
+        return sym
 
 
     ###### Low-level serial interface
@@ -1092,28 +1586,93 @@ class Debugger(object):
         interaction with the server (which may be multiple command--response elements).
         """
         self._cmd_event.set()  # Tell the _conn_listener we want the lock, don't hog it.
+        self.__wake_listener()  # ... and stop waiting on the device to give it up.
         acquired = self._submit_lock.acquire(blocking, timeout)
         if acquired:
             self._cmd_event.clear()
         return acquired
 
+    def cmd_lock_held(self):
+        """ Return True if some thread (possibly the connection listener) holds the cmd lock. """
+        return self._submit_lock.locked()
+
+    def release_cmd_lock_to_listener(self, timeout):
+        """
+        Release the cmd lock and wait for the connection listener to take it to listen to the
+        device, as it does while the device is running.
+
+        @return True if the listener took the lock within `timeout` seconds.
+        """
+        self._listening.clear()
+        self.release_cmd_lock()
+        return self._listening.wait(timeout)
+
     def release_cmd_lock(self):
         """ Release the send_q lock. """
         self._submit_lock.release()
+        if threading.current_thread() is not self._listen_thread:
+            self.__wake_listener()  # The listener may want the lock back to listen to the device.
+
+    def __wake_listener(self):
+        """
+        Wake the listener thread from __wait_listen(), to act on a new command in the send_q or
+        a change of cmd lock ownership or of `_alive`.
+        """
+        wakeup_w = self._wakeup_w
+        if wakeup_w is None:
+            return
+        try:
+            os.write(wakeup_w, b'\0')
+        except BlockingIOError:
+            pass  # The pipe is already full of wakeups the listener hasn't seen yet.
+
+    def __wait_listen(self, timeout, conn=True):
+        """
+        Helper method for _conn_listener(): wait until a client wakes us with __wake_listener(),
+        `timeout` seconds pass or, if `conn` is True, the connection has data to read.
+
+        @return True if the connection may have data to read.
+        """
+        fds = [self._wakeup_r]
+        conn_fd = None
+        if conn:
+            if self._conn.available():
+                return True  # Already buffered, where select() won't see it.
+            conn_fd = self._conn.fileno()
+            if conn_fd is None:
+                return True  # Can't wait on this connection; the readline() timeout paces us.
+            fds.append(conn_fd)
+
+        (readable, _, _) = select.select(fds, [], [], timeout)
+        if self._wakeup_r in readable:
+            try:
+                os.read(self._wakeup_r, 4096)  # Consume all wakeups sent so far.
+            except BlockingIOError:
+                pass
+        return conn_fd is not None and conn_fd in readable
 
     QUEUE_TIMEOUT = 0.100  # wait up to 100ms to submit new data to a queue
 
     RESULT_SILENT = 0
     RESULT_ONELINE = 1
     RESULT_LIST = 2
+    # Internal to submit_cmds(): the send_q entry holds a list of (msgline, response_type, future)
+    # requests to pipeline, rather than a single msgline.
+    RESULT_PIPELINED = 3
 
     def __send_msg(self, msgline, response_type):
         """
         Helper method for _conn_listener(), when we need to send a message to the server
         and wait for a response.
         """
+        if response_type == Debugger.RESULT_PIPELINED:
+            self.__send_pipelined(msgline)
+            return
+
         is_break_cmd = msgline == protocol.DBG_OP_BREAK + '\n'
 
+        start_time = time.monotonic()
+        start_recv = self._bytes_recv
         self._conn.write(msgline.encode("utf-8"))
         if response_type == Debugger.RESULT_SILENT:
             # Client isn't waiting for a response. Immediately reassert responsibility
@@ -1125,8 +1684,10 @@ class Debugger(object):
         if response_type == Debugger.RESULT_ONELINE:
             line = None
             while self._alive and (line is None or len(line) == 0):
-                line = self._conn.readline().decode("utf-8").strip()
-                if len(line) == 0:
+                line = self.__read_response(msgline)
+                if not isinstance(line, str):
+                    break  # A framed response (or an error reading one).
+                elif len(line) == 0:
                     continue
                 elif not is_break_cmd and line.startswith(protocol.DBG_PAUSE_MSG):
                     # We got an extra 'Paused' confirmation after a BREAK followed by another cmd.
@@ -1147,6 +1708,7 @@ class Debugger(object):
                     line = None
 
             # We have received the response line.
+            self.__record_wire_stats(msgline, start_time, self._bytes_recv - start_recv)
             submitted = False
             # We reassert responsibility for reconnect after finishing requested conn I/O,
             # but before allowing the client to continue by handing them back the response line.
@@ -1162,7 +1724,7 @@ class Debugger(object):
                 self._recv_q.join()  # Wait for response line to be acknowledged by debugger.
         elif response_type == Debugger.RESULT_LIST:
             while self._alive:
-                line = self._conn.readline().decode("utf-8").strip()
+                line = self.__readline().decode("utf-8").strip()
                 if len(line) == 0:
                     continue
                 elif not is_break_cmd and line.startswith(protocol.DBG_PAUSE_MSG):
@@ -1185,6 +1747,7 @@ class Debugger(object):
                     # Data response line to forward to consumer
                     if line == protocol.DBG_END_LIST:
                         # end of list and end of requested conn I/O.
+                        self.__record_wire_stats(msgline, start_time, self._bytes_recv - start_recv)
                         # We reassert responsibility for reconnect after finishing requested conn I/O,
                         # but before allowing the client to continue by handing them back the response line.
                         self._restart_responsibility = ConnRestart.INTERNAL
@@ -1204,10 +1767,185 @@ class Debugger(object):
             self._recv_q.join()  # Wait for response lines to be acknowledged by debugger.
         elif response_type == Debugger.RESULT_SILENT:
             # Nothing further to process in this thread; no response.
-            pass
+            self.__record_wire_stats(msgline, start_time, self._bytes_recv - start_recv)
         else:
             self.msg_q(MsgLevel.ERR, f'Error: unknown response_type {response_type}')
 
+    def __send_pipelined(self, requests):
+        """
+        Helper method for _conn_listener() to send a batch of commands submitted through
+        submit_cmds().
+
+        Up to `dbg.pipeline.depth` commands are written to the device before we wait for the
+        first response. The debug service answers commands in the order it receives them, so the
+        in-flight requests form a FIFO correlation queue: each response line is attributed to the
+        oldest unanswered command, and another command is sent as each one is answered.
+
+        Results are delivered by resolving each request's future, rather than through the recv_q.
+        Any futures still pending if the connection fails are resolved with a
+        DisconnectedException.
+        """
+        depth = max(1, int(self.get_conf("dbg.pipeline.depth") or 1))
+        pending = collections.deque(requests)
+        # Correlation queue of [future, response_type, lines, msgline, start_time, bytes_recv].
+        in_flight = collections.deque()
+
+        self._send_q.task_done()  # Client waits on the futures from here on.
+
+        try:
+            while self._alive and (len(pending) > 0 or len(in_flight) > 0):
+                while len(pending) > 0 and len(in_flight) < depth:
+                    (msgline, response_type, future) = pending.popleft()
+                    start_time = time.monotonic()
+                    self._conn.write(msgline.encode("utf-8"))
+                    if response_type == Debugger.RESULT_SILENT:
+                        self.__record_wire_stats(msgline, start_time, 0)
+                        future.set_result(None)
+                    else:
+                        in_flight.append([future, response_type, [], msgline, start_time, 0])
+
+                if len(in_flight) == 0:
+                    continue
+
+                start_recv = self._bytes_recv
+                line = self.__read_response(in_flight[0][3])
+                in_flight[0][5] += self._bytes_recv - start_recv  # Charge what we read to the oldest.
+                if not isinstance(line, str):
+                    pass  # A framed response (or an error reading one).
+                elif len(line) == 0:
+                    continue
+                elif line.startswith(protocol.DBG_PAUSE_MSG):
+                    # Extra 'Paused' confirmation from an earlier BREAK; not a response to
+                    # any command in this batch.
+                    continue
+                elif line.startswith(protocol.DBG_RET_PRINT):
+                    # Send to the print queue.
+                    submitted = False
+                    while self._alive and not submitted:
+                        try:
+                            self._print_q.put((line[1:], MsgLevel.DEVICE), timeout=Debugger.QUEUE_TIMEOUT)
+                            submitted = True
+                        except queue.Full:
+                            continue
+                    continue
+
+                (future, response_type, lines, msgline, start_time, bytes_recv) = in_flight[0]
+                if response_type == Debugger.RESULT_LIST and line != protocol.DBG_END_LIST:
+                    lines.append(line)
+                    continue
+
+                # This line completes the oldest in-flight command.
+                in_flight.popleft()
+                self.__record_wire_stats(msgline, start_time, bytes_recv)
+                if len(pending) == 0 and len(in_flight) == 0:
+                    # We reassert responsibility for reconnect after finishing requested conn I/O,
+                    # but before allowing the client to continue by handing them the last result.
+                    self._restart_responsibility = ConnRestart.INTERNAL
+
+                if response_type == Debugger.RESULT_LIST:
+                    future.set_result(lines)
+                elif isinstance(line, Exception):
+                    future.set_exception(line)
+                else:
+                    future.set_result(line)
+        finally:
+            for (future, _, _, _, _, _) in in_flight:
+                future.set_exception(DisconnectedException())
+            for (_, _, future) in pending:
+                future.set_exception(DisconnectedException())
+
+
+    def __read_response(self, msgline):
+        """
+        Read the next response to the command `msgline` from the connection.
+
+        @return a text line (decoded and stripped; empty on timeout), or the payload `bytes`
+            of a framed response. Unknown memory in a framed response is returned as the
+            DBG_RET_UNKNOWN text line, and a corrupt frame as a MalformedResponseException.
+        """
+        if not self._framing or msgline[0] not in protocol.DBG_FRAMED_OPS:
+            return self.__readline().decode("utf-8").strip()
+
+        start = self.__read(1)
+        if len(start) == 0:
+            return ''  # Timeout.
+        elif start[0] != protocol.DBG_FRAME_START:
+            # A text line (e.g. a '>' print message) ahead of the response.
+            return (start + self.__readline()).decode("utf-8").strip()
+
+        header = self.__read_exact(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return self.__drop_partial_frame(msgline)
+        (payload_len, opcode) = _FRAME_HEADER.unpack(header)
+        body = self.__read_exact(payload_len + _FRAME_CRC.size)  # Payload and CRC.
+        if len(body) < payload_len + _FRAME_CRC.size:
+            # e.g. a byte of the header was lost, and payload_len is garbage.
+            return self.__drop_partial_frame(msgline)
+        payload = body[0:payload_len]
+        (crc,) = _FRAME_CRC.unpack_from(body, payload_len)
+        if zlib.crc32(header + payload) != crc:
+            return MalformedResponseException(f'Bad CRC in framed response to {msgline.strip()}')
+        elif opcode == ord(protocol.DBG_RET_UNKNOWN):
+            return protocol.DBG_RET_UNKNOWN
+
+        return payload
+
+    def __read_exact(self, size):
+        """
+        Read exactly `size` bytes of a frame from the connection.
+
+        @return the bytes read; fewer than `size` if the connection goes quiet for the poll
+            timeout before they all arrive.
+        """
+        poll_timeout = max(self.get_conf("dbg.poll.timeout"), 10.0) / 1000.0
+        data = self.__read(size)
+        deadline = time.monotonic() + poll_timeout
+        while len(data) < size:
+            if not self._alive:
+                raise DisconnectedException()
+            more = self.__read(size - len(data))
+            if len(more) > 0:
+                deadline = time.monotonic() + poll_timeout  # Still arriving.
+            elif time.monotonic() >= deadline:
+                break
+            data += more
+        return data
+
+    def __drop_partial_frame(self, msgline):
+        """
+        Discard the rest of a framed response that did not arrive in full, so the next
+        command's response is read from the start.
+
+        @return a MalformedResponseException for the response to `msgline`.
+        """
+        while self._conn.available():
+            self.__read(self._conn.available())
+        return MalformedResponseException(f'Incomplete framed response to {msgline.strip()}')
+
+    def __readline(self):
+        """ Read a line from the connection, counting the bytes received. """
+        data = self._conn.readline()
+        self._bytes_recv += len(data)
+        return data
+
+    def __read(self, size):
+        """ Read up to `size` bytes from the connection, counting the bytes received. """
+        data = self._conn.read(size)
+        self._bytes_recv += len(data)
+        return data
+
+    def __record_wire_stats(self, msgline, start_time, bytes_recv):
+        """
+        Record the traffic and latency of the command `msgline`, which was written at start_time
+        and whose response (bytes_recv bytes in all) has now been read.
+        """
+        opcode = msgline.strip().split(' ', 1)[0]
+        self._wire_stats.record(opcode, len(msgline), bytes_recv, time.monotonic() - start_time)
+
+    def get_wire_stats(self):
+        """ Return the WireStats that count the commands sent to the device. """
+        return self._wire_stats
+
     def __flush_recv_q(self):
         """
         Before sending a new command, erase any unconsumed response lines from prior cmd.
@@ -1264,6 +2002,7 @@ class Debugger(object):
             ownership off to the client
         """
         prior_state = self._process_state
+        self.clear_mem_cache()  # The sketch ran between the last pause and this one.
         self._process_state = ProcessState.BREAK  # Confirm the BREAK status first.
         own_lock = True
 
@@ -1387,8 +2126,8 @@ class Debugger(object):
                         # Send any pending outbound data.
                         if self._send_q.qsize() == 0:
                             # ... client owns the lock, but didn't submit anything yet?
-                            # Give them a chance to act.
-                            time.sleep(0)
+                            # Wait for them to submit a command or release the lock.
+                            self.__wait_listen(Debugger.QUEUE_TIMEOUT, conn=False)
 
                         if self._send_q.qsize() > 0:
                             # If a command is waiting to be sent, *someone* should own the send lock.
@@ -1418,12 +2157,23 @@ class Debugger(object):
                         assert own_lock
                         assert self._send_q.qsize() == 0
 
-                        # Ideally we would have a way to interrupt this if the client
-                        # wants to fill the _send_q while we're waiting on a silent
-                        # channel, but I don't have a clean way to select() on both at
-                        # once. Instead we rely on the short timeout we specified when
-                        # opening the connection to bring us back to the top of the loop.
+                        # Wait for the device to send something. A client that wants the lock
+                        # wakes us from this wait, so we can hand it over right away.
                         # We'll release lock ownership on our way back out.
+                        # Other wakeups (e.g. from release_cmd_lock() just before we took the
+                        # lock) don't end the wait; a client that wants the lock sets _cmd_event.
+                        self._listening.set()
+                        deadline = time.monotonic() + Debugger.QUEUE_TIMEOUT
+                        readable = False
+                        while not readable and self._alive and not self._cmd_event.is_set() and \
+                                time.monotonic() < deadline:
+                            readable = self.__wait_listen(max(deadline - time.monotonic(), 0))
+                        if not readable:
+                            self.release_cmd_lock()
+                            own_lock = False
+                            time.sleep(0)  # Yield to other threads; anyone else want the lock?
+                            continue
+
                         line = self._conn.readline().decode("utf-8").strip()
                         submitted = False
 
@@ -1536,6 +2286,8 @@ class Debugger(object):
 
             # print("<-- %s" % line.strip())
             self._recv_q.task_done()
+            if isinstance(line, Exception):
+                raise line  # Passed along by the listener thread.
             return line
 
         # Didn't get a response in enough time. Assume we got disconnected.
@@ -1546,24 +2298,12 @@ class Debugger(object):
         raise DisconnectedException()
 
 
-    def send_cmd(self, dbg_cmd, result_type):
+    def __prepare_send(self, dbg_cmd):
         """
-        Send a low-level debugger command across the wire and return the results.
-
-        @param dbg_cmd either a formatted command string or list of cmd and arguments.
-        @param result_type an integer/enum specifying whether to expect 0, 1, or 'n'
-        ($-terminated list) lines in response.
-
-        @throws NoServerConnException if not connected to the device.
-        @throws DisconnectedException if a disconnect happens during communication.
-        @throws InvalidConnStateException if we need to interrupt the sketch to send
-                the command and cannot affirmatively do so.
-        @throws RuntimeError if result_type is invalid.
-
-        @return type varies based on result_type: SILENT => None; ONELINE => a single
-        string response line; LIST => a List of string response lines.
+        Ensure the device is in a state to receive `dbg_cmd`: connected, paused (unless this is
+        itself a BREAK or STEP), speaking a protocol version we understand, and with a resolved
+        architecture.
         """
-
         if not self.is_open():
             raise NoServerConnException("Error: No debug server connection open")
 
@@ -1598,6 +2338,30 @@ class Debugger(object):
             self.verboseprint('Fetching ARCH_SPEC list to identify \'auto\' architecture.')
             self.get_arch_specs()
 
+        if isinstance(dbg_cmd, list) and dbg_cmd[0] in protocol.DBG_FRAMED_OPS:
+            self.__negotiate_framing()
+
+    def __negotiate_framing(self):
+        """
+        Before sending a command whose response may be framed, turn the device's binary framing
+        of responses on or off to follow the 'dbg.wire.framed' setting, if the device supports it.
+        """
+        want_framing = bool(self.get_conf("dbg.wire.framed")) and \
+            self._protocol_version >= protocol.DBG_FRAMING_MIN_PROTOCOL_VERSION
+
+        if self._framing is None and not want_framing:
+            self._framing = False  # The device does not frame responses after a pause.
+        elif (self._framing is None and want_framing) or (self._framing and not want_framing):
+            # The response to the FRAMING command itself is always a text line.
+            result = self.send_cmd([protocol.DBG_OP_FRAMING, int(want_framing)], Debugger.RESULT_ONELINE)
+            self._framing = result.strip() == '1'
+            self.verboseprint(f'Binary response framing: {self._framing}')
+
+    @staticmethod
+    def __format_cmd(dbg_cmd):
+        """
+        Format a command string or list of cmd and arguments as a newline-terminated msgline.
+        """
         if type(dbg_cmd) == list:
             dbg_cmd = [str(x) for x in dbg_cmd]
             dbg_cmd = " ".join(dbg_cmd) + "\n"
@@ -1607,15 +2371,39 @@ class Debugger(object):
         if not dbg_cmd.endswith("\n"):
             dbg_cmd = dbg_cmd + "\n"
 
+        return dbg_cmd
+
+    def send_cmd(self, dbg_cmd, result_type):
+        """
+        Send a low-level debugger command across the wire and return the results.
+
+        @param dbg_cmd either a formatted command string or list of cmd and arguments.
+        @param result_type an integer/enum specifying whether to expect 0, 1, or 'n'
+        ($-terminated list) lines in response.
+
+        @throws NoServerConnException if not connected to the device.
+        @throws DisconnectedException if a disconnect happens during communication.
+        @throws InvalidConnStateException if we need to interrupt the sketch to send
+                the command and cannot affirmatively do so.
+        @throws RuntimeError if result_type is invalid.
+
+        @return type varies based on result_type: SILENT => None; ONELINE => a single
+        string response line; LIST => a List of string response lines.
+        """
+
+        self.__prepare_send(dbg_cmd)
+        dbg_cmd = self.__format_cmd(dbg_cmd)
+
         send_req = (dbg_cmd, result_type)
         self._send_q.put(send_req)  # Tell the communication thread to send the command.
+        self.__wake_listener()
         self._send_q.join()         # Wait for it to be sent.
 
         if result_type == Debugger.RESULT_SILENT:
             return None
         elif result_type == Debugger.RESULT_ONELINE:
             line = None
-            while line is None or len(line) == 0:
+            while line is None or line == '':  # (An empty framed payload is a real response.)
                 line = self.__wait_response()
 
             return line
@@ -1649,6 +2437,68 @@ class Debugger(object):
             raise RuntimeError("Invalid 'result_type' arg (%d) sent to send_cmd" % result_type)
 
 
+    def submit_cmds(self, cmds):
+        """
+        Send a batch of low-level debugger commands across the wire, pipelined.
+
+        Rather than waiting for each command's response before sending the next, up to
+        `dbg.pipeline.depth` commands are kept in flight to the device at once. Responses are
+        matched to commands in FIFO order. Use this for runs of independent reads; commands that
+        change the process state (break, continue, step, reset) must go through send_cmd().
+
+        The caller must hold the cmd lock until all the returned futures are resolved.
+
+        @param cmds a list of (dbg_cmd, result_type) pairs, formatted as for send_cmd().
+        @throws NoServerConnException if not connected to the device.
+        @throws InvalidConnStateException if we need to interrupt the sketch to send
+                the commands and cannot affirmatively do so.
+        @throws RuntimeError if a result_type is invalid.
+        @return a list of concurrent.futures.Future objects, one per command in `cmds`, which
+        resolve to the same values send_cmd() would return for each, or which raise
+        DisconnectedException if the connection fails before the response arrives.
+        """
+        requests = []
+        for (dbg_cmd, result_type) in cmds:
+            if result_type not in (Debugger.RESULT_SILENT, Debugger.RESULT_ONELINE, Debugger.RESULT_LIST):
+                raise RuntimeError("Invalid 'result_type' arg (%d) sent to submit_cmds" % result_type)
+
+            self.__prepare_send(dbg_cmd)
+            requests.append((self.__format_cmd(dbg_cmd), result_type, concurrent.futures.Future()))
+
+        if len(requests) > 0:
+            self._send_q.put((requests, Debugger.RESULT_PIPELINED))  # Hand batch to comm thread.
+            self.__wake_listener()
+            self._send_q.join()  # Wait for it to be accepted.
+
+        return [future for (_, _, future) in requests]
+
+    def wait_results(self, futures):
+        """
+        Wait for the futures returned by submit_cmds() and return their results, in order.
+
+        Each result is given the same time to arrive that send_cmd() allows for a response.
+
+        @throws DisconnectedException if a disconnect happens during communication or the
+            device does not respond in time.
+        """
+        max_attempts = max(self.get_conf("dbg.poll.retry"), 1)
+        attempt_timeout = max(self.get_conf("dbg.poll.timeout"), 10.0) / 1000.0
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=max_attempts * attempt_timeout))
+            except concurrent.futures.TimeoutError:
+                # Didn't get a response in enough time. Assume we got disconnected.
+                # Shut down the thread cleanly from our side.
+                self._alive = False
+                self._disconnect_err = True
+                self.msg_q(MsgLevel.ERR, "Timeout waiting for response from device.")
+                raise DisconnectedException()
+
+        return results
+
+
     ###### Higher-level commands to communicate with server
 
 
@@ -1663,6 +2513,8 @@ class Debugger(object):
         break_ok = self.send_cmd(protocol.DBG_OP_BREAK, Debugger.RESULT_ONELINE)
         if break_ok.startswith(protocol.DBG_PAUSE_MSG):
             prior_state = self._process_state
+            if prior_state != ProcessState.BREAK:
+                self.clear_mem_cache()  # Device may have run since we last read memory.
             self._process_state = ProcessState.BREAK
             flagBitNum, flagsAddr, hwAddr = self._parse_break_response(break_ok)
             if prior_state == ProcessState.ONE_STEP:
@@ -1702,6 +2554,7 @@ class Debugger(object):
     def send_continue(self):
         """ Continue execution unhindered. """
         self.clear_frame_cache()  # Backtrace is invalidated by continued execution.
+        self.clear_mem_cache()    # As is anything we've read from memory.
         continue_ok = self.send_cmd(protocol.DBG_OP_CONTINUE, Debugger.RESULT_ONELINE)
         if continue_ok == "Continuing":
             self._process_state = ProcessState.RUNNING
@@ -1718,6 +2571,7 @@ class Debugger(object):
             raise RuntimeError("Single-step mode not supported on this architecture.")
 
         self.clear_frame_cache()  # Backtrace is invalidated
+        self.clear_mem_cache()
         self.msg_q(MsgLevel.INFO, "Stepping...")
         self._process_state = ProcessState.ONE_STEP
         self.send_cmd(protocol.DBG_OP_STEP, Debugger.RESULT_SILENT)
@@ -1725,7 +2579,20 @@ class Debugger(object):
 
 
     def reset_sketch(self):
+        self.clear_frame_cache()
+        self.clear_mem_cache()
         self.send_cmd(protocol.DBG_OP_RESET, Debugger.RESULT_SILENT)
+
+        # The device starts at its base baud rate again; follow it there.
+        base_baud = self._conn.get_base_baud() if self._conn is not None else None
+        if base_baud is not None and base_baud != self._conn.get_baud():
+            self.__stop_conn_listener()
+            try:
+                self._conn.set_baud(base_baud)
+            finally:
+                self.__start_conn_listener(announce=False)
+            self.verboseprint(f'Returned to {base_baud} baud after reset')
+
         self._process_state = ProcessState.UNKNOWN
 
     def get_registers(self):
@@ -1743,7 +2610,11 @@ class Debugger(object):
             register_map = self._arch["register_list_fmt"]
             num_general_regs = self._arch["general_regs"]
 
-        reg_values = self.send_cmd(protocol.DBG_OP_REGISTERS, Debugger.RESULT_LIST)
+        if self._backend is not None:
+            reg_values = self._backend.get_register_values()
+        else:
+            reg_values = [int(rval, base=16) for rval in
+                          self.send_cmd(protocol.DBG_OP_REGISTERS, Debugger.RESULT_LIST)]
         registers = {}
         idx = 0
         general_reg_num = 0
@@ -1759,12 +2630,12 @@ class Debugger(object):
 
                 start_idx = idx
                 for rval in reg_values[start_idx:last]:
-                    registers["r" + str(general_reg_num)] = int(rval, base=16)
+                    registers["r" + str(general_reg_num)] = rval
                     general_reg_num += 1
                     idx += 1
             else:
                 # We have a specific named register to assign.
-                registers[reg_name] = int(reg_values[idx], base=16)
+                registers[reg_name] = reg_values[idx]
                 idx += 1
 
         return registers
@@ -1779,7 +2650,15 @@ class Debugger(object):
             self.msg_q(MsgLevel.WARN, f"Warning: cannot set memory poke size = {size}; using 1")
             size = 1
 
-        self.send_cmd([protocol.DBG_OP_POKE, size, addr, value], Debugger.RESULT_SILENT)
+        if self._backend is not None:
+            self._backend.write_ram(addr, size, value % (1 << (8 * size)))
+        else:
+            self.send_cmd([protocol.DBG_OP_POKE, size, addr, value], Debugger.RESULT_SILENT)
+
+        if self._sram_cache is not None:
+            # Write through to the cache.
+            data = (value % (1 << (8 * size))).to_bytes(size, byteorder=self.get_arch_conf("endian"))
+            self._sram_cache.write(addr, data)
 
     def get_sram(self, addr, size=1):
         """
@@ -1792,15 +2671,183 @@ class Debugger(object):
             self.msg_q(MsgLevel.WARN, f"Warning: cannot set memory fetch size = {size}; using 1")
             size = 1
 
+        if self._backend is not None:
+            return int.from_bytes(self._backend.read_ram(addr, size), byteorder=self.get_arch_conf("endian"))
+
+        if self.__use_sram_cache() and self._sram_cache.is_cacheable(addr, size):
+            data = self._sram_cache.read(addr, size, self.__read_memory_uncached)
+            return int.from_bytes(data, byteorder=self.get_arch_conf("endian"))
+
         result = self.send_cmd([protocol.DBG_OP_RAMADDR, size, addr], Debugger.RESULT_ONELINE)
-        return int(result, base=16)
+        return self.__parse_read_result(result, f'0x{addr:x}')
+
+    def __parse_read_result(self, result, location):
+        """
+        Parse the response to a RAMADDR, STACKREL, FLASHADDR or CHECKSUM command: either a hex
+        text line, or the payload of a framed response holding the value in device byte order.
+
+        @param location describes the memory that was read, for error messages.
+        @throws UnknownMemoryException if the service reports the memory contents are unknown.
+        @throws MalformedResponseException if a text response is not a hex number.
+        """
+        if isinstance(result, bytes):
+            return int.from_bytes(result, byteorder=self.get_arch_conf("endian"))
+        elif result.strip() == protocol.DBG_RET_UNKNOWN:
+            raise UnknownMemoryException(f"Memory at {location} is unknown")
+
+        try:
+            return int(result, base=16)
+        except ValueError:
+            raise MalformedResponseException(f'Could not parse response for memory at {location}: {result}')
+
+    def get_sram_multi(self, reads):
+        """
+        Return data from several SRAM locations on the instance, pipelining the reads.
+
+        @param reads a list of (addr, size) pairs, each specifying an argument set for get_sram().
+        @return a list of the values at each (addr, size) location, in the same order.
+        """
+        if self._backend is not None or \
+                (self.__use_sram_cache() and
+                 all([self._sram_cache.is_cacheable(addr, size) for (addr, size) in reads])):
+            return [self.get_sram(addr, size) for (addr, size) in reads]
+
+        futures = self.submit_cmds([([protocol.DBG_OP_RAMADDR, size, addr], Debugger.RESULT_ONELINE)
+                                    for (addr, size) in reads])
+        return [self.__parse_read_result(result, f'0x{addr:x}')
+                for ((addr, _), result) in zip(reads, self.wait_results(futures))]
+
+    def read_memory(self, addr, length):
+        """
+        Return a block of `length` bytes from SRAM on the instance, starting at `addr`.
+
+        If the device speaks a protocol version that supports RAMBLOCK, the memory is read in
+        chunks of up to DBG_RAMBLOCK_MAX_LEN bytes per command. Otherwise, we fall back to a
+        series of word-sized RAMADDR reads. Either way, the commands are pipelined.
+
+        @param addr the physical address within the SRAM segment of the first byte to read.
+        @param length the number of bytes to read.
+        @throws MalformedResponseException if the device returns the wrong number of bytes.
+        @return a `bytes` object of length `length` holding the memory in address order.
+        """
+        if length is None or length < 1:
+            return b''
+
+        if self._backend is not None:
+            return self._backend.read_ram_block(addr, length)
+
+        if self.__use_sram_cache() and self._sram_cache.is_cacheable(addr, length):
+            return self._sram_cache.read(addr, length, self.__read_memory_uncached)
+
+        return self.__read_memory_uncached(addr, length)
+
+    def __read_memory_uncached(self, addr, length):
+        """
+        Implement read_memory() by reading from the device, bypassing the SRAM cache.
+        """
+        if self._protocol_version is None:
+            # We need to learn which protocol version the device speaks before choosing how
+            # to read memory from it; this happens during the break handshake.
+            if not self.send_break():
+                raise InvalidConnStateException("Could not pause device sketch to send command.")
+
+        if self._protocol_version < protocol.DBG_RAMBLOCK_MIN_PROTOCOL_VERSION:
+            return self.__read_memory_by_words(addr, length)
+
+        chunks = []  # List of (addr, len) for each RAMBLOCK command to send.
+        end_addr = addr + length
+        while addr < end_addr:
+            chunk_len = min(protocol.DBG_RAMBLOCK_MAX_LEN, end_addr - addr)
+            chunks.append((addr, chunk_len))
+            addr += chunk_len
+
+        futures = self.submit_cmds([([protocol.DBG_OP_RAMBLOCK, chunk_len, chunk_addr], Debugger.RESULT_ONELINE)
+                                    for (chunk_addr, chunk_len) in chunks])
+        results = self.wait_results(futures)
+
+        out = bytearray()
+        for ((chunk_addr, chunk_len), result) in zip(chunks, results):
+            if isinstance(result, bytes):
+                chunk = result  # Framed response.
+            elif result.strip() == protocol.DBG_RET_UNKNOWN:
+                raise UnknownMemoryException(f"Memory at 0x{chunk_addr:x} is unknown")
+            else:
+                try:
+                    chunk = bytes.fromhex(result.strip())
+                except ValueError:
+                    raise MalformedResponseException(
+                        f'Could not parse RAMBLOCK response at addr 0x{chunk_addr:x}: {result}')
+
+            if len(chunk) != chunk_len:
+                raise MalformedResponseException(
+                    f'Requested {chunk_len} bytes at addr 0x{chunk_addr:x} but got {len(chunk)}')
+
+            out.extend(chunk)
+
+        return bytes(out)
+
+    def __read_memory_by_words(self, addr, length):
+        """
+        Implement read_memory() with RAMADDR reads, for devices that do not support RAMBLOCK.
+        Reads 4 bytes at a time, followed by single-byte reads for any remainder.
+        """
+        self.check_arch()
+        byte_order = self.get_arch_conf("endian")
+        reads = []
+        end_addr = addr + length
+        while addr < end_addr:
+            read_size = 4 if end_addr - addr >= 4 else 1
+            reads.append((addr, read_size))
+            addr += read_size
+
+        out = bytearray()
+        for ((_, read_size), v) in zip(reads, self.get_sram_multi(reads)):
+            out.extend(v.to_bytes(read_size, byteorder=byte_order))
+
+        return bytes(out)
+
+    def get_ram_checksums(self, ranges):
+        """
+        Return the CRC-32 of each of several blocks of SRAM on the instance, pipelining the
+        CHECKSUM commands. Each block is summed on the device, so this is much faster than
+        reading memory to compare it to a copy we already hold.
+
+        @param ranges a list of (addr, length) pairs, each specifying a block of SRAM.
+        @throws UnsupportedDebuggerProtocolException if the device does not support CHECKSUM.
+        @throws UnknownMemoryException if the service reports the memory contents are unknown.
+        @return a list of the CRC-32 values (see zlib.crc32()) of each block, in the same order.
+        """
+        if self._backend is not None:
+            return [self._backend.checksum_ram(addr, length) for (addr, length) in ranges]
+
+        if self._protocol_version is None:
+            if not self.send_break():
+                raise InvalidConnStateException("Could not pause device sketch to send command.")
+
+        if self._protocol_version < protocol.DBG_CHECKSUM_MIN_PROTOCOL_VERSION:
+            raise UnsupportedDebuggerProtocolException(
+                f'Device running debugger protocol v{self._protocol_version} cannot checksum memory')
+
+        futures = self.submit_cmds([([protocol.DBG_OP_CHECKSUM, length, addr], Debugger.RESULT_ONELINE)
+                                    for (addr, length) in ranges])
+        return [self.__parse_read_result(result, f'0x{addr:x}')
+                for ((addr, _), result) in zip(ranges, self.wait_results(futures))]
 
     def get_stack_sram(self, offset, size=1):
         """
         Return data from SRAM on the instance, relative to the stack pointer.
         """
+        if self._backend is not None:
+            return int.from_bytes(self._backend.read_stack(offset, size), byteorder=self.get_arch_conf("endian"))
+
+        if self.__use_sram_cache():
+            return self._sram_cache.read_stack(offset, size, self.__get_stack_sram_uncached)
+
+        return self.__get_stack_sram_uncached(offset, size)
+
+    def __get_stack_sram_uncached(self, offset, size):
         result = self.send_cmd([protocol.DBG_OP_STACKREL, size, offset], Debugger.RESULT_ONELINE)
-        return int(result, base=16)
+        return self.__parse_read_result(result, f'$SP+{offset}')
 
     def get_flash(self, addr, size=1):
         """
@@ -1808,15 +2855,20 @@ class Debugger(object):
 
         This function expects a physical address within the Flash segment.
         """
+        if self._backend is not None:
+            return int.from_bytes(self._backend.read_flash(addr, size), byteorder=self.get_arch_conf("endian"))
 
         result = self.send_cmd([protocol.DBG_OP_FLASHADDR, size, addr], Debugger.RESULT_ONELINE)
-        return int(result, base=16)
+        return self.__parse_read_result(result, f'flash 0x{addr:x}')
 
     def set_bit_flag(self, flags_addr, bit_num, val):
         """
         In a bitfield flags variable, set the bit 'bit_num' to val (0 or 1).
         """
         self.send_cmd([protocol.DBG_OP_SET_FLAG, bit_num, flags_addr, int(val)], Debugger.RESULT_SILENT)
+        if self._sram_cache is not None:
+            # Rather than replicate the bit-set locally, re-read the flags word on next access.
+            self._sram_cache.discard(flags_addr, bit_num // 8 + 1)
 
     def get_stack_snapshot(self, count=16, skip=-1):
         """
@@ -1852,18 +2904,19 @@ class Debugger(object):
         regs = self.get_registers()
         sp = regs["SP"]
         ramend = self._arch["RAMEND"]
-        max_len = (ramend - sp + skip + sp_off) / push_word_len
+        max_len = (ramend - sp + skip + sp_off) // push_word_len
         count = min(count, max_len)
         self.verboseprint(f'$SP=0x{sp:08x}, RAMEND=0x{ramend:08x}, cnt={count}, word_sz={push_word_len}')
         start_addr = sp + skip + sp_off
         last_addr = min(start_addr + count * push_word_len, ramend)
         self.verboseprint(f'Iterating range {start_addr:08x} ... {last_addr:08x}')
+        byte_order = self.get_arch_conf("endian")
         snapshot = []
-        for i in range(start_addr, last_addr, push_word_len):
-            v = int(self.send_cmd([protocol.DBG_OP_RAMADDR, push_word_len, i], Debugger.RESULT_ONELINE),
-                    base=16)
-            # self.verboseprint(f"reading {i:08x} -> {v:08x}")
-            snapshot.append(v)
+        # Read every word that starts before last_addr in a single block.
+        num_words = max(0, (last_addr - start_addr + push_word_len - 1) // push_word_len)
+        mem = self.read_memory(start_addr, num_words * push_word_len)
+        for i in range(0, len(mem), push_word_len):
+            snapshot.append(int.from_bytes(mem[i:i + push_word_len], byteorder=byte_order))
         return (sp, start_addr, snapshot)
 
 
@@ -1871,8 +2924,10 @@ class Debugger(object):
         """
         Return info about memory map of the CPU and usage.
         """
-        lines = self.send_cmd(protocol.DBG_OP_MEMSTATS, Debugger.RESULT_LIST)
-        lines = [int(x, base=16) for x in lines]
+        if self._backend is not None:
+            lines = self._backend.get_memstats_values()
+        else:
+            lines = [int(x, base=16) for x in self.send_cmd(protocol.DBG_OP_MEMSTATS, Debugger.RESULT_LIST)]
 
         mem_map = {}
         mem_map['RAMSTART'] = self._arch["RAMSTART"]
@@ -1898,6 +2953,9 @@ class Debugger(object):
         if pin < 0 or pin >= self._platform["gpio_pins"]:
             return None
 
+        if self._backend is not None:
+            return self._backend.get_gpio_value(pin)
+
         v = self.send_cmd([protocol.DBG_OP_PORT_IN, pin], Debugger.RESULT_ONELINE)
         if len(v):
             return int(v)
@@ -1912,7 +2970,10 @@ class Debugger(object):
         if pin < 0 or pin >= self._platform["gpio_pins"]:
             return
 
-        self.send_cmd([protocol.DBG_OP_PORT_OUT, pin, val], Debugger.RESULT_SILENT)
+        if self._backend is not None:
+            self._backend.set_gpio_value(pin, val)
+        else:
+            self.send_cmd([protocol.DBG_OP_PORT_OUT, pin, val], Debugger.RESULT_SILENT)
 
     def get_arch_specs(self):
         """
@@ -2112,6 +3173,33 @@ class Debugger(object):
         self._cached_frames = None
         self._frame_cache_complete = False
 
+    def clear_mem_cache(self):
+        """ Clear cached SRAM contents. """
+        if self._sram_cache is not None:
+            self._sram_cache.invalidate()
+
+    def get_sram_cache(self):
+        """
+        Return the SramPageCache in use, or None if there is no architecture that defines RAM
+        bounds loaded.
+        """
+        return self._sram_cache
+
+    def __use_sram_cache(self):
+        """
+        Return True if SRAM reads may be served from the cache. Only memory read while the
+        device is paused is cached, and it's only valid until the device is resumed.
+
+        Whole pages are only worth fetching if the device can send them in a single RAMBLOCK
+        command, so the cache is not used with older devices. Nor is it used with a backend,
+        which already serves reads in-process.
+        """
+        return self._backend is None and self._sram_cache is not None and \
+            self._process_state == ProcessState.BREAK and \
+            self._protocol_version is not None and \
+            self._protocol_version >= protocol.DBG_RAMBLOCK_MIN_PROTOCOL_VERSION and \
+            self.get_conf("dbg.mem.cache")
+
     def get_top_user_frame(self):
         """
         Return the top-most frame on the stack that belongs to the main sketch (as opposed
@@ -2223,6 +3311,8 @@ class Debugger(object):
                 flagsAddr = 0
                 hwAddr = 0
 
+        self._framing = None  # The device turns off response framing whenever it pauses.
+
         if self._protocol_version is None:
             self._protocol_version = protoVer
             if protoVer > HOST_MAX_PROTOCOL_VERSION:
@@ -0,0 +1,247 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Persistent on-disk cache of the symbol table and debug info parsed from an ELF file.
+
+Parsing .debug_info for a large sketch can take several seconds. After the first time we
+parse a given ELF file, we pickle the resulting Symbol table, ParsedDebugInfo type graph and
+.debug_frame bindings into a cache file named for the SHA-256 digest of the ELF contents.
+Later sessions that load the same ELF unpickle that instead.
+
+The parsed objects hold references to pyelftools objects (DIEs, compilation units, CFI
+entries...) that are backed by the open ELF file and cannot be pickled. These are written as
+references (e.g. "the DIE at offset 0x1234") and bound to the equivalent objects of the
+newly-opened ELF's DWARFInfo when the cache is loaded. DIEs are resolved lazily, on first use.
+
+Any cache file that cannot be read, or was written for a different ELF mtime, architecture,
+debugger version, or cache format, is ignored; the caller reparses the ELF and replaces it.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+import elftools
+from elftools.dwarf.callframe import CFIEntry
+from elftools.dwarf.compileunit import CompileUnit
+from elftools.dwarf.die import DIE
+from elftools.dwarf.dwarfinfo import DWARFInfo
+from elftools.dwarf.ranges import RangeLists
+
+import arduino_dbg.version as version
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.arduino_dbg_cache")
+
+# Increment whenever the layout of cached objects (Symbol, types.*, or the state map saved by
+# the Debugger) changes incompatibly.
+CACHE_FORMAT_VERSION = 2
+
+CACHE_FILE_SUFFIX = '.debuginfo'
+
+# The type graph is deeply nested; pickle recurses once per level.
+_PICKLE_RECURSION_LIMIT = 20000
+
+
+class DIERef(object):
+    """
+    Placeholder for a DIE in an unpickled object graph; resolved on first access through
+    DieBase.die.
+    """
+
+    __slots__ = ['offset', '_dwarf_info']
+
+    def __init__(self, offset, dwarf_info):
+        self.offset = offset
+        self._dwarf_info = dwarf_info
+
+    def resolve(self):
+        return self._dwarf_info.get_DIE_from_refaddr(self.offset)
+
+
+class _DebugInfoPickler(pickle.Pickler):
+    """
+    Pickler that writes references to the Debugger and pyelftools objects instead of their state.
+
+    Objects in the optional `shared` map (key -> object) are also written as references, to be
+    bound to the objects with the same keys by the unpickler.
+    """
+
+    def __init__(self, file, debugger, shared=None):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._debugger = debugger
+        self._shared_keys = {}
+        for (key, obj) in (shared or {}).items():
+            self._shared_keys[id(obj)] = key
+
+    def persistent_id(self, obj):
+        if obj is self._debugger:
+            return ('debugger',)
+        elif id(obj) in self._shared_keys:
+            return ('shared', self._shared_keys[id(obj)])
+        elif isinstance(obj, DIE):
+            return ('die', obj.offset)
+        elif isinstance(obj, DIERef):
+            return ('die', obj.offset)
+        elif isinstance(obj, CompileUnit):
+            return ('cu', obj.cu_offset)
+        elif isinstance(obj, CFIEntry):
+            return ('cfi', obj.offset)
+        elif isinstance(obj, RangeLists):
+            return ('range_lists',)
+        elif isinstance(obj, DWARFInfo):
+            return ('dwarf_info',)
+        return None
+
+
+class _DebugInfoUnpickler(pickle.Unpickler):
+    """
+    Unpickler that binds references written by _DebugInfoPickler to the current Debugger and ELF.
+    """
+
+    def __init__(self, file, debugger, dwarf_info, shared=None):
+        super().__init__(file)
+        self._debugger = debugger
+        self._dwarf_info = dwarf_info
+        self._shared = shared or {}
+        self._cfi_entries = None
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == 'debugger':
+            return self._debugger
+        elif kind == 'shared':
+            return self._shared[pid[1]]
+        elif self._dwarf_info is None:
+            raise pickle.UnpicklingError(f'Cached reference to {kind} but ELF has no debug info')
+        elif kind == 'die':
+            return DIERef(pid[1], self._dwarf_info)
+        elif kind == 'cu':
+            return self._dwarf_info.get_CU_at(pid[1])
+        elif kind == 'cfi':
+            if self._cfi_entries is None:
+                self._cfi_entries = {entry.offset: entry for entry in self._dwarf_info.CFI_entries()}
+            return self._cfi_entries[pid[1]]
+        elif kind == 'range_lists':
+            return self._dwarf_info.range_lists()
+        elif kind == 'dwarf_info':
+            return self._dwarf_info
+
+        raise pickle.UnpicklingError(f'Unknown persistent id: {pid}')
+
+
+def dump_to(obj, f, debugger, shared=None):
+    """
+    Pickle an object graph of parsed debug info to file `f`.
+
+    @param debugger the Debugger that owns the objects; references to it are not pickled.
+    @param shared optional map of key -> object for other objects to pickle by reference.
+    """
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, _PICKLE_RECURSION_LIMIT))
+    try:
+        _DebugInfoPickler(f, debugger, shared).dump(obj)
+    finally:
+        sys.setrecursionlimit(old_limit)
+
+
+def load_from(f, debugger, dwarf_info, shared=None):
+    """
+    Unpickle an object graph written by dump_to(), binding its references to `debugger`,
+    the objects of `dwarf_info`, and the objects in the `shared` map.
+    """
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, _PICKLE_RECURSION_LIMIT))
+    try:
+        return _DebugInfoUnpickler(f, debugger, dwarf_info, shared).load()
+    finally:
+        sys.setrecursionlimit(old_limit)
+
+
+def elf_digest(elf_data):
+    """
+    Return the hex SHA-256 digest of the ELF file contents (a bytes-like object or mmap).
+    """
+    return hashlib.sha256(elf_data).hexdigest()
+
+
+def _cache_filename(cache_dir, digest):
+    return os.path.join(os.path.expanduser(cache_dir), digest + CACHE_FILE_SUFFIX)
+
+
+def _make_header(digest, elf_mtime, arch_key):
+    """
+    Return the header that identifies what a cache file is valid for.
+    """
+    return {
+        'format': CACHE_FORMAT_VERSION,
+        'dbg_version': version.DBG_VERSION_STR,
+        'pyelftools_version': elftools.__version__,
+        'python': sys.version_info[0:2],
+        'elf_digest': digest,
+        'elf_mtime': elf_mtime,
+        'arch': arch_key,
+    }
+
+
+def load(cache_dir, digest, elf_mtime, arch_key, debugger, dwarf_info):
+    """
+    Load cached debug info state for an ELF file, if a valid cache entry exists.
+
+    @param cache_dir the directory holding cache files.
+    @param digest the elf_digest() of the ELF file.
+    @param elf_mtime the modification time of the ELF file.
+    @param arch_key any value that identifies the architecture config the ELF was parsed under.
+    @param debugger the Debugger that will own the loaded objects.
+    @param dwarf_info the DWARFInfo of the opened ELF file, or None if it has no debug info.
+    @return the state map passed to save(), or None if there is no usable cache entry.
+    """
+    filename = _cache_filename(cache_dir, digest)
+    if not os.path.exists(filename):
+        return None
+
+    try:
+        with open(filename, 'rb') as f:
+            header = pickle.load(f)
+            if header != _make_header(digest, elf_mtime, arch_key):
+                debugger.verboseprint(f'Ignoring stale debug info cache file {filename}')
+                return None
+
+            return load_from(f, debugger, dwarf_info)
+    except Exception as e:
+        debugger.verboseprint(f'Could not load debug info cache file {filename}: {e}')
+        return None
+
+
+def save(cache_dir, digest, elf_mtime, arch_key, debugger, state):
+    """
+    Write debug info state for an ELF file to the cache.
+
+    The file is written atomically; failures are reported through verboseprint() and otherwise
+    ignored.
+
+    @return True if the cache file was written.
+    """
+    cache_dir = os.path.expanduser(cache_dir)
+    filename = _cache_filename(cache_dir, digest)
+    tmp_name = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        (fd, tmp_name) = tempfile.mkstemp(prefix='.tmp-', suffix=CACHE_FILE_SUFFIX, dir=cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(_make_header(digest, elf_mtime, arch_key), f, protocol=pickle.HIGHEST_PROTOCOL)
+            dump_to(state, f, debugger)
+
+        os.replace(tmp_name, filename)
+        tmp_name = None
+        return True
+    except Exception as e:
+        debugger.verboseprint(f'Could not write debug info cache file {filename}: {e}')
+        return False
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
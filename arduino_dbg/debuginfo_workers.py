@@ -0,0 +1,139 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Parse the .debug_info compilation units of an ELF file in a pool of worker processes.
+
+Each worker opens the ELF file itself and parses whole compilation units with the same
+ParsedDebugInfo.parseTypesFromDIE() code used in-process, against a stand-in for the Debugger.
+The resulting CompilationUnitNamespace is pickled back to the main process (see
+debuginfo_cache for how references to the ELF file are carried across), along with the
+effects the parse would have had outside the CU namespace: the globals published to the
+GlobalScope, the symbol type bindings, and any warning messages.
+
+The main process merges the results in .debug_info order so the outcome matches an in-order
+single-process parse.
+"""
+
+import concurrent.futures
+import io
+import multiprocessing
+import queue
+
+from elftools.elf.elffile import ELFFile
+
+import arduino_dbg.binutils as binutils
+import arduino_dbg.debuginfo_cache as debuginfo_cache
+import arduino_dbg.types as types
+
+# Per-worker-process state, set up by _init_worker().
+_worker = None
+
+
+class _WorkerDebugger(object):
+    """
+    Stand-in for the Debugger within a worker process. Provides the config and callbacks used
+    while parsing DIEs, and records the calls whose effects must be replayed in the main process.
+    """
+
+    def __init__(self, arch_conf, conf):
+        self._arch_conf = arch_conf
+        self._conf = conf
+        self.bindings = []  # (name, typ) for each bind_sym_type() call.
+        self.messages = []  # (msg_str, color) for each msg_q() call.
+
+    def get_arch_conf(self, key):
+        return self._arch_conf.get(key)
+
+    def get_conf(self, key):
+        return self._conf.get(key)
+
+    def verboseprint(self, *args):
+        pass  # Verbose parse tracing is only available in-process.
+
+    def msg_q(self, color, *args):
+        msg_str = "".join([x if isinstance(x, str) else repr(x) for x in args])
+        self.messages.append((msg_str, color))
+
+    def bind_sym_type(self, name, typ):
+        if typ is not None and name is not None:
+            self.bindings.append((name, typ))
+
+
+class _WorkerState(object):
+    def __init__(self, elf_filename, arch_conf, conf):
+        self.elf_file = open(elf_filename, 'rb')
+        self.dwarf_info = ELFFile(self.elf_file).get_dwarf_info()
+        self.arch_conf = arch_conf
+        self.conf = conf
+
+
+def _init_worker(elf_filename, arch_conf, conf):
+    global _worker
+    _worker = _WorkerState(elf_filename, arch_conf, conf)
+    binutils.start_demangle_threads(queue.Queue())  # Demangler errors are not reported.
+
+
+def encoding_refs(debug_info):
+    """
+    Return the map of shared objects used to carry ParsedDebugInfo encodings (primitive types
+    such as 'void') across processes by reference rather than by copy.
+    """
+    return {('encoding', key): typ for (key, typ) in debug_info.getEncodings().items()}
+
+
+def _parse_cu(cu_offset):
+    """
+    Parse the compilation unit at `cu_offset` and return the pickled result.
+    """
+    debugger = _WorkerDebugger(_worker.arch_conf, _worker.conf)
+    debug_info = types.ParsedDebugInfo(debugger)
+    cuns = debug_info.parseSingleCU(_worker.dwarf_info, cu_offset)
+
+    global_syms = debug_info.getGlobalScope()
+    result = (cuns, [var for (_, var) in global_syms.getVariables()],
+              [method for (_, method) in global_syms.getMethods()],
+              debugger.bindings, debugger.messages)
+
+    buf = io.BytesIO()
+    debuginfo_cache.dump_to(result, buf, debugger, encoding_refs(debug_info))
+    return buf.getvalue()
+
+
+def parse_cus(debugger, debug_info, cu_namespaces, num_workers):
+    """
+    Parse the specified compilation units in a pool of `num_workers` processes, and merge the
+    results into `debug_info`.
+
+    @param debugger the Debugger that owns `debug_info`.
+    @param debug_info the ParsedDebugInfo of the main process.
+    @param cu_namespaces the unparsed CompilationUnitNamespaces to parse, in .debug_info order.
+    @param num_workers the number of worker processes to start.
+    """
+    arch_conf = {
+        'int_size': debugger.get_arch_conf('int_size'),
+        'ret_addr_size': debugger.get_arch_conf('ret_addr_size'),
+    }
+    conf = {
+        'dbg.verbose': False,
+        'dbg.print_die.offset': debugger.get_conf('dbg.print_die.offset'),
+    }
+    shared = encoding_refs(debug_info)
+
+    # Use 'spawn' so workers don't inherit the Debugger's threads and open connection.
+    mp_context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers, mp_context=mp_context, initializer=_init_worker,
+            initargs=(debugger.elf_name, arch_conf, conf)) as pool:
+
+        futures = [pool.submit(_parse_cu, cuns.getOffset()) for cuns in cu_namespaces]
+        for (cuns, future) in zip(cu_namespaces, futures):
+            (parsed_cuns, global_vars, global_methods, bindings, messages) = debuginfo_cache.load_from(
+                io.BytesIO(future.result()), debugger, debug_info.getDwarfInfo(), shared)
+
+            debug_info.mergeParsedCU(cuns, parsed_cuns, global_vars, global_methods)
+            # Replay type bindings in their original order, last; this overrides the bindings
+            # made by the GlobalScope additions above exactly as an in-process parse would.
+            for (name, typ) in bindings:
+                debugger.bind_sym_type(name, typ)
+            for (msg_str, color) in messages:
+                debugger.msg_q(color, msg_str)
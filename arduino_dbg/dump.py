@@ -2,27 +2,91 @@
 #
 # Methods for capturing and reloading state from running Arduino.
 
+import json
+import mmap
 import os.path
+import struct
 import threading
 import time
+import zlib
 
+import arduino_dbg.backend as backend
 import arduino_dbg.debugger as debugger
 import arduino_dbg.io as io
+import arduino_dbg.minidump as minidump
 import arduino_dbg.protocol as protocol
 import arduino_dbg.serialize as serialize
+import arduino_dbg.sram_cache as sram_cache
+from arduino_dbg.term import MsgLevel
 
 SERIALIZED_STATE_KEY = 'state'
 
 DUMP_SCHEMA_KEY = 'dump_schema'
-DUMP_SCHEMA_VER = 1
+DUMP_SCHEMA_VER = 3
+
+# Schema v1 dumps are text files written by serialize.persist_config_file(). From v2, dumps
+# are a binary container:
+#   header:   DUMP_FILE_MAGIC, then the schema version and metadata length as LE uint32s.
+#   metadata: UTF-8 JSON object holding everything but the memory images, plus a 'segments'
+#             map from each memory image key to its [file offset, length].
+#   segments: raw memory images, each starting on a DUMP_PAGE_SIZE boundary so that they
+#             can be mapped directly.
+# From v3, the metadata may include 'ram_holes': a list of [start, end) address ranges that
+# were not captured. These are left out of the ram_image, which holds the captured memory
+# on either side of each hole back-to-back.
+DUMP_FILE_MAGIC = b'ADBGDUMP'
+_DUMP_HEADER = struct.Struct('<8sII')
+DUMP_PAGE_SIZE = 4096
+DUMP_SEGMENT_KEYS = ['ram_image']
+DUMP_SEGMENTS_KEY = 'segments'
+
+# capture_dump() streams the RAM image to disk in blocks of this size, and records how much it
+# has written in a checkpoint file named for the dump file plus this suffix.
+DUMP_CAPTURE_BLOCK_SIZE = 4096
+DUMP_CHECKPOINT_SUFFIX = '.ckpt'
+DUMP_PROGRESS_INTERVAL = 1.0  # Seconds between capture progress reports.
+
+# What capture_dump() reads from RAM; see the 'dbg.dump.mode' config setting.
+DUMP_MODE_FULL = 'full'      # All of RAM.
+DUMP_MODE_SPARSE = 'sparse'  # All of RAM except the unused gap between the heap and $SP.
+DUMP_MODE_MINI = 'mini'      # Only the stack, globals, and memory reachable from them.
+DUMP_MODES = [DUMP_MODE_FULL, DUMP_MODE_SPARSE, DUMP_MODE_MINI]
+
+# A delta capture compares the device RAM with an earlier dump in pages of this size, and reads
+# only the pages whose checksums differ from the earlier dump.
+DUMP_DELTA_PAGE_SIZE = 256
+
+
+class DumpStateChangedException(Exception):
+    """
+    The device was no longer in the state we were capturing when we reconnected to it, so the
+    partial capture cannot be resumed. The partial dump file and its checkpoint are removed.
+    """
+    pass
 
 
-def capture_dump(debugger, dump_filename):
+def capture_dump(debugger, dump_filename, mode=None, base_dump=None):
     """
     Capture registers and SRAM from the device and store in a file locally.
 
     Assumes that the remote instance is already paused and ready for commands
     from the debugger.
+
+    The `mode` (one of DUMP_MODES; if None, the 'dbg.dump.mode' config setting) selects the
+    RAM to capture. In a sparse capture, the unused RAM between the top of the heap and $SP is
+    not read. A minidump reads only the stack, the global variables, and the memory reachable
+    from them through pointers (see the minidump module). RAM that is not read is recorded as
+    holes in the dump, and reads from it while debugging the dump report the memory as unknown.
+
+    If `base_dump` names an earlier dump file of the same sketch, this is a delta capture: the
+    device checksums each page of RAM, and pages that match the earlier dump are copied from it
+    rather than read over the connection. The new dump file is complete in itself.
+
+    The RAM image is streamed into the file in blocks of DUMP_CAPTURE_BLOCK_SIZE bytes as it
+    is read, and a checkpoint file (dump_filename + DUMP_CHECKPOINT_SUFFIX) records how much has
+    been written. If the connection fails part-way, we reconnect and resume from the last
+    complete block; if that is not possible, the checkpoint is left behind and a later
+    capture_dump() to the same file resumes from it. Progress is reported through msg_q().
     """
 
     elf_file_name = debugger.elf_name
@@ -34,37 +98,10 @@ def capture_dump(debugger, dump_filename):
     ram_end = debugger.get_arch_conf("RAMEND")
     instruction_set = debugger.get_arch_conf("instruction_set")
     gen_reg_count = debugger.get_arch_conf("general_regs")
-    byte_order = debugger.get_arch_conf("endian")  # 'little' or 'big'
 
     platform_name = debugger.get_conf('arduino.platform')
     arch_name = debugger.get_conf('arduino.arch')
 
-    # Number of bytes to retrieve from the device at a time
-    read_size = 4  # TODO(aaron): Parameterize?
-
-    # what's the memory address where this starts?
-    if instruction_set == 'avr':
-        # On AVR, we skip the first few bytes from 0 because those are mem-mapped to registers.
-        # We'll populate those directly from the register dump.
-        # We do read the extended memory-mapped register set from RAM, here, even though it is
-        # below RAMSTART.
-        #
-        # Since we also include $SP and $SREG in registers, we need to sync those
-        # mem-mapped positions to the register file values before we write this dump.
-        sram_offset = gen_reg_count
-    else:
-        sram_offset = ram_start
-
-
-    # list of `bytes` objects to hold memory dump
-    sram_bytes = []
-    # Retrieve the RAM from the device.
-    for read_at in range(sram_offset, ram_end, read_size):
-        v = debugger.get_sram(read_at, read_size)
-        ram_word = v.to_bytes(read_size, byteorder=byte_order)
-        sram_bytes.append(ram_word)
-    sram_byte_string = bytearray(b''.join(sram_bytes))
-
     regs = debugger.get_registers()
 
     memstats = debugger.get_memstats()
@@ -77,44 +114,489 @@ def capture_dump(debugger, dump_filename):
     for i in range(0, num_gpio):
         gpio.append(debugger.get_gpio_value(i))
 
+    # what's the memory address where this starts?
+    image_prefix = b''  # Bytes of the image that come from the registers, not a RAM read.
+    image_patches = {}  # Image offset -> byte value to overwrite after the RAM is read.
     if instruction_set == 'avr':
-        # Prepend general-purpose register file data to the beginning of the RAM image.
-        reg_bytes = bytearray()
-        for i in range(0, gen_reg_count):
-            reg_bytes.append(regs[f'r{i}'])
-        sram_byte_string[0:0] = reg_bytes
-        sram_offset = 0  # We now have a complete memory image starting at offset 0000h
-
-        # Make sure register-file values for $SP and $SREG are written to the SRAM image
-        # at the right mem-mapped-register addresses, so they are consistent on reload.
-        spl_port = debugger.get_arch_conf("SPL_PORT")
-        has_sph = debugger.get_arch_conf("has_sph")
-        if has_sph:
-            sph_port = debugger.get_arch_conf("SPH_PORT")
-        sreg_port = debugger.get_arch_conf("SREG_PORT")
-
+        # On AVR, we skip the first few bytes from 0 because those are mem-mapped to registers.
+        # We populate those directly from the register dump, giving a complete memory image
+        # starting at offset 0000h. We do read the extended memory-mapped register set from
+        # RAM, even though it is below RAMSTART.
+        sram_offset = 0
+        image_prefix = bytes([regs[f'r{i}'] for i in range(0, gen_reg_count)])
+
+        # Since we also include $SP and $SREG in registers, we need to sync those mem-mapped
+        # positions to the register file values so they are consistent on reload.
         avr_port_offset = debugger.get_arch_conf("AVR_PORT_OFFSET")
+        image_patches[avr_port_offset + debugger.get_arch_conf("SPL_PORT")] = regs["SP"] & 0xFF
+        if debugger.get_arch_conf("has_sph"):
+            image_patches[avr_port_offset + debugger.get_arch_conf("SPH_PORT")] = (regs["SP"] >> 8) & 0xFF
+        image_patches[avr_port_offset + debugger.get_arch_conf("SREG_PORT")] = regs["SREG"] & 0xFF
+    else:
+        sram_offset = ram_start
 
-        sram_byte_string[avr_port_offset + spl_port] = regs["SP"] & 0xFF
-        if has_sph:
-            sram_byte_string[avr_port_offset + sph_port] = (regs["SP"] >> 8) & 0xFF
-
-        sram_byte_string[avr_port_offset + sreg_port] = regs["SREG"] & 0xFF
+    # Choose the RAM to retrieve from the device. (RAMEND is the last valid RAM address,
+    # inclusive.)
+    if mode is None:
+        mode = debugger.get_conf('dbg.dump.mode')
+    if mode not in DUMP_MODES:
+        raise Exception(f"Unknown dump mode '{mode}'; expected one of: {', '.join(DUMP_MODES)}")
+
+    ram_runs = [[sram_offset, ram_end + 1]]  # [start, end) address ranges to capture.
+    if mode == DUMP_MODE_SPARSE:
+        # Never skip the global variables.
+        globals_end = _find_globals_end(debugger)
+        hole = None
+        if globals_end is not None:
+            hole = _find_unused_ram(memstats, max(globals_end, sram_offset + len(image_prefix)),
+                                    ram_start, ram_end)
+
+        if globals_end is None:
+            debugger.msg_q(MsgLevel.WARN, "Cannot find the end of the global variables; capturing all RAM.")
+        elif hole is None:
+            debugger.msg_q(MsgLevel.INFO, "No unused RAM between heap and stack; capturing all RAM.")
+        else:
+            (hole_start, hole_end) = hole
+            debugger.msg_q(MsgLevel.INFO,
+                           f"Skipping {hole_end - hole_start} bytes of unused RAM at "
+                           f"0x{hole_start:x}..0x{hole_end - 1:x}.")
+            ram_runs = [[sram_offset, hole_start], [hole_end, ram_end + 1]]
+    elif mode == DUMP_MODE_MINI:
+        ram_runs = minidump.find_reachable_ram(debugger, sram_offset)
+        captured_len = sum([end - start for (start, end) in ram_runs])
+        debugger.msg_q(MsgLevel.INFO,
+                       f"Minidump: capturing {captured_len} of {ram_end + 1 - sram_offset} bytes "
+                       f"of RAM in {len(ram_runs)} runs.")
+
+    # The image must start with the bytes we fill in from the registers.
+    assert len(image_prefix) == 0 or ram_runs[0][0] == sram_offset
+
+    ram_ranges = [[start, end - start] for (start, end) in ram_runs]  # [addr, length] to capture.
+    ram_holes = []
+    hole_start = sram_offset
+    for (start, end) in ram_runs + [[ram_end + 1, ram_end + 1]]:
+        if start > hole_start:
+            ram_holes.append([hole_start, start])
+        hole_start = end
 
     # Gather together the components we need to serialize.
     out = {}
     out['platform'] = platform_name
     out['arch'] = arch_name
     out['elf_file_name'] = elf_file_name
-    out['ram_image'] = bytes(sram_byte_string)
     out['ram_image_start'] = sram_offset
+    if len(ram_holes) > 0:
+        out['ram_holes'] = ram_holes
     out['registers'] = regs
     out['memstats'] = memstats
     out['gpio'] = gpio
     out['arch_specs'] = arch_specs
     out[DUMP_SCHEMA_KEY] = DUMP_SCHEMA_VER
 
-    serialize.persist_config_file(dump_filename, SERIALIZED_STATE_KEY, out)
+    base = None
+    if base_dump is not None:
+        base = _load_delta_base(debugger, base_dump, out)
+
+    capture = _StreamingCapture(debugger, dump_filename, out, ram_ranges, base)
+    capture.run(image_prefix, image_patches)
+
+
+def _load_delta_base(debugger, base_filename, metadata):
+    """
+    Load the earlier dump `base_filename` for a delta capture described by `metadata`.
+
+    @return a DumpImageBackend over the earlier dump, or None if it cannot serve as the base of
+        this capture (in which case the capture reads all memory from the device).
+    """
+    try:
+        base_data = read_dump_file(debugger.get_print_q(), base_filename)
+        base_image = DumpImageBackend(base_data, debugger)
+    except Exception as e:
+        debugger.msg_q(MsgLevel.WARN, f"Cannot read base dump {base_filename}: {e}")
+        return None
+
+    for key in ['platform', 'arch', 'elf_file_name', 'ram_image_start']:
+        if base_data.get(key) != metadata[key]:
+            debugger.msg_q(MsgLevel.WARN,
+                           f"Base dump {base_filename} has a different {key}; capturing all memory.")
+            return None
+
+    return base_image
+
+
+# RAM sections that hold the global variables.
+_GLOBALS_SECTIONS = ['.data', '.bss', '.noinit']
+
+
+def _find_globals_end(debugger):
+    """
+    Return the physical address just past the global variables (the RAM sections of the ELF
+    file), or None if the ELF file has none of them.
+    """
+    mem_map = debugger.arch_iface.memory_map()
+    globals_end = None
+    for name in _GLOBALS_SECTIONS:
+        try:
+            section = debugger.get_section(name)
+        except KeyError:
+            continue
+
+        end = mem_map.logical_to_physical_addr(section['addr']) + section['size']
+        if globals_end is None or end > globals_end:
+            globals_end = end
+
+    return globals_end
+
+
+def _find_unused_ram(memstats, capture_start, ram_start, ram_end):
+    """
+    Return the [start, end) address range of unused RAM between the top of the heap and $SP,
+    or None if there is no such gap.
+
+    @param capture_start the lowest address the gap may start at; at least the end of the
+        global variables.
+
+    The range is shrunk to whole SRAM cache pages, so that any page the Debugger reads from a
+    sparse dump is either captured or unknown in full.
+    """
+    page_size = sram_cache.SramPageCache.DEFAULT_PAGE_SIZE
+    if memstats['HeapEnd'] != 0:
+        heap_top = max(memstats['HeapStart'], memstats['HeapEnd'], capture_start)
+    else:
+        heap_top = capture_start  # No allocation performed
+    sp = memstats['SP']
+    if sp > ram_end:
+        return None
+
+    start = ram_start + (heap_top - ram_start + page_size - 1) // page_size * page_size
+    end = ram_start + (sp - ram_start) // page_size * page_size
+    if start >= end:
+        return None
+
+    return (start, end)
+
+
+def _align_page(offset):
+    return (offset + DUMP_PAGE_SIZE - 1) // DUMP_PAGE_SIZE * DUMP_PAGE_SIZE
+
+
+def _layout_dump_file(metadata, segment_lens):
+    """
+    Assign file offsets to the segments of a dump file.
+
+    @param metadata the dump state map, without its memory images.
+    @param segment_lens list of (key, length) for each memory image, in file order.
+    @return a pair of (the encoded metadata including the 'segments' map, the segments map).
+    """
+    metadata = dict(metadata)
+
+    # Segment offsets depend on the metadata length, which depends on the offsets. Lay out the
+    # segments assuming a generous metadata size; grow it if the metadata turns out larger.
+    metadata_budget = DUMP_PAGE_SIZE - _DUMP_HEADER.size
+    while True:
+        offset = _align_page(_DUMP_HEADER.size + metadata_budget)
+        segment_map = {}
+        for (key, length) in segment_lens:
+            segment_map[key] = [offset, length]
+            offset = _align_page(offset + length)
+
+        metadata[DUMP_SEGMENTS_KEY] = segment_map
+        metadata_bytes = json.dumps(metadata).encode('utf-8')
+        if len(metadata_bytes) <= metadata_budget:
+            return (metadata_bytes, segment_map)
+        metadata_budget = len(metadata_bytes)
+
+
+def write_dump_file(dump_filename, dump_data):
+    """
+    Write the dump state map `dump_data` to a file in the binary container format.
+    """
+    metadata = dict([(k, v) for (k, v) in dump_data.items() if k not in DUMP_SEGMENT_KEYS])
+    segments = [(key, dump_data[key]) for key in DUMP_SEGMENT_KEYS if key in dump_data]
+    (metadata_bytes, segment_map) = _layout_dump_file(
+        metadata, [(key, len(data)) for (key, data) in segments])
+
+    with open(dump_filename, 'wb') as f:
+        f.write(_DUMP_HEADER.pack(DUMP_FILE_MAGIC, DUMP_SCHEMA_VER, len(metadata_bytes)))
+        f.write(metadata_bytes)
+        for (key, data) in segments:
+            f.seek(segment_map[key][0])
+            f.write(data)
+
+
+class _StreamingCapture(object):
+    """
+    Reads the RAM image of a device into a dump file block by block, checkpointing as it goes.
+
+    The checkpoint file is a JSON object recording the registers and image layout the dump file
+    was started with, and the number of image bytes written so far. A capture is only resumed
+    if the device still reports the same registers; otherwise it starts over.
+
+    Given the image of an earlier dump as a `base`, each block is first checksummed on the
+    device page by page, and only the pages that differ from the base are read.
+    """
+
+    def __init__(self, debugger, dump_filename, metadata, ram_ranges, base=None):
+        """
+        @param metadata the dump state map, without the ram_image.
+        @param ram_ranges list of [addr, length] for the RAM to capture, in address order.
+        @param base an optional DumpImageBackend holding an earlier dump to capture a delta from.
+        """
+        self._base = base
+        self._pages_reused = 0
+        self._pages_read = 0
+        self._debugger = debugger
+        self._dump_filename = dump_filename
+        self._ckpt_filename = dump_filename + DUMP_CHECKPOINT_SUFFIX
+        self._metadata = metadata
+        self._ram_ranges = ram_ranges
+        image_len = sum([length for (_, length) in ram_ranges])
+        self._image_len = image_len
+
+        (self._metadata_bytes, segment_map) = _layout_dump_file(metadata, [('ram_image', image_len)])
+        self._image_offset = segment_map['ram_image'][0]
+
+        # The key identifying this capture in the checkpoint file.
+        self._ckpt_key = {
+            'elf_file_name': metadata['elf_file_name'],
+            'registers': metadata['registers'],
+            'ram_ranges': ram_ranges,
+            'ram_image_offset': self._image_offset,
+        }
+
+        self._progress_start_time = None
+        self._progress_start_bytes = 0
+        self._last_progress_time = None
+
+    def run(self, image_prefix, image_patches):
+        """
+        Capture the RAM image into the dump file.
+
+        @param image_prefix bytes that form the start of the image, instead of a RAM read.
+        @param image_patches map from image offset to byte value to overwrite after the read.
+        """
+        bytes_done = self._resume_point()
+        if bytes_done > 0:
+            self._debugger.msg_q(
+                MsgLevel.INFO,
+                f"Resuming capture at {bytes_done} of {self._image_len} bytes from checkpoint.")
+            f = open(self._dump_filename, 'r+b')
+            f.truncate(self._image_offset + bytes_done)  # Drop anything past the checkpoint.
+        else:
+            f = open(self._dump_filename, 'wb')
+            f.write(_DUMP_HEADER.pack(DUMP_FILE_MAGIC, DUMP_SCHEMA_VER, len(self._metadata_bytes)))
+            f.write(self._metadata_bytes)
+            f.seek(self._image_offset)
+            f.write(image_prefix)
+            bytes_done = len(image_prefix)
+            self._write_checkpoint(f, bytes_done)
+
+        try:
+            with f:
+                self._start_progress(bytes_done)
+                retried_at = None
+                while bytes_done < self._image_len:
+                    (addr, range_remaining) = self._ram_addr(bytes_done)
+                    block_len = min(DUMP_CAPTURE_BLOCK_SIZE, range_remaining)
+                    try:
+                        block = self._read_block(addr, block_len)
+                    except debugger.DebuggerIOError as dioe:
+                        if retried_at == bytes_done:
+                            raise  # Failed again right after reconnecting; give up.
+                        retried_at = bytes_done
+                        self._reconnect(dioe, bytes_done)
+                        continue
+
+                    f.seek(self._image_offset + bytes_done)
+                    f.write(block)
+                    bytes_done += block_len
+                    self._write_checkpoint(f, bytes_done)
+                    self._report_progress(bytes_done)
+
+                for (offset, val) in image_patches.items():
+                    f.seek(self._image_offset + offset)
+                    f.write(bytes([val]))
+        except DumpStateChangedException:
+            # What we saved belongs to a different device state; don't leave a half-written
+            # image behind for `load` or a later resume to pick up.
+            os.unlink(self._ckpt_filename)
+            os.unlink(self._dump_filename)
+            raise
+
+        os.unlink(self._ckpt_filename)
+
+        if self._base is not None:
+            self._debugger.msg_q(
+                MsgLevel.INFO,
+                f"Delta capture: copied {self._pages_reused} unchanged pages from the base dump; "
+                f"read {self._pages_read} changed pages.")
+
+    def _read_block(self, addr, length):
+        """
+        Return `length` bytes of RAM starting at `addr`, from the device or, in a delta capture,
+        from the base dump where the device's page checksums match it.
+        """
+        if self._base is None:
+            return self._debugger.read_memory(addr, length)
+
+        end = addr + length
+        pages = [(page_addr, min(DUMP_DELTA_PAGE_SIZE, end - page_addr))
+                 for page_addr in range(addr, end, DUMP_DELTA_PAGE_SIZE)]
+        try:
+            checksums = self._debugger.get_ram_checksums(pages)
+        except debugger.UnsupportedDebuggerProtocolException as upe:
+            self._debugger.msg_q(MsgLevel.WARN, f"{upe}; capturing all memory.")
+            self._base = None
+            return self._debugger.read_memory(addr, length)
+
+        block = bytearray()
+        for ((page_addr, page_len), checksum) in zip(pages, checksums):
+            try:
+                old_page = self._base.read_ram_block(page_addr, page_len)
+            except debugger.UnknownMemoryException:
+                old_page = None  # Not captured in the base dump.
+
+            if old_page is not None and zlib.crc32(old_page) == checksum:
+                block.extend(old_page)
+                self._pages_reused += 1
+            else:
+                block.extend(self._debugger.read_memory(page_addr, page_len))
+                self._pages_read += 1
+
+        return bytes(block)
+
+    def _ram_addr(self, image_offset):
+        """
+        Return the RAM address held at `image_offset` in the image, and the number of bytes
+        from there to the end of its captured range.
+        """
+        for (addr, length) in self._ram_ranges:
+            if image_offset < length:
+                return (addr + image_offset, length - image_offset)
+            image_offset -= length
+
+        raise IndexError(f"Image offset {image_offset} is past the end of the captured RAM")
+
+    def _reconnect(self, dioe, bytes_done):
+        """
+        Reconnect to the device after an I/O error, so the capture can resume at `bytes_done`.
+        Raise `dioe` if we cannot, leaving the checkpoint in place to resume from later. Raise
+        DumpStateChangedException if the device is no longer in the state we were capturing.
+        """
+        self._debugger.msg_q(MsgLevel.WARN,
+                             f"Connection error after {bytes_done} of {self._image_len} bytes: {dioe}")
+        if not self._debugger.is_open() and not self._debugger.reconnect():
+            self._debugger.msg_q(MsgLevel.ERR,
+                                 f"Capture can be resumed by dumping to {self._dump_filename} again.")
+            raise dioe
+
+        if self._debugger.get_registers() != self._ckpt_key['registers']:
+            # The device did not stay paused where it was (e.g. it reset on reconnect); the
+            # memory we already saved belongs to a different state.
+            raise DumpStateChangedException(
+                f"Device state changed while reconnecting; discarded partial dump {self._dump_filename}.")
+
+    def _resume_point(self):
+        """
+        Return the number of image bytes already written to the dump file by an earlier
+        capture of the same device state, or 0 to start a new capture.
+        """
+        if not os.path.exists(self._ckpt_filename):
+            return 0
+
+        try:
+            with open(self._ckpt_filename, 'r') as ckpt:
+                ckpt_data = json.load(ckpt)
+            bytes_done = ckpt_data['bytes_done']
+            dump_len = os.path.getsize(self._dump_filename)
+        except (OSError, ValueError, KeyError) as e:
+            self._debugger.msg_q(MsgLevel.WARN, f"Ignoring unreadable checkpoint {self._ckpt_filename}: {e}")
+            return 0
+
+        if ckpt_data.get('capture') != self._ckpt_key or dump_len < self._image_offset + bytes_done:
+            self._debugger.msg_q(MsgLevel.WARN,
+                                 f"Checkpoint {self._ckpt_filename} is for a different capture; starting over.")
+            return 0
+
+        return bytes_done
+
+    def _write_checkpoint(self, f, bytes_done):
+        """
+        Record that the first `bytes_done` bytes of the image are safely in the dump file.
+        """
+        f.flush()
+        os.fsync(f.fileno())
+
+        tmp_name = self._ckpt_filename + '.tmp'
+        with open(tmp_name, 'w') as ckpt:
+            json.dump({'capture': self._ckpt_key, 'bytes_done': bytes_done}, ckpt)
+        os.replace(tmp_name, self._ckpt_filename)
+
+    def _start_progress(self, bytes_done):
+        self._progress_start_time = time.monotonic()
+        self._progress_start_bytes = bytes_done
+        self._last_progress_time = self._progress_start_time
+
+    def _report_progress(self, bytes_done):
+        """
+        Report bytes captured, throughput, and estimated time remaining, at most once every
+        DUMP_PROGRESS_INTERVAL seconds and on completion.
+        """
+        now = time.monotonic()
+        if now - self._last_progress_time < DUMP_PROGRESS_INTERVAL and bytes_done < self._image_len:
+            return
+        self._last_progress_time = now
+
+        elapsed = now - self._progress_start_time
+        rate = (bytes_done - self._progress_start_bytes) / elapsed if elapsed > 0 else 0
+        pct = 100 * bytes_done // self._image_len
+        if bytes_done >= self._image_len:
+            eta_str = f"done in {elapsed:.1f}s"
+        elif rate > 0:
+            eta_str = f"ETA {(self._image_len - bytes_done) / rate:.0f}s"
+        else:
+            eta_str = "ETA unknown"
+
+        self._debugger.msg_q(
+            MsgLevel.INFO,
+            f"Captured {bytes_done}/{self._image_len} bytes ({pct}%), {rate:.0f} bytes/sec, {eta_str}")
+
+
+def read_dump_file(print_q, dump_filename):
+    """
+    Read a dump file in either the binary container format or the v1 text format.
+
+    Memory images in a binary dump are returned as writable memoryviews of a private
+    (copy-on-write) mapping of the file; they are paged in only as they are read, and
+    writes to them do not change the file.
+
+    @return the dump state map.
+    """
+    with open(dump_filename, 'rb') as f:
+        header = f.read(_DUMP_HEADER.size)
+        if len(header) < _DUMP_HEADER.size or not header.startswith(DUMP_FILE_MAGIC):
+            # Not a binary dump. Read the v1 format.
+            return serialize.load_config_file(print_q, dump_filename, SERIALIZED_STATE_KEY)
+
+        (_, schema_ver, metadata_len) = _DUMP_HEADER.unpack(header)
+        if schema_ver > DUMP_SCHEMA_VER:
+            raise Exception(f"Cannot load dump schema with version={schema_ver}")
+
+        dump_data = json.loads(f.read(metadata_len).decode('utf-8'))
+        segment_map = dump_data.pop(DUMP_SEGMENTS_KEY, {})
+        if len(segment_map) == 0:
+            return dump_data
+
+        file_len = os.fstat(f.fileno()).st_size
+        dump_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    view = memoryview(dump_map)
+    for (key, (offset, length)) in segment_map.items():
+        if offset + length > file_len:
+            raise Exception(f"Dump file '{dump_filename}' is truncated; missing data for '{key}'")
+        dump_data[key] = view[offset:offset + length]
+
+    return dump_data
 
 
 def load_dump(filename, print_q, config=None, history_change_hook=None):
@@ -131,7 +613,7 @@ def load_dump(filename, print_q, config=None, history_change_hook=None):
     """
 
     # Load the data out of the file...
-    dump_data = serialize.load_config_file(print_q, filename, SERIALIZED_STATE_KEY)
+    dump_data = read_dump_file(print_q, filename)
 
     # Make a pair of pipes that can communicate with one another.
     (left, right) = io.make_bidi_pipe()
@@ -163,53 +645,184 @@ def load_dump(filename, print_q, config=None, history_change_hook=None):
     # won't happen. Pre-initialize the protocol version from the handshake to the ver we speak.
     dbg._protocol_version = debugger.HOST_MAX_PROTOCOL_VERSION
 
-    # Create a service that acts like the __dbg_service() in C.
-    # Connect it to the ram/image and the 'right' pipe.
-    dbg_serv = HostedDebugService(dump_data, dbg, right)
+    # Serve register and memory reads directly from the ram/image.
+    image = DumpImageBackend(dump_data, dbg)
+    dbg.set_backend(image)
+
+    # Create a service that acts like the __dbg_service() in C, for the commands that still go
+    # over the wire. Connect it to the ram/image and the 'right' pipe.
+    dbg_serv = HostedDebugService(image, dbg, right)
     dbg_serv.start()  # Start service in a new thread.
 
     return (dbg, dbg_serv)
 
 
-class HostedDebugService(object):
+class DumpImageBackend(backend.DebugBackend):
     """
-    A service that can emulate the __dbg_service() library method locally, from a snapshot of RAM
-    and registers.
+    Serves registers and memory from the snapshot of RAM and registers in a dump file.
+
+    Installed as the Debugger's backend by load_dump(), this answers reads straight from the
+    image, without formatting them for the wire protocol. The HostedDebugService uses the
+    same instance to answer commands sent over its connection.
     """
-    def __init__(self, dump_data, debugger, conn):
-        self._conn = conn
+
+    def __init__(self, dump_data, debugger):
         self._debugger = debugger
 
         if dump_data[DUMP_SCHEMA_KEY] > DUMP_SCHEMA_VER:
             raise Exception(f"Cannot load dump schema with version={dump_data[DUMP_SCHEMA_KEY]}")
 
-        self._memory = bytearray(dump_data['ram_image'])
+        ram_image = dump_data['ram_image']
+        if isinstance(ram_image, memoryview) and not ram_image.readonly:
+            # Private mapping of a binary dump file (see read_dump_file()); use it in place.
+            self._memory = ram_image
+        else:
+            self._memory = bytearray(ram_image)
+        self._memory_view = memoryview(self._memory)
         # Do memory addrs start from 0h? Or is the .data/.bss/SRAM segment loaded at an offset?
         self._memory_segment_offset = dump_data['ram_image_start'] or 0
+        # [start, end) address ranges left out of a sparse dump's image, in address order.
+        self._holes = [(start, end) for (start, end) in dump_data.get('ram_holes', [])]
+        self._memory_end = self._memory_segment_offset + len(self._memory) + \
+            sum([end - start for (start, end) in self._holes])
         self._regs = dump_data['registers']
 
         self._memstats = None
         if 'memstats' in dump_data:
             self._memstats = dump_data['memstats']
-        else:
-            self._memstats = {}
 
-        self._num_gpio = self._debugger.get_platform_conf("gpio_pins")
-        self._gpio = self._num_gpio * [0]
         if 'gpio' in dump_data:
             self._gpio = dump_data['gpio']
         else:
             self._gpio = []
 
         if 'arch_specs' in dump_data:
-            self._arch_specs = dump_data['arch_specs']
+            self.arch_specs = dump_data['arch_specs']
         else:
-            self._arch_specs = []
+            self.arch_specs = []
 
         self.platform = dump_data['platform']
         self.arch = dump_data['arch']
         self.elf_file_name = dump_data['elf_file_name']
 
+    def _image_offset(self, addr):
+        """
+        Return the offset within the image of the on-CPU address `addr`, which must not be in a
+        hole.
+        """
+        offset = addr - self._memory_segment_offset
+        for (hole_start, hole_end) in self._holes:
+            if addr >= hole_end:
+                offset -= hole_end - hole_start
+        return offset
+
+    def _check_captured(self, start, end):
+        """
+        Raise UnknownMemoryException if any of the addresses [start, end) are in a hole.
+        """
+        for (hole_start, hole_end) in self._holes:
+            if start < hole_end and end > hole_start:
+                raise debugger.UnknownMemoryException(
+                    f"Memory at 0x{max(start, hole_start):x} was not captured in the dump")
+
+    def _get_ram(self, start, end):
+        """
+        Return the bytes in RAM at on-CPU addresses [start, end).
+        """
+        self._check_captured(start, end)
+        return bytes(self._memory_view[self._image_offset(start):self._image_offset(end)])
+
+    def get_register_order(self):
+        """
+        Return the list of register names in the order the 'registers' command reports them.
+        """
+        # register_list_fmt is an array specifying the order register keys are returned by
+        # the 'registers' command. The key "general_regs" is expanded to all the r0...rN
+        # general registers.
+        register_order = []
+        for reg_name in self._debugger.get_arch_conf("register_list_fmt"):
+            if reg_name == "general_regs":
+                # Add all general registers to the list here.
+                for i in range(0, self._debugger.get_arch_conf("general_regs")):
+                    register_order.append(f'r{i}')
+            else:
+                register_order.append(reg_name)  # Append register name as-is.
+
+        return register_order
+
+    def get_register_values(self):
+        return [self._regs[reg_name] for reg_name in self.get_register_order()]
+
+    def read_ram(self, addr, size):
+        return self._get_ram(addr, addr + size)
+
+    def read_ram_block(self, addr, size):
+        """
+        Return exactly `size` bytes of RAM starting at on-CPU address `addr`. Any part of the
+        requested range that lies outside the RAM image reads as zeros; memory in a hole of a
+        sparse dump is unknown.
+        """
+        out = bytearray(size)
+        start = max(addr, self._memory_segment_offset)
+        end = min(addr + size, self._memory_end)
+        if start < end:
+            out[start - addr:end - addr] = self._get_ram(start, end)
+        return bytes(out)
+
+    def checksum_ram(self, addr, size):
+        return zlib.crc32(self.read_ram_block(addr, size))
+
+    def read_stack(self, offset, size):
+        sp = self._regs["SP"]
+        return self._get_ram(sp + offset, sp + offset + size)
+
+    def read_flash(self, addr, size):
+        return self._debugger.get_image_bytes(addr, size)
+
+    def write_ram(self, addr, size, value):
+        new_bytes = value.to_bytes(size, byteorder=self._debugger.get_arch_conf("endian"))
+        self._check_captured(addr, addr + size)
+        offset = self._image_offset(addr)
+        self._memory[offset:offset + size] = new_bytes
+
+    def get_memstats_values(self):
+        mem_list_fmt = self._debugger.get_arch_conf("mem_list_fmt")
+        if self._memstats is not None:
+            # We memorized memstats during dump process.
+            return [self._memstats[key] for key in mem_list_fmt]
+
+        # Don't know the memstats; report 0 for all but $SP (e.g. unknown __malloc_heap_end).
+        return [self._regs["SP"] if key == "SP" else 0 for key in mem_list_fmt]
+
+    def get_gpio_value(self, pin):
+        try:
+            return 1 * (self._gpio[pin] != 0)
+        except Exception:
+            return 0  # Invalid GPIO port? Return LOW.
+
+    def set_gpio_value(self, pin, val):
+        try:
+            self._gpio[pin] = int((val != 0) * 1)
+        except Exception:
+            pass  # Invalid GPIO port? Ignore...
+
+
+class HostedDebugService(object):
+    """
+    A service that can emulate the __dbg_service() library method locally, from a snapshot of RAM
+    and registers.
+
+    This speaks the same text wire protocol as the on-device service, answering from a
+    DumpImageBackend.
+    """
+    def __init__(self, image, debugger, conn):
+        self._conn = conn
+        self._debugger = debugger
+        self._image = image
+        self._framed = False  # True if responses to DBG_FRAMED_OPS are sent as binary frames.
+        self._baud_revert = None  # (baud, deadline) to return to if a new rate is not confirmed.
+        self._base_baud = conn.get_baud()  # The rate to return to on reset.
+
         self.stay_alive = True
         self.thread = threading.Thread(target=self.service, name="Hosted debug service")
 
@@ -226,149 +839,134 @@ class HostedDebugService(object):
             self.thread.join()
 
 
-    def _get_ram(self, mem_slice):
-        """
-        Return the bytes in RAM as specified by the slice 'mem_slice'.
-        mem_slice should be specified as an on-CPU address.
-        """
-        start = None
-        end = None
-        if mem_slice.start is not None:
-            start = mem_slice.start - self._memory_segment_offset
-
-        if mem_slice.stop is not None:
-            end = mem_slice.stop - self._memory_segment_offset
-
-        adjusted_slice = slice(start, end)
-        return self._memory[adjusted_slice]
-
-
     def service(self):
         """
         Emulate the debug service.
         """
 
-        num_gen_registers = self._debugger.get_arch_conf("general_regs")
         endian = self._debugger.get_arch_conf("endian")
-        mem_list_fmt = self._debugger.get_arch_conf("mem_list_fmt")
-
-        # register_list_fmt is an array specifying the order register keys are returned by
-        # the 'registers' command. The key "general_regs" is expanded to all the r0...rN
-        # general registers.
-        register_list_fmt = self._debugger.get_arch_conf("register_list_fmt")
-        register_order = []
-        for reg_name in register_list_fmt:
-            if reg_name == "general_regs":
-                # Add all general registers to the list here.
-                for i in range(0, num_gen_registers):
-                    register_order.append(f'r{i}')
-            else:
-                register_order.append(reg_name)  # Append register name as-is.
 
         while self.stay_alive:
-            while not self._conn.available():
-                time.sleep(0.05)  # Sleep for 50ms if no data available.
-                if not self.stay_alive:
-                    return  # time to leave
-
+            # Block until a command arrives. This returns empty on timeout so we can check
+            # whether it's time to leave.
             cmdline = self._conn.readline()
             if not len(cmdline):
+                if self._conn.at_eof():
+                    return  # The debugger closed its end of the connection.
+                self._check_baud_revert()
                 continue
+            self._baud_revert = None  # Any command received confirms the current baud rate.
             # print(f"Received: {cmdline}")
 
             cmd = f'{chr(cmdline[0])}'
             args = self._to_args(cmdline[1:])
 
-            if cmd == protocol.DBG_OP_RAMADDR:
-                size = args[0]
-                addr = args[1]
-                data = int.from_bytes(self._get_ram(slice(addr, addr+size)), byteorder=endian)
-                self._send(f'{data:x}')
-            elif cmd == protocol.DBG_OP_STACKREL:
-                SP = self._regs["SP"]
-                size = args[0]
-                offset = args[1]
-                data = int.from_bytes(self._get_ram(slice(SP + offset, SP + offset + size)),
-                                      byteorder=endian)
-                self._send(f'{data:x}')
-            elif cmd == protocol.DBG_OP_BREAK:
-                # We're always paused.
-                self._send(f'{protocol.DBG_PAUSE_MSG} {debugger.HOST_MAX_PROTOCOL_VERSION:x} 0 0 0')
-            elif cmd == protocol.DBG_OP_CONTINUE:
-                self._send_comment("Cannot continue in image debugger")
-                # Debugger expects a RESULT_ONELINE, so send a formal response that is not
-                # 'Continuing' in addition to the user-helpful comment above.
-                self._send("error")
-            elif cmd == protocol.DBG_OP_ARCH_SPEC:
-                # Debugger expects RESULT_LIST operation. Report the arch specs snapshot gathered at
-                # dump time.
-                for line in self._arch_specs:
-                    self._send(line.strip())
-                self._send(protocol.DBG_END_LIST)
-            elif cmd == protocol.DBG_OP_DEBUGCTL:
-                # (note: debug response protocol for this command is undefined)
-                self._send_comment("Image debugger does not recognize DEBUGCTL sentences.")
-            elif cmd == protocol.DBG_OP_STEP:
-                # This is a RESULT_SILENT operation so no formal response required, just a log msg.
-                self._send_comment("Cannot step in image debugger")
-            elif cmd == protocol.DBG_OP_SET_FLAG:
-                # Used to enable/disable breakpoints; unnecessary in static image debugger.
-                self._send_comment("Cannot set bit flag in image debugger")
-            elif cmd == protocol.DBG_OP_FLASHADDR:
-                size = args[0]
-                addr = args[1]
-                data = int.from_bytes(self._debugger.get_image_bytes(addr, size), byteorder=endian)
-                self._send(f'{data:x}')
-            elif cmd == protocol.DBG_OP_POKE:
-                size = args[0]
-                addr = args[1]
-                val = args[2]
-                new_bytes = val.to_bytes(size, byteorder=endian)
-                addr -= self._memory_segment_offset
-                for i in range(0, size):
-                    self._memory[addr + i] = new_bytes[i]
-            elif cmd == protocol.DBG_OP_MEMSTATS:
-                if self._memstats is not None:
-                    # We memorized memstats during dump process.
-                    for key in mem_list_fmt:
-                        self._send(f'{self._memstats[key]:x}')
+            try:
+                self._service_cmd(cmd, args, endian)
+            except debugger.UnknownMemoryException as ume:
+                # Memory in a hole of a sparse dump.
+                if cmd == protocol.DBG_OP_POKE:
+                    self._send_comment(str(ume))  # No formal response expected.
+                elif self._framed and cmd in protocol.DBG_FRAMED_OPS:
+                    self._send_frame(protocol.DBG_RET_UNKNOWN, b'')
                 else:
-                    # Don't know the memstats; just send the correct number of 0's.
-                    for key in mem_list_fmt:
-                        if key == "SP":
-                            self._send(f'{self._regs["SP"]:x}')
-                        else:
-                            self._send('0')  # e.g. unknown __malloc_heap_end
-                self._send(protocol.DBG_END_LIST)
-            elif cmd == protocol.DBG_OP_PORT_IN:
-                # Return a GPIO value to the user.
-                addr = args[0]
-                try:
-                    val = 1 * (self._gpio[addr] != 0)
-                except Exception:
-                    val = 0  # Invalid GPIO port? Return LOW.
-                self._send(f'{int(val)&1:b}')
-            elif cmd == protocol.DBG_OP_PORT_OUT:
-                # "Drive" a "pin" with the specified GPIO value.
-                addr = args[0]
-                val = int((args[1] != 0) * 1)
-                try:
-                    self._gpio[addr] = val
-                except Exception:
-                    pass  # Invalid GPIO port? Ignore...
-            elif cmd == protocol.DBG_OP_RESET:
-                self._send_comment("Cannot reset in image debugger")
-                # Command does not expect any real response so no more to do here.
-            elif cmd == protocol.DBG_OP_REGISTERS:
-                for reg_nm in register_order:
-                    reg_val = self._regs[reg_nm]
-                    self._send(f'{reg_val:x}')
-                self._send(protocol.DBG_END_LIST)
-            elif cmd == protocol.DBG_OP_TIME:
-                # The 'time' is always 0.
-                self._send("0")
+                    self._send(protocol.DBG_RET_UNKNOWN)
+
+    def _service_cmd(self, cmd, args, endian):
+        """
+        Respond to a single command.
+        """
+        if cmd == protocol.DBG_OP_RAMADDR:
+            size = args[0]
+            addr = args[1]
+            self._send_value(cmd, self._image.read_ram(addr, size), endian)
+        elif cmd == protocol.DBG_OP_RAMBLOCK:
+            size = args[0]
+            addr = args[1]
+            data = self._image.read_ram_block(addr, size)
+            if self._framed:
+                self._send_frame(cmd, data)
+            else:
+                self._send(data.hex())
+        elif cmd == protocol.DBG_OP_CHECKSUM:
+            size = args[0]
+            addr = args[1]
+            self._send_value(cmd, self._image.checksum_ram(addr, size).to_bytes(4, byteorder=endian), endian)
+        elif cmd == protocol.DBG_OP_STACKREL:
+            size = args[0]
+            offset = args[1]
+            self._send_value(cmd, self._image.read_stack(offset, size), endian)
+        elif cmd == protocol.DBG_OP_FRAMING:
+            self._framed = len(args) > 0 and args[0] != 0
+            self._send(f'{int(self._framed)}')
+        elif cmd == protocol.DBG_OP_BAUD:
+            old_baud = self._conn.get_baud()
+            if old_baud is None or len(args) == 0 or args[0] <= 0:
+                self._send('0')  # Not a serial connection; nothing to change.
             else:
-                self._send_comment(f"Unknown cmd symbol: '${cmd}'")
+                self._send('1')
+                self._conn.set_baud(args[0])
+                self._baud_revert = (old_baud, time.monotonic() + protocol.DBG_BAUD_CONFIRM_TIMEOUT)
+        elif cmd == protocol.DBG_OP_BREAK:
+            # We're always paused. Like the device, turn off response framing with each pause.
+            self._framed = False
+            self._send(f'{protocol.DBG_PAUSE_MSG} {debugger.HOST_MAX_PROTOCOL_VERSION:x} 0 0 0')
+        elif cmd == protocol.DBG_OP_CONTINUE:
+            self._send_comment("Cannot continue in image debugger")
+            # Debugger expects a RESULT_ONELINE, so send a formal response that is not
+            # 'Continuing' in addition to the user-helpful comment above.
+            self._send("error")
+        elif cmd == protocol.DBG_OP_ARCH_SPEC:
+            # Debugger expects RESULT_LIST operation. Report the arch specs snapshot gathered at
+            # dump time.
+            for line in self._image.arch_specs:
+                self._send(line.strip())
+            self._send(protocol.DBG_END_LIST)
+        elif cmd == protocol.DBG_OP_DEBUGCTL:
+            # (note: debug response protocol for this command is undefined)
+            self._send_comment("Image debugger does not recognize DEBUGCTL sentences.")
+        elif cmd == protocol.DBG_OP_STEP:
+            # This is a RESULT_SILENT operation so no formal response required, just a log msg.
+            self._send_comment("Cannot step in image debugger")
+        elif cmd == protocol.DBG_OP_SET_FLAG:
+            # Used to enable/disable breakpoints; unnecessary in static image debugger.
+            self._send_comment("Cannot set bit flag in image debugger")
+        elif cmd == protocol.DBG_OP_FLASHADDR:
+            size = args[0]
+            addr = args[1]
+            self._send_value(cmd, self._image.read_flash(addr, size), endian)
+        elif cmd == protocol.DBG_OP_POKE:
+            size = args[0]
+            addr = args[1]
+            val = args[2]
+            self._image.write_ram(addr, size, val)
+        elif cmd == protocol.DBG_OP_MEMSTATS:
+            for val in self._image.get_memstats_values():
+                self._send(f'{val:x}')
+            self._send(protocol.DBG_END_LIST)
+        elif cmd == protocol.DBG_OP_PORT_IN:
+            # Return a GPIO value to the user.
+            val = self._image.get_gpio_value(args[0])
+            self._send(f'{int(val)&1:b}')
+        elif cmd == protocol.DBG_OP_PORT_OUT:
+            # "Drive" a "pin" with the specified GPIO value.
+            self._image.set_gpio_value(args[0], args[1])
+        elif cmd == protocol.DBG_OP_RESET:
+            self._send_comment("Cannot reset in image debugger")
+            # Command does not expect any real response so no more to do here.
+            # Like the device, return to the base baud rate.
+            if self._base_baud is not None:
+                self._conn.set_baud(self._base_baud)
+                self._baud_revert = None
+        elif cmd == protocol.DBG_OP_REGISTERS:
+            for reg_val in self._image.get_register_values():
+                self._send(f'{reg_val:x}')
+            self._send(protocol.DBG_END_LIST)
+        elif cmd == protocol.DBG_OP_TIME:
+            # The 'time' is always 0.
+            self._send("0")
+        else:
+            self._send_comment(f"Unknown cmd symbol: '${cmd}'")
 
 
     # Private helper methods for the main service.
@@ -380,9 +978,35 @@ class HostedDebugService(object):
         # print(f'Sending: {text.encode("UTF-8")}')
         self._conn.write(text.encode("UTF-8"))
 
+    def _send_value(self, cmd, data, endian):
+        """
+        Send the response to a command that reads a value: the bytes `data` as they are stored
+        in memory if framing is on; otherwise, the value they hold as a hex text line.
+        """
+        if self._framed:
+            self._send_frame(cmd, data)
+        else:
+            self._send(f'{int.from_bytes(data, byteorder=endian):x}')
+
+    def _send_frame(self, opcode, payload):
+        """
+        Send a binary framed response.
+        """
+        header = struct.pack('<HB', len(payload), ord(opcode))
+        crc = zlib.crc32(header + payload)
+        self._conn.write(bytes([protocol.DBG_FRAME_START]) + header + payload + struct.pack('<I', crc))
+
     def _send_comment(self, comment):
         self._send(protocol.DBG_RET_PRINT + comment)
 
+    def _check_baud_revert(self):
+        """
+        Return to the prior baud rate if the host has not confirmed a rate change in time.
+        """
+        if self._baud_revert is not None and time.monotonic() >= self._baud_revert[1]:
+            self._conn.set_baud(self._baud_revert[0])
+            self._baud_revert = None
+
     def _to_args(self, line):
         """
         Convert the input line to a list of number arguments
@@ -0,0 +1,206 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Emulate a device running the debug service, from a dump file, on a pseudo-terminal.
+
+The HostedDebugService that serves a dump within the debugger talks over in-process pipes at
+memory speed. The DeviceEmulator instead serves it on a pty, paced like a serial port at a
+given baud rate and with a turnaround delay for each command, so a Debugger can open it
+through the normal SerialConn path (e.g. `arduino-dbg -f sketch.elf -p /dev/pts/N`) and see
+realistic round-trip times. Run it standalone with:
+
+    python3 -m arduino_dbg.emulator [-b <baud>] [-t <turnaround ms>] <dump_file>
+"""
+
+import argparse
+import errno
+import os
+import select
+import termios
+import time
+import tty
+
+import arduino_dbg.binutils as binutils
+import arduino_dbg.dump as dump
+import arduino_dbg.term as term
+
+DEFAULT_BAUD = 57600
+DEFAULT_TURNAROUND = 0.001  # seconds
+
+# termios speed constants for the baud rates a host may set on the pty.
+_TERMIOS_BAUD = {
+    getattr(termios, f'B{rate}'): rate
+    for rate in [9600, 19200, 38400, 57600, 115200, 230400, 460800, 500000, 576000, 921600, 1000000]
+    if hasattr(termios, f'B{rate}')
+}
+
+
+class PtyDeviceConn(object):
+    """
+    The device end of a pseudo-terminal, for a HostedDebugService to serve a Debugger that opens
+    the other end (`port`) as a serial port.
+
+    Baud rates don't change the speed of a pty, so this simulates a serial link: data only gets
+    through while the rate the host has set on its end of the pty matches the device's rate, and
+    that rate is no higher than `max_baud` (the fastest the link can carry). Otherwise, whatever
+    either side sends is lost, as it would be to framing errors.
+
+    With `throttle`, each line received and each write are also delayed by the time they would
+    take to cross the link (10 bits per byte, for 8N1), and each command received is delayed by
+    a further `turnaround` seconds of device processing time.
+    """
+
+    TIMEOUT = 0.1  # seconds
+
+    def __init__(self, baud, max_baud=None, throttle=False, turnaround=0.0):
+        (self._master, self._slave) = os.openpty()
+        tty.setraw(self._master)
+        self.port = os.ttyname(self._slave)
+        self._baud = baud
+        self._max_baud = max_baud
+        self._throttle = throttle
+        self._turnaround = turnaround
+        self._buf = bytearray()
+        self._eof = False
+
+    def _host_baud(self):
+        speed = termios.tcgetattr(self._slave)[5]  # ospeed
+        return _TERMIOS_BAUD.get(speed)
+
+    def _link_ok(self):
+        return self._host_baud() == self._baud and \
+            (self._max_baud is None or self._baud <= self._max_baud)
+
+    def _pace(self, num_bytes, extra=0.0):
+        """ Take the time to carry num_bytes over the link, plus `extra` seconds. """
+        if self._throttle:
+            time.sleep(num_bytes * 10.0 / self._baud + extra)
+
+    def readline(self):
+        while b'\n' not in self._buf:
+            (readable, _, _) = select.select([self._master], [], [], PtyDeviceConn.TIMEOUT)
+            if not readable:
+                return b''
+            try:
+                data = os.read(self._master, 4096)
+            except OSError as e:
+                if e.errno != errno.EIO:
+                    raise
+                data = b''  # The host doesn't have the port open.
+            if len(data) == 0:
+                return b''
+            if self._link_ok():
+                self._buf += data
+
+        eol = self._buf.index(b'\n')
+        line = bytes(self._buf[0:eol + 1])
+        del self._buf[0:eol + 1]
+        self._pace(len(line), self._turnaround)
+        return line
+
+    def write(self, data):
+        self._pace(len(data))
+        if self._link_ok():
+            os.write(self._master, data)
+        return len(data)
+
+    def at_eof(self):
+        return self._eof
+
+    def get_baud(self):
+        return self._baud
+
+    def set_baud(self, baud):
+        self._baud = baud
+        self._buf.clear()  # Anything partly received is garbled by the change.
+
+    def close(self):
+        self._eof = True
+        os.close(self._master)
+        os.close(self._slave)
+
+
+class DeviceEmulator(object):
+    """
+    Serves a dump file as a device on a pseudo-terminal, until shutdown() is called.
+
+    The serial port to open is in `port`; `elf_name` and `platform` give the ELF file and
+    Arduino platform of the dumped sketch, for the Debugger that connects to it.
+    """
+
+    def __init__(self, dump_filename, print_q, baud=DEFAULT_BAUD, turnaround=DEFAULT_TURNAROUND,
+                 max_baud=None, throttle=True, config=None):
+        """
+        @param baud the rate the emulated device starts at (it can be switched with the BAUD
+            command).
+        @param turnaround the time in seconds the device takes to process each command.
+        @param max_baud if not None, the fastest rate the emulated serial link can carry.
+        @param throttle if False, don't delay data to the pace of the baud rate.
+        @param config the Debugger config used to load the dump file.
+        """
+        (self._debugger, pipe_service) = dump.load_dump(dump_filename, print_q, config=config)
+        pipe_service.shutdown()  # We serve the dump on the pty instead.
+
+        self.elf_name = self._debugger.elf_name
+        self.platform = self._debugger.get_conf('arduino.platform')
+
+        self._conn = PtyDeviceConn(baud, max_baud, throttle, turnaround)
+        self.port = self._conn.port
+        self._service = dump.HostedDebugService(self._debugger.get_backend(), self._debugger, self._conn)
+        self._service.start()
+
+    def get_baud(self):
+        """ Return the baud rate the emulated device is using now. """
+        return self._conn.get_baud()
+
+    def shutdown(self):
+        """
+        Stop serving the device and release the pty.
+        """
+        self._service.shutdown()
+        self._conn.close()
+        self._debugger.release_cmd_lock()
+        self._debugger.close()
+
+    def __repr__(self):
+        return f'DeviceEmulator(port={self.port}, baud={self.get_baud()})'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Emulate a device running the Arduino debug service, from a dump file",
+        prog="python3 -m arduino_dbg.emulator")
+    parser.add_argument("dump_file")
+    parser.add_argument("-b", "--baud", type=int, default=DEFAULT_BAUD,
+                        help=f"Baud rate the device starts at (default {DEFAULT_BAUD})")
+    parser.add_argument("-t", "--turnaround", type=float, default=DEFAULT_TURNAROUND * 1000.0,
+                        help=f"Time for the device to process each command, in ms "
+                             f"(default {DEFAULT_TURNAROUND * 1000.0:g})")
+    parser.add_argument("--max-baud", type=int, default=None,
+                        help="Fastest baud rate the emulated serial link can carry")
+    args = parser.parse_args()
+
+    console_printer = term.ConsolePrinter()
+    console_printer.start()
+    binutils.start_demangle_threads(console_printer.print_q)
+    emulator = None
+    try:
+        emulator = DeviceEmulator(args.dump_file, console_printer.print_q, baud=args.baud,
+                                  turnaround=args.turnaround / 1000.0, max_baud=args.max_baud)
+        console_printer.join_q()
+        print(f'Emulating {args.dump_file} on {emulator.port} at {args.baud} baud. '
+              'Press ^C to stop.')
+        print(f'Connect with: arduino-dbg -f {emulator.elf_name} -p {emulator.port} -b {args.baud}')
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print('')
+    finally:
+        if emulator is not None:
+            emulator.shutdown()
+        binutils.close_demangle_threads()
+        console_printer.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -233,6 +233,11 @@ class Memory(object):
         self._debugger = debugger
         self.regs = regs
 
+        # While accessing an object or array, its bytes are read from SRAM as a single block
+        # and field / element reads are served from this window.
+        self._prefetch_addr = None
+        self._prefetch_buf = None
+
     def __repr__(self):
         return 'Memory'
 
@@ -253,9 +258,53 @@ class Memory(object):
         """
         Get the value contained in SRAM at the specified address.
         """
+        if self._prefetch_buf is not None:
+            start = addr - self._prefetch_addr
+            if start >= 0 and start + size <= len(self._prefetch_buf):
+                return int.from_bytes(self._prefetch_buf[start:start + size],
+                                      byteorder=self._debugger.get_arch_conf("endian"))
+
         self._debugger.verboseprint('Reading ', size, ' bytes at addr 0x', dbg.VHEX4, addr)
         return self._debugger.get_sram(addr, size)
 
+    def __prefetch(self, addrs, flags, field_offset, length):
+        """
+        Read `length` bytes at *(addrs + field_offset) from SRAM in one block, so the field-by-field
+        or element-by-element reads that follow are served by mem() without a round trip each.
+
+        Only a single contiguous RAM address can be prefetched; register-based, multi-piece
+        and flash-resident locations are read as before.
+
+        @return True if a prefetch window was opened; the caller must close it with
+            __end_prefetch().
+        """
+        if self._prefetch_buf is not None:
+            return False  # An enclosing object's window is already open and covers this one.
+        elif not isinstance(length, int) or length <= 0:
+            return False
+        elif len(addrs) != 1 or addrs[0][1] != DWARFExprMachine.ALL:
+            return False
+
+        addr = addrs[0][0]
+        if not isinstance(addr, int):
+            return False
+
+        if flags & LookupFlags.CONST_ADDR:
+            mmap = self._debugger.arch_iface.memory_map()
+            if mmap.access_mechanism_for_addr(addr) != memory_map.ACCESS_TYPE_RAM:
+                return False
+            addr = mmap.logical_to_physical_addr(addr)
+
+        addr += field_offset
+        self._debugger.verboseprint('Prefetching ', length, ' bytes at addr 0x', dbg.VHEX4, addr)
+        self._prefetch_buf = self._debugger.read_memory(addr, length)
+        self._prefetch_addr = addr
+        return True
+
+    def __end_prefetch(self):
+        self._prefetch_addr = None
+        self._prefetch_buf = None
+
 
     @staticmethod
     def __make_list_for_addr(addr, initial_flags=0):
@@ -440,6 +489,27 @@ class Memory(object):
         Returns a tuple of the actual typed return value from memory (as defined above) and an
         integer bitflags (see LookupFlags) describing the memory access.
         """
+        prefetched = False
+        if typ and isinstance(typ, types.ClassType):
+            prefetched = self.__prefetch(addrs, flags, field_offset, typ.size)
+        elif typ and size is None and typ.is_array():
+            array_len = typ.get_array_len()
+            elem_size = typ.get_array_elem_size()
+            if isinstance(array_len, int) and isinstance(elem_size, int) and \
+                    array_len != types.VARIABLE_LEN_ARRAY:
+                prefetched = self.__prefetch(addrs, flags, field_offset, array_len * elem_size)
+
+        try:
+            return self.__access_resolved_address(addrs, flags, typ, size, field_offset,
+                                                  expr_machine)
+        finally:
+            if prefetched:
+                self.__end_prefetch()
+
+    def __access_resolved_address(self, addrs, flags, typ, size, field_offset, expr_machine):
+        """
+        Implementation of access_resolved_address(), after any prefetching of the value's bytes.
+        """
 
         if typ and isinstance(typ, types.ClassType):
             # For a class, don't just grab a contiguous block of memory; read and follow
@@ -5,10 +5,16 @@ Classes to interact with serial connections or virtual connections to a locally-
 We wrap enough of the serial.Serial interface for the Debugger's needs, and also support
 a version that operates on two internal pipes for intra-process "serial" connection to the
 HostedDumpDebugger service.
+
+A RecordingConn wraps another connection and logs its traffic to a file, which a ReplayConn
+can later play back to a Debugger without the device.
 """
 
+import collections
 import fcntl
+import json
 import os
+import select
 import serial
 import time
 
@@ -40,6 +46,10 @@ class DebugConn(object):
     def readline(self, *args, **kwargs):
         raise Exception("Unimplemented")
 
+    def read(self, size):
+        """ Read up to `size` bytes; fewer are returned if the read times out. """
+        raise Exception("Unimplemented")
+
     def write(self, *args, **kwargs):
         raise Exception("Unimplemented")
 
@@ -47,6 +57,30 @@ class DebugConn(object):
         raise Exception("Unimplemented")
 
     def available(self):
+        """ Return the number of bytes that can be read without waiting. """
+        raise Exception("Unimplemented")
+
+    def fileno(self):
+        """
+        Return a file descriptor that select() reports readable when data arrives, or None if
+        the connection can't be waited on that way. (Data already buffered by the connection is
+        reported by available(), not by the descriptor.)
+        """
+        return None
+
+    def get_baud(self):
+        """ Return the baud rate of the connection, or None if it does not have one. """
+        return None
+
+    def get_base_baud(self):
+        """
+        Return the baud rate the connection was opened at (which the device returns to when it
+        resets), or None if it does not have one.
+        """
+        return None
+
+    def set_baud(self, baud):
+        """ Change the baud rate of the open connection. """
         raise Exception("Unimplemented")
 
     def __repr__(self):
@@ -56,12 +90,17 @@ class DebugConn(object):
 class SerialConn(DebugConn):
     """
     Connection to debugged instance over a serial port
+
+    The connection is opened at the base baud rate. The rate may then be changed with
+    set_baud(), but reopening the port returns to the base rate: opening the port resets most
+    Arduino boards, and the debug service on the device starts at its base rate.
     """
 
     def __init__(self, port, baud, timeout):
         DebugConn.__init__(self)
         self._conn = None
         self.port = None
+        self.base_baud = None
         self.baud = None
         self.timeout = None
         self.reopen(port, baud, timeout)
@@ -74,9 +113,10 @@ class SerialConn(DebugConn):
         if port is not None:
             self.port = port
         if baud is not None:
-            self.baud = baud
+            self.base_baud = baud
         if timeout is not None:
             self.timeout = timeout
+        self.baud = self.base_baud
 
         if self._conn is not None:
             self.close()
@@ -93,12 +133,31 @@ class SerialConn(DebugConn):
     def available(self):
         return self._conn.in_waiting
 
+    def fileno(self):
+        if self._conn is None or not hasattr(self._conn, 'fileno'):
+            return None  # Not open, or not a POSIX serial port.
+        return self._conn.fileno()
+
+    def get_baud(self):
+        return self.baud
+
+    def get_base_baud(self):
+        return self.base_baud
+
+    def set_baud(self, baud):
+        self._conn.flush()  # Send anything written at the old rate first.
+        self.baud = baud
+        self._conn.baudrate = baud
+
     def write(self, *args, **kwargs):
         return self._conn.write(*args, **kwargs)
 
     def readline(self, *args, **kwargs):
         return self._conn.readline(*args, **kwargs)
 
+    def read(self, size):
+        return self._conn.read(size)
+
     def close(self):
         if self._conn:
             self._conn.close()
@@ -112,8 +171,15 @@ class LocalBidiPipeConn(DebugConn):
     """
     Given handles to opposite ends of two open pipes, enable bidirectional conversation with
     another paired LocalBidiPipeConn.
+
+    Reads are made in chunks into an internal line buffer. When the buffer holds no complete
+    line, readline() blocks in select() until more data arrives, the peer closes its end, or
+    `timeout` seconds pass without new data.
     """
 
+    # Max bytes to take from the pipe per read() call.
+    READ_CHUNK_SIZE = 4096
+
     def __init__(self, read_fd, write_fd, timeout):
         DebugConn.__init__(self)
         self._read_fd = read_fd
@@ -124,8 +190,8 @@ class LocalBidiPipeConn(DebugConn):
         fcntl.fcntl(self._write_fd, fcntl.F_SETFL, os.O_SYNC)
 
         self._is_open = True
+        self._eof = False  # Set when the peer has closed its end of our read pipe.
         self._buf = bytearray()
-        self._n_buffered = 0
 
     def max_retries(self):
         # This connection cannot be retried.
@@ -150,48 +216,74 @@ class LocalBidiPipeConn(DebugConn):
 
         self._is_open = False
 
-    def readline(self, *args, **kwargs):
-        out = bytearray()
-
-        # Start by draining our buffer.
-        while self._n_buffered:
-            c = self._buf[0]
+    def _fill(self, timeout):
+        """
+        Wait up to `timeout` seconds for the pipe to become readable, then read all the data
+        currently available into our buffer.
 
-            out.append(c)
-            del self._buf[0]  # This can be O(n^2) but we don't actually buffer very far.
-            self._n_buffered -= 1
+        @return the number of bytes read.
+        """
+        if self._eof:
+            return 0
 
-            if c == ord('\n'):
-                # We hit the end.
-                return bytes(out)
+        (readable, _, _) = select.select([self._read_fd], [], [], timeout)
+        if not readable:
+            return 0
 
-        sleep_start = None
+        n_read = 0
         while True:
             try:
-                newbytes = os.read(self._read_fd, 1)
-                if len(newbytes) == 0:
-                    return bytes(out)  # EOF condition -- we're done.
+                newbytes = os.read(self._read_fd, LocalBidiPipeConn.READ_CHUNK_SIZE)
             except BlockingIOError:
-                # Got nothing from nonblocking read.
-                if sleep_start is not None:
-                    # Not our first attempt at this.
-                    if time.time() - sleep_start > self.timeout:
-                        # We hit the limit; return whatever we've got.
-                        return bytes(out)
-                else:
-                    # This is the first such time point. Mark when we started.
-                    sleep_start = time.time()
-                time.sleep(0.025)  # Wait 25ms and try again.
-                continue
-
-            sleep_start = None  # We got a byte; reset timeout.
-            c = newbytes[0]
-            out.append(c)
-            if c == ord('\n'):
-                break  # Done!
-
-        return bytes(out)
+                break  # Drained everything available for now.
+
+            if len(newbytes) == 0:
+                self._eof = True
+                break
+
+            self._buf += newbytes
+            n_read += len(newbytes)
+            if len(newbytes) < LocalBidiPipeConn.READ_CHUNK_SIZE:
+                break
 
+        return n_read
+
+    def readline(self, *args, **kwargs):
+        scan_start = 0  # Bytes of _buf already known not to contain a newline.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            eol = self._buf.find(b'\n', scan_start)
+            if eol >= 0:
+                out = bytes(self._buf[0:eol + 1])
+                del self._buf[0:eol + 1]
+                return out
+
+            scan_start = len(self._buf)
+            remaining = deadline - time.monotonic()
+            if self._eof or remaining <= 0:
+                # EOF or timeout; return whatever we've got.
+                out = bytes(self._buf)
+                self._buf.clear()
+                return out
+
+            if self._fill(remaining) > 0:
+                deadline = time.monotonic() + self.timeout  # We got data; reset timeout.
+
+    def read(self, size):
+        deadline = None
+        while len(self._buf) < size:
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout
+            remaining = deadline - time.monotonic()
+            if self._eof or remaining <= 0:
+                break  # EOF or timeout; return whatever we've got.
+
+            if self._fill(remaining) > 0:
+                deadline = time.monotonic() + self.timeout  # We got data; reset timeout.
+
+        out = bytes(self._buf[0:size])
+        del self._buf[0:size]
+        return out
 
     def write(self, byteseq):
         return os.write(self._write_fd, byteseq)
@@ -199,34 +291,260 @@ class LocalBidiPipeConn(DebugConn):
     def is_open(self):
         return self._is_open
 
+    def at_eof(self):
+        """
+        Return True if the peer has closed its end and all data it sent has been read.
+        """
+        return self._eof and len(self._buf) == 0
+
     def available(self):
         if not self._is_open:
-            return False
-        elif self._n_buffered > 0:
-            # Got something in the buffer already, so yes data is available.
-            return True
-        else:
+            return 0
+        elif len(self._buf) == 0:
             # Determine if data is available by doing a non-blocking read.
             # Keep the data in our internal buffer.
-            try:
-                newbytes = os.read(self._read_fd, 1)
-                if len(newbytes) == 0:
-                    # Hit EOF
-                    return False
-
-                for b in newbytes:
-                    self._buf.append(b)
-                    self._n_buffered += 1
-                return self._n_buffered > 0
-            except BlockingIOError:
-                # Didn't get anything back from read().
-                return False
+            self._fill(0)
+        return len(self._buf)
+
+    def fileno(self):
+        return self._read_fd
 
 
     def __repr__(self):
         return f"LocalBidiConn(r_fd={self._read_fd}, w_fd={self._write_fd})"
 
 
+RECORDING_FORMAT = 'arduino-dbg-wire'
+RECORDING_VERSION = 1
+
+
+class ReplayMismatchException(OSError):
+    """
+    The Debugger sent a command to a ReplayConn other than the one in the recording. As with a
+    failed serial port, the Debugger treats this as a lost connection.
+    """
+    pass
+
+
+class RecordingConn(DebugConn):
+    """
+    Wraps another DebugConn and records the traffic over it to a file, for playback by a
+    ReplayConn.
+
+    The recording is a JSON object per line: a header, then one event for each write() and for
+    each readline() or read() that returned data. Events hold the time in seconds since the
+    recording started, the direction ('w' for data sent to the device, 'r' for data received)
+    and the data as a string of bytes (latin-1; binary frames are escaped by JSON).
+    """
+
+    def __init__(self, conn, filename):
+        DebugConn.__init__(self)
+        self._conn = conn
+        self.filename = filename
+        self._start = time.monotonic()
+        self._file = open(filename, 'w', encoding='utf-8', buffering=1)  # Line-buffered.
+        self._log({'format': RECORDING_FORMAT, 'version': RECORDING_VERSION, 'conn': repr(conn),
+                   'baud': conn.get_baud()})
+
+    def _log(self, event):
+        if self._file is not None:
+            self._file.write(json.dumps(event) + '\n')
+
+    def _log_data(self, direction, data):
+        if len(data) > 0:
+            self._log({'t': round(time.monotonic() - self._start, 6), 'dir': direction,
+                       'data': data.decode('latin-1')})
+        return data
+
+    def max_retries(self):
+        return self._conn.max_retries()
+
+    def open(self, *args, **kwargs):
+        return self._conn.open(*args, **kwargs)
+
+    def reopen(self, *args, **kwargs):
+        return self._conn.reopen(*args, **kwargs)
+
+    def close(self):
+        self._conn.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def readline(self, *args, **kwargs):
+        return self._log_data('r', self._conn.readline(*args, **kwargs))
+
+    def read(self, size):
+        return self._log_data('r', self._conn.read(size))
+
+    def write(self, data):
+        ret = self._conn.write(data)
+        self._log_data('w', data)
+        return ret
+
+    def is_open(self):
+        return self._conn.is_open()
+
+    def available(self):
+        return self._conn.available()
+
+    def fileno(self):
+        return self._conn.fileno()
+
+    def get_baud(self):
+        return self._conn.get_baud()
+
+    def get_base_baud(self):
+        return self._conn.get_base_baud()
+
+    def set_baud(self, baud):
+        self._conn.set_baud(baud)
+
+    def __repr__(self):
+        return f'RecordingConn({self._conn!r}, filename={self.filename})'
+
+
+class ReplayConn(DebugConn):
+    """
+    Plays back a recording made by RecordingConn to a Debugger, in place of the device.
+
+    Each write() must match the next command in the recording; the responses recorded after that
+    command then become readable. By default they are readable immediately. To model a slower
+    link, each response can be delayed by a fixed `turnaround` time (the device's processing time)
+    plus `byte_time` for each byte of the command and the response sent before it, e.g.
+    byte_time=10.0/115200 for a 115200 baud 8N1 serial port. With `realtime`, responses instead
+    arrive after the same delays as in the recording.
+
+    @throws ReplayMismatchException from write() if the command is not the next one recorded.
+    """
+
+    def __init__(self, filename, timeout=0.1, turnaround=0.0, byte_time=0.0, realtime=False):
+        DebugConn.__init__(self)
+        self.filename = filename
+        self.timeout = timeout
+        self.turnaround = turnaround
+        self.byte_time = byte_time
+        self.realtime = realtime
+
+        self._events = collections.deque()  # (time, direction, data) yet to be replayed.
+        with open(filename, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != RECORDING_FORMAT or header.get('version', 0) > RECORDING_VERSION:
+                raise Exception(f'{filename} is not a recording of arduino-dbg wire traffic')
+            for line in f:
+                event = json.loads(line)
+                self._events.append((event['t'], event['dir'], event['data'].encode('latin-1')))
+
+        self._buf = bytearray()  # Response data that has arrived.
+        self._pending = collections.deque()  # (ready_time, data) responses still in transit.
+        self._is_open = True
+        self._release_responses(time.monotonic(), None, 0)  # Anything received before the 1st cmd.
+
+    def _release_responses(self, now, cmd_time, cmd_len):
+        """
+        Schedule the responses recorded ahead of the next command to arrive after time `now`.
+
+        @param cmd_time the recorded time of the command they answer, or None.
+        @param cmd_len the length of that command.
+        """
+        sent = cmd_len
+        while len(self._events) > 0 and self._events[0][1] == 'r':
+            (event_time, _, data) = self._events.popleft()
+            sent += len(data)
+            if self.realtime and cmd_time is not None:
+                ready = now + event_time - cmd_time
+            else:
+                ready = now + self.turnaround + self.byte_time * sent
+            self._pending.append((ready, data))
+
+    def _fill(self):
+        """
+        Move responses that have arrived by now into the buffer.
+
+        @return the time that the next response arrives, or None if there are no more.
+        """
+        now = time.monotonic()
+        while len(self._pending) > 0 and self._pending[0][0] <= now:
+            self._buf += self._pending.popleft()[1]
+        if len(self._pending) > 0:
+            return self._pending[0][0]
+        return None
+
+    def _wait(self, have_enough):
+        """
+        Wait until have_enough() is true of the buffer, or until `timeout` seconds pass without
+        any more data arriving.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            next_ready = self._fill()
+            if have_enough():
+                return
+            now = time.monotonic()
+            if next_ready is None or next_ready > deadline:
+                # Nothing more will arrive in time; wait out the timeout like a serial port.
+                if deadline > now:
+                    time.sleep(deadline - now)
+                self._fill()
+                return
+            if next_ready > now:
+                time.sleep(next_ready - now)
+            deadline = next_ready + self.timeout  # Got data; reset timeout.
+
+    def max_retries(self):
+        # A recording cannot be reconnected to.
+        return 0
+
+    def open(self, *args, **kwargs):
+        pass
+
+    def reopen(self, *args, **kwargs):
+        raise OSError("Cannot reopen a replayed connection.")
+
+    def close(self):
+        self._is_open = False
+
+    def readline(self, *args, **kwargs):
+        self._wait(lambda: b'\n' in self._buf)
+        eol = self._buf.find(b'\n')
+        end = eol + 1 if eol >= 0 else len(self._buf)
+        out = bytes(self._buf[0:end])
+        del self._buf[0:end]
+        return out
+
+    def read(self, size):
+        self._wait(lambda: len(self._buf) >= size)
+        out = bytes(self._buf[0:size])
+        del self._buf[0:size]
+        return out
+
+    def write(self, data):
+        data = bytes(data)
+        if len(self._events) == 0:
+            raise ReplayMismatchException(f'Command {data!r} sent after the end of the recording')
+        (cmd_time, direction, expected) = self._events[0]
+        if direction != 'w' or expected != data:
+            raise ReplayMismatchException(f'Command {data!r} sent; recording has {expected!r}')
+
+        self._events.popleft()
+        self._release_responses(time.monotonic(), cmd_time, len(data))
+        return len(data)
+
+    def is_open(self):
+        return self._is_open
+
+    def at_eof(self):
+        """ Return True if the whole recording has been replayed and read. """
+        return len(self._events) == 0 and len(self._pending) == 0 and len(self._buf) == 0
+
+    def available(self):
+        self._fill()
+        return len(self._buf)
+
+    def __repr__(self):
+        return f'ReplayConn(filename={self.filename})'
+
+
 def make_bidi_pipe():
     """
     Make a bidirectional communication pipe and return a pair of LocalBidiPipeConn instances
@@ -0,0 +1,284 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Find the RAM of a paused sketch that is reachable from its registers, stack and globals.
+
+A minidump captures only this memory: the stack from $SP to RAMEND, the global variables in
+the symbol table, and the objects reachable from either by following pointers, as laid out by
+the types in the debug info. Everything else (free RAM, unreferenced heap blocks...) is left
+out of the dump as a hole.
+"""
+
+import arduino_dbg.eval_location as el
+import arduino_dbg.memory_map as memory_map
+import arduino_dbg.sram_cache as sram_cache
+import arduino_dbg.types as types
+from arduino_dbg.term import MsgLevel
+
+# Stop following pointers after this many objects, in case of a runaway (e.g. a huge list).
+MAX_REACHABLE_OBJECTS = 4096
+
+
+def _strip_qualifiers(typ):
+    """
+    Return the type underlying any const qualifiers and typedefs of `typ`.
+    """
+    while isinstance(typ, (types.ConstType, types.AliasType)):
+        typ = typ.parent_type()
+    return typ
+
+
+def _is_pointer(typ):
+    return isinstance(typ, (types.PointerType, types.ReferenceType, types.RValReferenceType))
+
+
+class ReachableMemory(object):
+    """
+    Collects the address ranges of RAM reachable from the stack and globals.
+
+    Memory is read through an eval_location.Memory accessor, so the pointer values read during
+    the walk are served from the Debugger's SRAM cache where possible.
+    """
+
+    def __init__(self, debugger):
+        self._debugger = debugger
+        self._memory = el.Memory(debugger)
+        self._mmap = debugger.arch_iface.memory_map()
+        self._ram_start = debugger.get_arch_conf("RAMSTART")
+        self._ram_end = debugger.get_arch_conf("RAMEND")
+
+        self._ranges = []       # [start, end) address ranges to capture.
+        self._work = []         # (addr, typ) of objects whose pointers are yet to be followed.
+        self._visited = set()   # (addr, id(typ)) of objects already queued.
+        self._has_pointers_memo = {}  # id(typ) -> True if an object of typ may hold pointers.
+
+    def _is_ram(self, addr):
+        return self._ram_start <= addr <= self._ram_end
+
+    def _add_range(self, start, end):
+        start = max(start, self._ram_start)
+        end = min(end, self._ram_end + 1)
+        if start < end:
+            self._ranges.append((start, end))
+
+    def _has_pointers(self, typ):
+        """
+        Return True if an object of type `typ` may contain pointers to follow.
+        """
+        typ = _strip_qualifiers(typ)
+        key = id(typ)
+        if key in self._has_pointers_memo:
+            return self._has_pointers_memo[key]
+
+        self._has_pointers_memo[key] = False  # Guard against recursive types while we look.
+        if _is_pointer(typ):
+            result = True
+        elif isinstance(typ, types.ClassType):
+            result = False
+            cls = typ
+            while isinstance(cls, types.ClassType) and not result:
+                result = any([self._has_pointers(field.parent_type()) for field in cls.fields])
+                cls = cls.parent_type()
+        elif isinstance(typ, types.ArrayType):
+            result = self._has_pointers(typ.parent_type())
+        else:
+            result = False
+
+        self._has_pointers_memo[key] = result
+        return result
+
+    def _queue(self, addr, typ):
+        """
+        Queue the object of type `typ` at RAM address `addr` to have its pointers followed.
+        """
+        typ = _strip_qualifiers(typ)
+        if typ is None or not self._has_pointers(typ):
+            return
+        key = (addr, id(typ))
+        if key in self._visited or len(self._visited) >= MAX_REACHABLE_OBJECTS:
+            return
+        self._visited.add(key)
+        self._work.append((addr, typ))
+
+    def _follow(self, ptr, ptr_type):
+        """
+        Capture the object that the pointer value `ptr` of type `ptr_type` points to.
+        """
+        if not isinstance(ptr, int) or ptr == 0 or not self._is_ram(ptr):
+            return
+
+        target_type = _strip_qualifiers(ptr_type.get_dereferenced_type())
+        if target_type is None or target_type.size is None or target_type.size <= 0:
+            return  # void* or incomplete type; we can't tell how much to capture.
+
+        if target_type.is_char():
+            # Capture a null-terminated string, up to the length we'd print.
+            max_len = min(el.Memory.MAX_NULL_TERM_STRING_LEN, self._ram_end + 1 - ptr)
+            data = self._debugger.read_memory(ptr, max_len)
+            str_len = data.find(b'\0') + 1 or max_len
+            self._add_range(ptr, ptr + str_len)
+            return
+
+        self._add_range(ptr, ptr + target_type.size)
+        self._queue(ptr, target_type)
+
+    def _walk(self, addr, typ):
+        """
+        Follow the pointers held within the object of type `typ` at `addr`.
+        """
+        if _is_pointer(typ):
+            self._follow(self._memory.mem(addr, typ.size), typ)
+        elif isinstance(typ, types.ClassType):
+            cls = typ
+            while isinstance(cls, types.ClassType):
+                for field in cls.fields:
+                    self._queue(addr + (field.offset or 0), field.parent_type())
+                cls = cls.parent_type()
+        elif isinstance(typ, types.ArrayType):
+            elem_type = typ.parent_type()
+            elem_size = typ.get_array_elem_size()
+            length = typ.get_array_len()
+            if isinstance(length, int) and length > 0 and elem_size:
+                for i in range(0, length):
+                    self._queue(addr + i * elem_size, elem_type)
+
+    def _add_variable(self, var, regs, frame):
+        """
+        Follow the pointers held by a local variable or formal argument of a stack frame, which
+        may be in registers or on the stack.
+        """
+        typ = _strip_qualifiers(var.get_type())
+        if typ is None or not self._has_pointers(typ):
+            return
+
+        (addrs, flags) = var.getAddress(regs, frame)
+        if addrs is None or not el.LookupFlags.successful(flags):
+            return
+
+        if _is_pointer(typ):
+            self._memory.set_regs(regs)
+            (ptr, _) = self._memory.access_resolved_address(addrs, flags, size=typ.size)
+            self._follow(ptr, typ)
+        elif len(addrs) == 1 and isinstance(addrs[0][0], int):
+            addr = addrs[0][0]
+            if flags & el.LookupFlags.CONST_ADDR:
+                addr = self._ram_addr_for_symbol(addr)
+            if addr is not None:
+                self._queue(addr, typ)
+
+    def _ram_addr_for_symbol(self, addr):
+        """
+        Return the RAM address for the flat (ELF) address of a symbol, or None if it is not in RAM.
+        """
+        try:
+            if self._mmap.access_mechanism_for_addr(addr) != memory_map.ACCESS_TYPE_RAM:
+                return None
+            addr = self._mmap.logical_to_physical_addr(addr)
+        except RuntimeError:
+            return None  # Not in any segment.
+
+        return addr if self._is_ram(addr) else None
+
+    def add_low_memory(self, image_start):
+        """
+        Capture the memory from image_start up to RAMSTART (e.g. the AVR register file and I/O
+        space, which the dump's RAM image starts with).
+        """
+        if image_start < self._ram_start:
+            self._ranges.append((image_start, self._ram_start))
+
+    def add_globals(self):
+        """
+        Capture all global variables in RAM, and queue them to have their pointers followed.
+        """
+        seen = set()
+        for name in self._debugger.syms_by_prefix(''):
+            sym = self._debugger.lookup_sym(name)
+            if sym is None or id(sym) in seen:
+                continue
+            seen.add(id(sym))
+
+            if sym.elf_sym['st_info']['type'] != "STT_OBJECT" or sym.size <= 0:
+                continue
+            addr = self._ram_addr_for_symbol(sym.addr)
+            if addr is None:
+                continue
+
+            self._add_range(addr, addr + sym.size)
+            if isinstance(sym.type_info, types.VariableInfo):
+                self._queue(addr, sym.type_info.var_type)
+
+    def add_stack(self):
+        """
+        Capture the stack from $SP to RAMEND, and follow the pointers held by the locals and
+        formal args of each frame in the backtrace.
+        """
+        regs = self._debugger.get_registers()
+        self._add_range(regs['SP'], self._ram_end + 1)
+
+        frames = self._debugger.get_backtrace(force_unhide=True)
+        for frame_num in range(0, len(frames)):
+            scopes = self._debugger.get_frame_vars(frame_num, force_unhide=True)
+            frame_regs = self._debugger.get_frame_regs(frame_num, force_unhide=True)
+            if scopes is None or frame_regs is None:
+                continue
+
+            for scope in scopes:
+                variables = list(scope.getFormals()) + [var for (_, var) in scope.getVariables()]
+                for var in variables:
+                    try:
+                        self._add_variable(var, frame_regs, frames[frame_num])
+                    except Exception as e:
+                        # Locations that can't be evaluated at this $PC are simply not followed.
+                        self._debugger.verboseprint(f'Minidump: could not follow {var}: {e}')
+
+    def follow_pointers(self):
+        """
+        Follow pointers from all queued objects until no new objects are found.
+        """
+        while len(self._work) > 0:
+            (addr, typ) = self._work.pop()
+            try:
+                self._walk(addr, typ)
+            except Exception as e:
+                self._debugger.verboseprint(f'Minidump: could not read {typ} at 0x{addr:x}: {e}')
+
+        if len(self._visited) >= MAX_REACHABLE_OBJECTS:
+            self._debugger.msg_q(
+                MsgLevel.WARN,
+                f"Warning: stopped following pointers after {MAX_REACHABLE_OBJECTS} objects")
+
+    def get_runs(self):
+        """
+        Return the captured memory as a sorted list of non-overlapping [start, end) address
+        ranges. Ranges are widened to whole SRAM cache pages and merged where they meet.
+        """
+        page_size = sram_cache.SramPageCache.DEFAULT_PAGE_SIZE
+        runs = []
+        for (start, end) in sorted(self._ranges):
+            start = self._ram_start + (start - self._ram_start) // page_size * page_size
+            end = self._ram_start + (end - self._ram_start + page_size - 1) // page_size * page_size
+            end = min(end, self._ram_end + 1)
+            if len(runs) > 0 and start <= runs[-1][1]:
+                runs[-1][1] = max(runs[-1][1], end)
+            else:
+                runs.append([start, end])
+
+        return runs
+
+
+def find_reachable_ram(debugger, image_start):
+    """
+    Return the RAM of the paused sketch that a minidump should capture, as a sorted list of
+    [start, end) address ranges.
+
+    @param debugger the Debugger connected to the device.
+    @param image_start the first address of the dump's RAM image; any memory between this and
+        RAMSTART (e.g. AVR registers and I/O space) is always captured.
+    """
+    reachable = ReachableMemory(debugger)
+    reachable.add_low_memory(image_start)
+    reachable.add_stack()
+    reachable.add_globals()
+    reachable.follow_pointers()
+    return reachable.get_runs()
@@ -9,11 +9,15 @@ DBG_OP_RAMADDR   = '@'  # Return data at RAM address.
 DBG_OP_STACKREL  = '$'  # Return data at addr relative to SP.
 DBG_OP_ARCH_SPEC = 'a'  # Report architecture-dependent specification of capabilities or
                         # parameters to the debugger.
+DBG_OP_RAMBLOCK  = 'b'  # Return a block of bytes starting at RAM address. (Protocol v2+)
 DBG_OP_BREAK     = 'B'  # Break execution of the program. Redundant when within interrupted dbg
                         # server but enables confirmation of break state.
 DBG_OP_CONTINUE  = 'C'  # Continue execution.
 DBG_OP_DEBUGCTL  = 'D'  # Architecture-specific debugger extension sentences.
 DBG_OP_FLASHADDR = 'f'  # Return data at Flash address.
+DBG_OP_CHECKSUM  = 'h'  # Return CRC-32 of a block of RAM. (Protocol v3+)
+DBG_OP_FRAMING   = 'X'  # Turn binary framing of responses on or off. (Protocol v4+)
+DBG_OP_BAUD      = 'U'  # Change the serial baud rate. (Protocol v5+)
 DBG_OP_SET_FLAG  = 'L'  # Set bitfield flag (e.g., for breakpoint soft en/dis-able..)
 DBG_OP_POKE      = 'K'  # Insert data to RAM address.
 DBG_OP_MEMSTATS  = 'm'  # Describe memory usage.
@@ -39,4 +43,45 @@ DBG_PAUSE_MSG = "Paused"  # Message sent by server when breakpoint is triggered
 
 DBG_END_LIST = '$'  # A list-based response ends with a '$' on a line by itself.
 
+# Response to a memory read whose contents are not known (e.g. memory in a hole of a sparse
+# dump, served by the HostedDebugService).
+DBG_RET_UNKNOWN = '?'
+
+# RAMBLOCK ('b') is supported by debug services speaking this protocol version or later.
+# Its arguments are "b <len> <addr>"; the response is a single line holding the `len` bytes
+# starting at `addr` as hex digit pairs, in memory order (lowest address first).
+DBG_RAMBLOCK_MIN_PROTOCOL_VERSION = 2
+DBG_RAMBLOCK_MAX_LEN = 64  # Max bytes the host requests in a single RAMBLOCK command.
+
+# CHECKSUM ('h') is supported by debug services speaking this protocol version or later.
+# Its arguments are "h <len> <addr>"; the response is a single line holding the CRC-32 (as
+# computed by zlib.crc32(): the IEEE 802.3 polynomial, reflected, init and final xor 0xFFFFFFFF)
+# of the `len` bytes starting at `addr`, in hex.
+DBG_CHECKSUM_MIN_PROTOCOL_VERSION = 3
+
+# Binary framing of responses is supported by debug services speaking this protocol version or
+# later. The host sends "X 1" to turn it on (or "X 0" to turn it off); the device answers with a
+# text line holding '1' if framing is now on, or '0' if not. While it is on, the commands in
+# DBG_FRAMED_OPS are answered with a frame instead of a hex text line. A frame is:
+#   DBG_FRAME_START; payload length (uint16 LE); opcode (1 byte); payload;
+#   CRC-32 (as for CHECKSUM) of the length, opcode and payload bytes (uint32 LE).
+# The opcode echoes the command, or is DBG_RET_UNKNOWN (with an empty payload) if the memory is
+# unknown. The payload holds the memory in address order: `size` bytes for RAMADDR, STACKREL and
+# FLASHADDR, and `len` bytes for RAMBLOCK. For CHECKSUM, it is the CRC-32 as a uint32 in the
+# device byte order. Other commands, '>' print messages and "Paused" messages remain text lines.
+# Framing is always off after the device sends a "Paused" message.
+DBG_FRAMING_MIN_PROTOCOL_VERSION = 4
+DBG_FRAME_START = 0x01  # Starts a frame; never the first byte of a text line.
+DBG_FRAMED_OPS = [DBG_OP_RAMADDR, DBG_OP_RAMBLOCK, DBG_OP_STACKREL, DBG_OP_FLASHADDR,
+                  DBG_OP_CHECKSUM]
+
+# BAUD ('U') is supported by debug services speaking this protocol version or later. Its argument
+# is "U <baud>". The device answers with a text line holding '1' if it will switch to that rate,
+# or '0' if not; after sending a '1', it switches its serial port to the new rate. The host
+# confirms the new rate by sending a BREAK command at that rate. If the device does not receive a
+# command within DBG_BAUD_CONFIRM_TIMEOUT seconds of switching, it returns to the previous rate.
+# The device starts at its base rate again whenever it resets.
+DBG_BAUD_MIN_PROTOCOL_VERSION = 5
+DBG_BAUD_CONFIRM_TIMEOUT = 0.5  # seconds
+
 INVALID_CPU_ID = 0xFFFFFFFF  # Response in ARCH_SPECS if CPUID could not be detected at runtime.
@@ -10,7 +10,6 @@ import traceback
 import arduino_dbg.debugger as dbg
 import arduino_dbg.dump as dump
 import arduino_dbg.eval_location as el
-import arduino_dbg.io as io
 import arduino_dbg.memory_map as memory_map
 import arduino_dbg.protocol as protocol
 from arduino_dbg.repl_command import Completions, Command, CompoundCommand, ReplAutoComplete, \
@@ -464,22 +463,25 @@ class Repl(object):
         """
         Open serial connection to a device to debug
 
-            Syntax: open </dev/ttyname> [<baud>]
+            Syntax: open </dev/ttyname> [<baud>|auto]
 
-        If baud rate is not specified, attempts to use 57600.
+        If baud rate is not specified, uses the `dbg.serial.baud` setting (57600 by default).
+        With 'auto', connects at 57600 and then switches to the fastest rate the device and
+        serial link can support.
         """
         if len(argv) == 0:
-            self._debugger.msg_q(MsgLevel.INFO, "Syntax: open </dev/ttyname> [<baud>]")
+            self._debugger.msg_q(MsgLevel.INFO, "Syntax: open </dev/ttyname> [<baud>|auto]")
             return
 
         port = argv[0]
+        baud = None
         if len(argv) > 1:
             baud = argv[1]
-        else:
-            baud = 57600
+            if baud.lower() != 'auto' and _softint(baud) is None:
+                self._debugger.msg_q(MsgLevel.ERR, f"Invalid baud rate: {baud}")
+                return
 
-        connection = io.SerialConn(port, baud, 0.1)
-        self._debugger.open(connection)
+        self._debugger.open_serial(port, baud)
 
     @Command(keywords=['reopen'])
     def _reopen(self, argv):
@@ -1685,21 +1687,36 @@ class Repl(object):
         """
         Save running image state info to file
 
-            Syntax: dump <filename>
+            Syntax: dump <filename> [<base filename>]
 
         Dumps the state of the connected device to a file for offline debugging.
 
+        If you give the filename of an earlier dump of the same sketch as the base, only the
+        memory that changed since then is read from the device; the rest is copied from the
+        base dump. (This requires a device that supports memory checksums.)
+
+        Memory is written to the file as it is read. If the capture is interrupted (e.g. by a
+        serial error that reconnecting cannot recover from), run `dump <filename>` again with
+        the same filename to resume where it left off.
+
+        The `dbg.dump.mode` setting chooses what RAM is captured: `full` (all of it), `sparse`
+        (skipping the free memory between the heap and the stack), or `mini` (only the stack,
+        global variables, and the memory they point to).
+
         Later, you can load the associated dump file with `load <filename>` or start a
         later debugging session with it directly via `arduino-dbg --dump <filename`.
         """
         if len(argv) == 0:
             self._debugger.msg_q(MsgLevel.ERR, "Error: Missing filename")
-            self._debugger.msg_q(MsgLevel.INFO, "Syntax: dump <filename>")
+            self._debugger.msg_q(MsgLevel.INFO, "Syntax: dump <filename> [<base filename>]")
             return
 
         filename = argv[0]
+        base_filename = None
+        if len(argv) > 1:
+            base_filename = argv[1]
         self._debugger.msg_q(MsgLevel.INFO, f"Writing device state to file ({filename})...")
-        dump.capture_dump(self._debugger, filename)
+        dump.capture_dump(self._debugger, filename, base_dump=base_filename)
         self._debugger.msg_q(MsgLevel.INFO, "Done.")
 
 
@@ -1747,6 +1764,31 @@ class Repl(object):
         self._debugger.arch_iface.print_cpu_stats()
 
 
+    @Command(keywords=['stats'], completions=[['reset', 'hist']])
+    def _stats(self, argv):
+        """
+        Show counts of the commands sent to the device
+
+            Syntax: stats [reset|hist]
+
+        Lists the number of commands sent for each protocol opcode, the bytes sent and received,
+        and the latency of each (from sending the command to receiving all of its response),
+        followed by the totals for each debugger command. `stats hist` adds a latency histogram
+        for each opcode; `stats reset` clears all counts.
+
+        Use `set dbg.stats.per_command True` to print a summary after each command.
+        """
+        stats = self._debugger.get_wire_stats()
+        if len(argv) == 0 or argv[0] == 'hist':
+            for line in stats.report(histograms=len(argv) > 0):
+                self._debugger.msg_q(MsgLevel.INFO, line)
+        elif argv[0] == 'reset':
+            stats.reset()
+            self._debugger.msg_q(MsgLevel.INFO, "Wire stats reset.")
+        else:
+            self._debugger.msg_q(MsgLevel.INFO, "Syntax: stats [reset|hist]")
+
+
     @Command(keywords=['help'], completions=[Completions.KW])
     def print_help(self, argv):
         """
@@ -1871,8 +1913,15 @@ class Repl(object):
 
                 # We have exclusive control of the debugger I/O channels.
                 assert locked
-                # Proceed to command.
-                cmd_obj.invoke(cmd_self, cmd_args)
+                # Proceed to command, counting the wire traffic it causes.
+                wire_stats = self._debugger.get_wire_stats()
+                wire_stats.begin_command(pretty_cmd)
+                try:
+                    cmd_obj.invoke(cmd_self, cmd_args)
+                finally:
+                    cmd_stats = wire_stats.end_command()
+                    if self._debugger.get_conf("dbg.stats.per_command") and cmd_stats.ops > 0:
+                        self._debugger.msg_q(MsgLevel.INFO, cmd_stats.summary())
             finally:
                 # Release I/O channel lock.
                 if locked:
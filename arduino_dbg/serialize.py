@@ -1,9 +1,14 @@
 # (c) Copyright 2022 Aaron Kimball
 
+import re
+
 import arduino_dbg.term as term
 
 DBG_CONF_FMT_VERSION = 1
 
+# Matches the '+' continuation between two parts of a long bytes value.
+_bytes_concat_regex = re.compile(r"""(['"]) \+ \\\n    b(['"])""")
+
 
 def load_config_file(print_q, filename, map_name='config', defaults=None):
     """
@@ -27,6 +32,10 @@ def load_config_file(print_q, filename, map_name='config', defaults=None):
 
     with open(filename, "r") as f:
         conf_text = f.read()
+        # Long bytes values were written as a chain of literals joined with '+'. Python parses
+        # such an expression recursively, which fails for a large memory image; drop the '+' so
+        # they are parsed as a (flat) implicit concatenation of adjacent literals.
+        conf_text = _bytes_concat_regex.sub(r'\1 \\\n    b\2', conf_text)
         try:
             exec(conf_text, init_env, init_env)
         except BaseException:
@@ -79,7 +88,7 @@ def __persist_conf_var(f, k, v):
             first = True
             for offset in range(0, length, MAX_BYTES_PER_LINE):
                 if not first:
-                    f.write(' + \\\n    ')
+                    f.write(' \\\n    ')  # Adjacent literals are concatenated.
                 f.write(repr(vbytes[offset: offset + MAX_BYTES_PER_LINE]))
                 first = False
         else:
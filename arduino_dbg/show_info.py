@@ -60,6 +60,40 @@ class ShowCommands(object):
         debugger.msg_q(MsgLevel.INFO, '')
         debugger.msg_q(MsgLevel.INFO, version.LICENSE)
 
+    @CompoundCommand(kw1=['show'], kw2=['cache'], cls='ShowCommands')
+    def show_cache(self, argv):
+        """
+        Print SRAM cache statistics
+
+            Syntax: show cache [reset]
+
+        While the device is paused, memory read from it is cached by the debugger. This
+        shows how many page lookups were served from the cache (hits) and how many needed
+        to read from the device (misses). 'show cache reset' resets the counters.
+        """
+        debugger = self._repl.debugger()
+        cache = debugger.get_sram_cache()
+        if cache is None:
+            debugger.msg_q(MsgLevel.INFO, 'No SRAM cache in use; architecture not yet known.')
+            return
+
+        enabled = debugger.get_conf('dbg.mem.cache')
+        lookups = cache.hits + cache.misses
+        if lookups > 0:
+            hit_pct = f'{100.0 * cache.hits / lookups:.1f}%'
+        else:
+            hit_pct = '-'
+
+        debugger.msg_q(MsgLevel.INFO, f'SRAM cache:  {"enabled" if enabled else "disabled"}')
+        debugger.msg_q(MsgLevel.INFO, f'Page size:   {cache.page_size} bytes')
+        debugger.msg_q(MsgLevel.INFO, f'Hits:        {cache.hits}')
+        debugger.msg_q(MsgLevel.INFO, f'Misses:      {cache.misses}')
+        debugger.msg_q(MsgLevel.INFO, f'Hit rate:    {hit_pct}')
+
+        if len(argv) > 0 and argv[0] == 'reset':
+            cache.reset_stats()
+            debugger.msg_q(MsgLevel.INFO, 'Cache statistics reset.')
+
     @CompoundCommand(kw1=['show'], kw2=['capabilities'], cls='ShowCommands')
     def show_capabilities(self, argv):
         """
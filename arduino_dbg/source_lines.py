@@ -0,0 +1,109 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Map program counter ($PC) values to source file and line numbers, using the line-number
+programs in the ELF file's .debug_line section.
+"""
+
+import bisect
+import os
+
+
+class _LineSequence(object):
+    """
+    One sequence of rows from a line-number program, covering the contiguous address range
+    [low_pc, high_pc).
+    """
+
+    __slots__ = ['low_pc', 'high_pc', 'addrs', 'rows']
+
+    def __init__(self, addrs, rows, high_pc):
+        self.low_pc = addrs[0]
+        self.high_pc = high_pc
+        self.addrs = addrs  # Sorted row addresses.
+        self.rows = rows    # (filename, line) for each entry in addrs.
+
+    def lookup(self, pc):
+        # Use the last row at or below $PC; if several rows share an address, the last
+        # one wins.
+        return self.rows[bisect.bisect_right(self.addrs, pc) - 1]
+
+
+class LineTable(object):
+    """
+    A sorted table of the line-number sequences for all compilation units in an ELF file.
+
+    The line-number programs are decoded once, when the LineTable is constructed. Lookups
+    resolve $PC to (filename, line) by bisecting the sequences, giving the same answers as
+    `addr2line -s` for addresses covered by .debug_line.
+    """
+
+    def __init__(self, dwarf_info):
+        self._sequences = []
+        self._low_pcs = []
+        self._max_high_pcs = []  # max(high_pc) over self._sequences[0:i+1].
+
+        if dwarf_info is not None:
+            self._decode(dwarf_info)
+
+    def _decode(self, dwarf_info):
+        sequences = []
+        for cu in dwarf_info.iter_CUs():
+            line_program = dwarf_info.line_program_for_CU(cu)
+            if line_program is None:
+                continue
+
+            filenames = [os.path.basename(entry.name.decode('utf-8', errors='replace'))
+                         for entry in line_program['file_entry']]
+            # File numbers are 1-based before DWARF 5, and 0-based from DWARF 5 onward.
+            file_base = 0 if line_program['version'] >= 5 else 1
+
+            addrs = []
+            rows = []
+            for entry in line_program.get_entries():
+                state = entry.state
+                if state is None:
+                    continue  # Not a new row in the table.
+                elif state.end_sequence:
+                    if len(addrs) > 0:
+                        sequences.append(_LineSequence(addrs, rows, state.address))
+                    addrs = []
+                    rows = []
+                    continue
+
+                file_idx = state.file - file_base
+                if 0 <= file_idx < len(filenames):
+                    filename = filenames[file_idx]
+                else:
+                    filename = '??'
+                addrs.append(state.address)
+                rows.append((filename, state.line))
+
+        # Order by start address. Where sequences overlap (e.g. under LTO), a lookup uses the
+        # one that starts first; for equal starts, the longer one.
+        sequences.sort(key=lambda seq: (seq.low_pc, -seq.high_pc))
+
+        max_high_pc = 0
+        for seq in sequences:
+            max_high_pc = max(max_high_pc, seq.high_pc)
+            self._sequences.append(seq)
+            self._low_pcs.append(seq.low_pc)
+            self._max_high_pcs.append(max_high_pc)
+
+    def lookup(self, pc):
+        """
+        Return the (filename, line) for the source of the instruction at $PC, or None if
+        .debug_line does not cover $PC. The filename is the base name of the source file.
+        """
+        found = None
+        idx = bisect.bisect_right(self._low_pcs, pc) - 1
+        # Walk back through sequences that start at or below $PC for as long as any of
+        # them could extend past $PC.
+        while idx >= 0 and self._max_high_pcs[idx] > pc:
+            if self._sequences[idx].high_pc > pc:
+                found = self._sequences[idx]
+            idx -= 1
+
+        if found is None:
+            return None
+        return found.lookup(pc)
@@ -0,0 +1,157 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Host-side cache of device SRAM contents, valid while the device is paused.
+
+While the sketch sits in the debug service, RAM only changes when the debugger itself writes to
+it. So we can hold onto anything we have read from RAM until the device is resumed, stepped,
+or reset, and serve repeated reads (e.g. stack unwinding, `locals`, `print`) locally.
+"""
+
+
+class SramPageCache(object):
+    """
+    A page-granular read cache of SRAM.
+
+    A read that touches an uncached page fetches the whole aligned page from the device.
+    Only addresses within [ram_start, ram_end] are cacheable; reads outside that range (e.g.,
+    memory-mapped peripheral registers, which may change while the CPU is paused) must be
+    sent to the device directly.
+
+    Writes to the device must be reported via write() or discard() so the cache stays coherent.
+    """
+
+    DEFAULT_PAGE_SIZE = 64  # bytes
+
+    def __init__(self, ram_start, ram_end, page_size=DEFAULT_PAGE_SIZE):
+        """
+        @param ram_start the first cacheable RAM address.
+        @param ram_end the last cacheable RAM address (inclusive).
+        @param page_size the unit in which memory is fetched and cached.
+        """
+        self.ram_start = ram_start
+        self.ram_end = ram_end
+        self.page_size = page_size
+
+        self._pages = {}  # Map from page base addr to a bytearray holding that page.
+        self._stack_words = {}  # Map from (SP offset, size) to value, for SP-relative reads.
+
+        self.hits = 0     # Count of page lookups served from the cache.
+        self.misses = 0   # Count of page lookups that required a device read.
+
+    def __repr__(self):
+        return f'SramPageCache(pages={len(self._pages)}, hits={self.hits}, misses={self.misses})'
+
+    def is_cacheable(self, addr, length):
+        """
+        Return True if the range [addr, addr + length) lies entirely within cacheable RAM.
+        """
+        return length > 0 and addr >= self.ram_start and addr + length - 1 <= self.ram_end
+
+    def _page_base(self, addr):
+        return addr - ((addr - self.ram_start) % self.page_size)
+
+    def read(self, addr, length, fetch_fn):
+        """
+        Return `length` bytes starting at `addr`, fetching any uncached pages in the range.
+
+        @param addr the first address to read; must satisfy is_cacheable(addr, length).
+        @param length the number of bytes to read.
+        @param fetch_fn a function (addr, length) -> bytes that reads memory from the device.
+            Each contiguous run of missing pages is fetched with a single call.
+        @return a `bytes` object holding the requested memory.
+        """
+        assert self.is_cacheable(addr, length)
+
+        first_page = self._page_base(addr)
+        last_page = self._page_base(addr + length - 1)
+
+        # Fetch any missing pages, coalescing adjacent missing pages into one device read.
+        run_start = None
+        for page in range(first_page, last_page + self.page_size, self.page_size):
+            if page in self._pages:
+                self.hits += 1
+                if run_start is not None:
+                    self.__fetch_run(run_start, page, fetch_fn)
+                    run_start = None
+            else:
+                self.misses += 1
+                if run_start is None:
+                    run_start = page
+
+        if run_start is not None:
+            self.__fetch_run(run_start, last_page + self.page_size, fetch_fn)
+
+        out = bytearray()
+        page = first_page
+        while page <= last_page:
+            out.extend(self._pages[page])
+            page += self.page_size
+
+        start = addr - first_page
+        return bytes(out[start:start + length])
+
+    def __fetch_run(self, run_start, run_end, fetch_fn):
+        """
+        Fetch the pages from run_start up to (not including) run_end and store them.
+        The final page is truncated at ram_end.
+        """
+        fetch_end = min(run_end, self.ram_end + 1)
+        data = fetch_fn(run_start, fetch_end - run_start)
+        for page in range(run_start, run_end, self.page_size):
+            self._pages[page] = bytearray(data[page - run_start:page - run_start + self.page_size])
+
+    def read_stack(self, offset, size, fetch_fn):
+        """
+        Return the value of the `size`-byte word at $SP + `offset`, fetching it if uncached.
+
+        SP-relative reads are cached by (offset, size) rather than by page, since we do not
+        know the on-device $SP that the debug service applies the offset to.
+
+        @param fetch_fn a function (offset, size) -> int that reads the word from the device.
+        """
+        key = (offset, size)
+        if key in self._stack_words:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._stack_words[key] = fetch_fn(offset, size)
+
+        return self._stack_words[key]
+
+    def write(self, addr, data):
+        """
+        Record that `data` was written to the device at `addr`, updating any cached pages.
+        """
+        self._stack_words = {}  # Can't tell whether any SP-relative words overlap the write.
+        for i, b in enumerate(data):
+            page = self._page_base(addr + i)
+            if page in self._pages and addr + i - page < len(self._pages[page]):
+                self._pages[page][addr + i - page] = b
+
+    def discard(self, addr, length):
+        """
+        Drop any cached pages overlapping [addr, addr + length), e.g. because the device modified
+        that memory in a way we cannot replicate locally.
+        """
+        if length <= 0:
+            return
+
+        self._stack_words = {}
+        page = self._page_base(addr)
+        while page < addr + length:
+            self._pages.pop(page, None)
+            page += self.page_size
+
+    def invalidate(self):
+        """
+        Drop all cached memory; e.g. because the device has resumed execution.
+        The hit/miss counters are preserved.
+        """
+        self._pages = {}
+        self._stack_words = {}
+
+    def reset_stats(self):
+        """ Reset the hit and miss counters. """
+        self.hits = 0
+        self.misses = 0
@@ -54,7 +54,7 @@ class CallFrame(object):
         # be within more methods.
         self.inline_chain = debugger.get_debug_info().getMethodsForPC(addr)
 
-        self._calculate_source_line(debugger.elf_name)
+        self._calculate_source_line()
         self._demangle()
 
         if regs_in is not None:
@@ -85,14 +85,14 @@ class CallFrame(object):
         else:
             self.demangled = binutils.demangle(self.name) or '???'
 
-        self.demangled_inline_chain = list(map(binutils.demangle, self.inline_chain))
+        self.demangled_inline_chain = binutils.demangle_batch(self.inline_chain)
 
 
-    def _calculate_source_line(self, elf_name):
+    def _calculate_source_line(self):
         """
         Calculate the source code file and line number from frame $PC.
         """
-        self.source_line = binutils.pc_to_source_line(elf_name, self.addr)
+        self.source_line = self._debugger.source_line_for_pc(self.addr)
 
     def _calculate_stack_frame_size(self, regs_in):
         """
@@ -235,8 +235,27 @@ class CallFrame(object):
         regs_to_process = cfi_register_order.copy()
         regs_to_process.reverse()  # LIFO.
         self._debugger.verboseprint('regs_to_process: ', regs_to_process)
+
+        def _load_width(reg_num):
+            # $LR / $PC assignment is definitionally `ret_addr_size` bytes wide even
+            # if standard register width is smaller (e.g. on AVR)
+            reg_name = stack_unwind_registers[reg_num]
+            if reg_name == 'PC' or reg_name == 'LR' or reg_num == return_addr_reg:
+                return ret_addr_size
+            else:
+                return push_word_len
+
+        # The CFA-relative loads for all the saved registers are independent of one another;
+        # issue them as one pipelined batch rather than one round trip at a time.
+        cfa_loads = []
         for reg_num in regs_to_process:
-            reg_width = push_word_len
+            rule = rule_row.get(reg_num)
+            if rule is not None and rule.type == callframe.RegisterRule.OFFSET:
+                cfa_loads.append((cfa_addr + rule.arg, _load_width(reg_num)))
+        cfa_loaded = dict(zip(cfa_loads, self._debugger.get_sram_multi(cfa_loads)))
+
+        for reg_num in regs_to_process:
+            reg_width = _load_width(reg_num)
 
             self._debugger.verboseprint('Processing register number: ', reg_num)
 
@@ -261,11 +280,6 @@ class CallFrame(object):
                 # we be checking for reg_num == return_addr_reg as in the "real" handler after
                 # the end of the main rule.type switchcase below?
 
-            if reg_name == 'PC' or reg_name == 'LR' or reg_num == return_addr_reg:
-                # $LR / $PC assignment is definitionally `ret_addr_size` bytes wide even
-                # if standard register width is smaller (e.g. on AVR)
-                reg_width = ret_addr_size
-
             if rule.type == callframe.RegisterRule.UNDEFINED:
                 pass  # Nothing to do.
             elif rule.type == callframe.RegisterRule.SAME_VALUE:
@@ -273,7 +287,7 @@ class CallFrame(object):
             elif rule.type == callframe.RegisterRule.OFFSET:
                 # We've got an offset from the CFA; load the value at that memory address into
                 # the assigned register.
-                data = self._debugger.get_sram(cfa_addr + rule.arg, reg_width)
+                data = cfa_loaded[(cfa_addr + rule.arg, reg_width)]
                 if reg_name == 'PC' or reg_name == 'LR':
                     data = self._debugger.arch_iface.mem_to_pc(data)
                 regs_out[reg_name] = data
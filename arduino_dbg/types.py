@@ -10,6 +10,8 @@ import elftools.dwarf.locationlists as locationlists
 from sortedcontainers import SortedDict, SortedList
 
 import arduino_dbg.binutils as binutils
+import arduino_dbg.debuginfo_cache as debuginfo_cache
+import arduino_dbg.debuginfo_workers as debuginfo_workers
 import arduino_dbg.debugger as dbg
 import arduino_dbg.eval_location as el
 import arduino_dbg.term as term
@@ -26,6 +28,21 @@ KIND_METHOD = 2
 KIND_VARIABLE = 3
 
 
+def cu_order(entry):
+    """
+    Return the .debug_info offset of the compilation unit that defined a VariableInfo or
+    MethodInfo entry, or -1 if unknown.
+
+    With lazy parsing, compilation units may be parsed in any order. Where several CUs bind the
+    same global name, comparing cu_order() lets us keep the entry from the CU that comes last
+    in .debug_info, as if all CUs had been parsed in order.
+    """
+    cuns = getattr(entry, '_cuns', None)
+    if cuns is None:
+        return -1
+    return cuns.getOffset()
+
+
 class PCRange(object):
     """
     An interval of $PC values associated with a method implementation.
@@ -80,6 +97,7 @@ class CompilationUnitNamespace(object):
         self._cu = cu
         self._variables = {}
         self._methods = {}
+        self._parsed = False  # Set True once parseTypesFromDIE() has processed this CU's DIEs.
 
         top_die = cu.get_top_DIE()
         try:
@@ -114,12 +132,37 @@ class CompilationUnitNamespace(object):
         self.expr_parser = dwarf_expr.DWARFExprParser(cu.structs)
         self._debugger = debugger
 
+    def __getstate__(self):
+        # The expr parser holds unpicklable structs; rebuild from the CU on load.
+        state = self.__dict__.copy()
+        del state['expr_parser']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.expr_parser = dwarf_expr.DWARFExprParser(self._cu.structs)
+
     def getCU(self):
         return self._cu
 
     def getOffset(self):
         return self._die_offset
 
+    def is_parsed(self):
+        """
+        Return True if the DIEs of this compilation unit have been parsed into this namespace.
+        """
+        return self._parsed
+
+    def set_parsed(self):
+        self._parsed = True
+
+    def cu_contains_offset(self, offset):
+        """
+        Return True if the .debug_info offset lies within this compilation unit.
+        """
+        return offset >= self._cu.cu_offset and offset < self._cu.cu_offset + self._cu.size
+
     def getLocationExprBytes(self, location_expr_data, regs):
         """
         Extract the location expr bytes (opcode stream) from DW_AT_location-like attrs.
@@ -275,6 +318,19 @@ class DieBase(object):
     def __init__(self):
         self.die = None
 
+    @property
+    def die(self):
+        die = self.__dict__.get('_die')
+        if isinstance(die, debuginfo_cache.DIERef):
+            # Loaded from the debug info cache; bind to the DIE in the open ELF on first use.
+            die = die.resolve()
+            self._die = die
+        return die
+
+    @die.setter
+    def die(self, new_die):
+        self._die = new_die
+
     def get_die(self):
         """
         Retrieve debug info entry for this object.
@@ -360,6 +416,9 @@ class GlobalScope(DieBase):
         self._debugger = debugger
 
     def addVariable(self, var):
+        existing = self._variables.get(var.name)
+        if existing is not None and cu_order(existing) > cu_order(var):
+            return  # CUs were parsed out of order; keep the later CU's entry as an in-order parse would.
         self._variables[var.name] = var
         self._debugger.bind_sym_type(var.name, var)
 
@@ -370,12 +429,18 @@ class GlobalScope(DieBase):
         return self._variables.items()
 
     def addMethod(self, methodInfo):
+        existing = self._methods.get(methodInfo.method_name)
+        if existing is not None and cu_order(existing) > cu_order(methodInfo):
+            return  # As above.
         self._methods[methodInfo.method_name] = methodInfo
         self._debugger.bind_sym_type(methodInfo.method_name, methodInfo)
 
     def getMethod(self, methodName):
         return self._methods.get(methodName)
 
+    def getMethods(self):
+        return self._methods.items()
+
     def getOrigin(self):
         return self
 
@@ -1656,11 +1721,20 @@ class ParsedDebugInfo(object):
         self._encodings = {}  # Global encodings table (encodingId -> PrgmTypE)
         self._cu_namespaces = []  # Set of CompilationUnitNamespace objects.
         self._global_syms = GlobalScope(debugger)  # vars/methods tagged DW_AT_external visible from any CU.
+        self._dwarf_info = None
+        self._unparsed_count = 0  # Number of CUs in _cu_namespaces not yet parsed (lazy mode).
 
         self.int_size = debugger.get_arch_conf("int_size")
         self.addr_size = debugger.get_arch_conf("ret_addr_size")
         self._populateEncodings()  # Get base types in the encodings map.
 
+    def __setstate__(self, state):
+        # Restored from the debug info cache. The unpickled type graph refers to its own copy
+        # of the 'void' type.
+        self.__dict__.update(state)
+        global _VOID
+        _VOID = self._encodings[0]
+
     def types(self, prefix=None):
         """
         Iterator over all typedefs.
@@ -1677,6 +1751,7 @@ class ParsedDebugInfo(object):
             next_char = chr(ord(last_char) + 1)
             nextfix = prefix[0:-1] + next_char
 
+        self.parseAllCUs()
         for cuns in self._cu_namespaces:
             # Do a prefix search.
             #
@@ -1694,6 +1769,8 @@ class ParsedDebugInfo(object):
         if there is not one available.
         """
         for cuns in self._cu_namespaces:
+            if not cuns.is_parsed() and cuns.cu_contains_offset(offset):
+                self._parseCU(cuns)
             if cuns.has_addr_entry(offset):
                 return cuns.entry_by_addr(offset)
         return None
@@ -1705,6 +1782,7 @@ class ParsedDebugInfo(object):
         This can be a named type, a method, or a variable.
         This method returns a pair of (KIND, entry).
         """
+        self.parseCUsForPC(pc)
         pc_ranges = SortedList()
         search_cuns = None
         for cuns in self._cu_namespaces:
@@ -1740,7 +1818,8 @@ class ParsedDebugInfo(object):
         if typ:
             return (KIND_TYPE, typ)
 
-        # Also search globals if not found locally.
+        # Also search globals if not found locally. Any CU may define a global.
+        self.parseAllCUs()
         global_entry = self._global_syms.getVariable(name)
         if global_entry:
             return (KIND_VARIABLE, global_entry)
@@ -1769,6 +1848,7 @@ class ParsedDebugInfo(object):
 
         then getMethodsForPC($PC) will return ['inner2', 'inner1', 'outermost']
         """
+        self.parseCUsForPC(pc)
         pc_ranges = SortedList()
         for cuns in self._cu_namespaces:
             pc_ranges.update(cuns.get_ranges_for_pc(pc))
@@ -1792,6 +1872,7 @@ class ParsedDebugInfo(object):
 
         @return the enclosing scopes, sorted from widest to tightest.
         """
+        self.parseCUsForPC(pc)
         out = []
         used_set = set()
 
@@ -2586,14 +2667,36 @@ class ParsedDebugInfo(object):
 
 
 
-    def parseTypeInfo(self, dwarf_info):
+    def parseTypeInfo(self, dwarf_info, lazy=False):
+        """
+        Build a CompilationUnitNamespace for each compilation unit in .debug_info.
+
+        @param dwarf_info the DWARFInfo to load types, methods, and variables from.
+        @param lazy if False, parse the DIEs of every compilation unit now. If True, only index
+            the CUs and their $PC bounds; each CU's DIEs are parsed when a lookup first needs them.
+        """
+        self._dwarf_info = dwarf_info
         range_lists = dwarf_info.range_lists()
 
+        for compile_unit in dwarf_info.iter_CUs():
+            cuns = CompilationUnitNamespace(
+                compile_unit.cu_offset, compile_unit, range_lists,
+                self._debugger)
+            self._cu_namespaces.append(cuns)
+            self._unparsed_count += 1
+
+        if not lazy:
+            self.parseAllCUs()
+
+    def _parseCU(self, cuns):
+        """
+        Parse all the DIEs of a compilation unit into its namespace.
+        """
         context = {}
         context['debugger'] = self._debugger
         context['int_size'] = self.int_size
-        context['range_lists'] = range_lists
-        context['loc_lists'] = dwarf_info.location_lists()
+        context['range_lists'] = self._dwarf_info.range_lists()
+        context['loc_lists'] = self._dwarf_info.location_lists()
         context['nesting'] = 0
         context['print_full_die'] = None
         context['active_namespace_scopes'] = []  # Namespaces that lexically enclose current definition
@@ -2601,14 +2704,98 @@ class ParsedDebugInfo(object):
 
         # TODO(aaron): If you add entries to context here, add to _default_context_keys.
 
-        for compile_unit in dwarf_info.iter_CUs():
-            context['dwarf_ver'] = compile_unit.header['version']
-            self._debugger.verboseprint(f'Parsing compile unit (0x{compile_unit.cu_offset:04x})')
+        compile_unit = cuns.getCU()
+        context['dwarf_ver'] = compile_unit.header['version']
+        self._debugger.verboseprint(f'Parsing compile unit (0x{compile_unit.cu_offset:04x})')
 
-            cuns = CompilationUnitNamespace(
-                compile_unit.cu_offset, compile_unit, range_lists,
-                self._debugger)
-            self._cu_namespaces.append(cuns)
-            self.parseTypesFromDIE(compile_unit.get_top_DIE(), cuns, context)
+        cuns.set_parsed()  # Mark first; lookups made while parsing must not re-enter this CU.
+        self._unparsed_count -= 1
+        self.parseTypesFromDIE(compile_unit.get_top_DIE(), cuns, context)
+
+    def parseSingleCU(self, dwarf_info, cu_offset):
+        """
+        Parse the compilation unit at `cu_offset` in `dwarf_info`, on its own, into this empty
+        ParsedDebugInfo (e.g. in a worker process; see debuginfo_workers). Global variables and
+        methods it defines are added to getGlobalScope().
+
+        @return the parsed CompilationUnitNamespace, for mergeParsedCU().
+        """
+        assert len(self._cu_namespaces) == 0
+        self._dwarf_info = dwarf_info
+        cuns = CompilationUnitNamespace(cu_offset, dwarf_info.get_CU_at(cu_offset),
+                                        dwarf_info.range_lists(), self._debugger)
+        self._cu_namespaces.append(cuns)
+        self._unparsed_count += 1
+        self._parseCU(cuns)
+        return cuns
+
+    def mergeParsedCU(self, cuns, parsed_cuns, global_vars, global_methods):
+        """
+        Replace the unparsed namespace `cuns` with `parsed_cuns`, returned by parseSingleCU() in
+        another ParsedDebugInfo, and add the global variables and methods it defined.
+        """
+        idx = self._cu_namespaces.index(cuns)
+        self._cu_namespaces[idx] = parsed_cuns
+        self._unparsed_count -= 1
+        for var in global_vars:
+            self._global_syms.addVariable(var)
+        for method in global_methods:
+            self._global_syms.addMethod(method)
+
+    def getGlobalScope(self):
+        """
+        Return the GlobalScope of the variables and methods visible from any compilation unit.
+        """
+        return self._global_syms
+
+    def getEncodings(self):
+        """
+        Return the map from DWARF base type encoding to PrgmType (e.g. 'void').
+        """
+        return self._encodings
+
+    def getDwarfInfo(self):
+        """
+        Return the DWARFInfo the types were read from.
+        """
+        return self._dwarf_info
 
+    def parseAllCUs(self):
+        """
+        Ensure the DIEs of every compilation unit have been parsed.
+
+        If dbg.debuginfo.workers is greater than 1, parse them in that many worker processes.
+        """
+        if self._unparsed_count == 0:
+            return
+
+        num_workers = self._debugger.get_conf('dbg.debuginfo.workers') or 1
+        unparsed = [cuns for cuns in self._cu_namespaces if not cuns.is_parsed()]
+        if num_workers > 1 and len(unparsed) > 1:
+            try:
+                debuginfo_workers.parse_cus(self._debugger, self, unparsed, min(num_workers, len(unparsed)))
+            except Exception as e:
+                # Finish up in this process below.
+                self._debugger.msg_q(term.WARN, f'Could not parse debug info in worker processes: {e}')
+
+        for cuns in self._cu_namespaces:
+            if not cuns.is_parsed():
+                self._parseCU(cuns)
+
+    def parseCUsForPC(self, pc):
+        """
+        Ensure the DIEs of every compilation unit that may hold $PC have been parsed.
+        """
+        if self._unparsed_count == 0:
+            return
+
+        for cuns in self._cu_namespaces:
+            if not cuns.is_parsed() and cuns.cu_contains_pc(pc):
+                self._parseCU(cuns)
+
+    def is_fully_parsed(self):
+        """
+        Return True if every compilation unit has been parsed.
+        """
+        return self._unparsed_count == 0
 
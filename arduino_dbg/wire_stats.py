@@ -0,0 +1,239 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Counters for the traffic between the Debugger and the debug service on the device.
+
+Each command sent over the connection is recorded with the bytes it took in each direction and
+its latency: the time from writing the command to reading the end of its response. Commands
+are tallied by opcode, and by the REPL command (e.g. `backtrace`) that caused them to be sent.
+"""
+
+import threading
+
+import arduino_dbg.protocol as protocol
+
+# Upper bounds (in milliseconds) of the latency histogram buckets. A final bucket holds any
+# command slower than the last bound.
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+NO_COMMAND = '(none)'  # Attribution for commands sent outside of any REPL command.
+
+# Map from opcode to its name in the protocol module, e.g. '@' => 'RAMADDR'.
+_OP_NAMES = dict([(getattr(protocol, name), name[len('DBG_OP_'):])
+                  for name in dir(protocol) if name.startswith('DBG_OP_') and name != 'DBG_OP_NONE'])
+
+
+def op_name(opcode):
+    """
+    Return a printable label for an opcode, e.g. '@ RAMADDR'.
+    """
+    name = _OP_NAMES.get(opcode)
+    if name is None:
+        return opcode
+    return f'{opcode} {name}'
+
+
+def _fmt_ms(bucket_idx):
+    if bucket_idx < len(LATENCY_BUCKETS_MS):
+        return f'<={LATENCY_BUCKETS_MS[bucket_idx]:g}'
+    return f'>{LATENCY_BUCKETS_MS[-1]:g}'
+
+
+class OpStats(object):
+    """
+    Count, byte totals and latency histogram for one opcode.
+    """
+
+    __slots__ = ['count', 'bytes_sent', 'bytes_recv', 'total_time', 'max_time', 'buckets']
+
+    def __init__(self):
+        self.count = 0
+        self.bytes_sent = 0
+        self.bytes_recv = 0
+        self.total_time = 0.0  # seconds
+        self.max_time = 0.0    # seconds
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, bytes_sent, bytes_recv, elapsed):
+        self.count += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_recv += bytes_recv
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+        elapsed_ms = elapsed * 1000.0
+        idx = 0
+        while idx < len(LATENCY_BUCKETS_MS) and elapsed_ms > LATENCY_BUCKETS_MS[idx]:
+            idx += 1
+        self.buckets[idx] += 1
+
+    def mean_time(self):
+        """ Return the mean latency in seconds. """
+        if self.count == 0:
+            return 0.0
+        return self.total_time / self.count
+
+    def percentile_bucket(self, pct):
+        """
+        Return the index of the histogram bucket that holds the `pct`th percentile latency.
+        """
+        target = self.count * pct / 100.0
+        seen = 0
+        for (idx, n) in enumerate(self.buckets):
+            seen += n
+            if n > 0 and seen >= target:
+                return idx
+        return len(self.buckets) - 1
+
+
+class CommandStats(object):
+    """
+    Totals for the wire traffic caused by one REPL command (over one or more runs of it).
+    """
+
+    __slots__ = ['name', 'runs', 'ops', 'bytes_sent', 'bytes_recv', 'wire_time', 'op_counts']
+
+    def __init__(self, name):
+        self.name = name
+        self.runs = 0
+        self.ops = 0
+        self.bytes_sent = 0
+        self.bytes_recv = 0
+        self.wire_time = 0.0  # seconds
+        self.op_counts = {}   # opcode => count
+
+    def add(self, opcode, bytes_sent, bytes_recv, elapsed):
+        self.ops += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_recv += bytes_recv
+        self.wire_time += elapsed
+        self.op_counts[opcode] = self.op_counts.get(opcode, 0) + 1
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.ops += other.ops
+        self.bytes_sent += other.bytes_sent
+        self.bytes_recv += other.bytes_recv
+        self.wire_time += other.wire_time
+        for (opcode, count) in other.op_counts.items():
+            self.op_counts[opcode] = self.op_counts.get(opcode, 0) + count
+
+    def summary(self):
+        """
+        Return a one-line description of this traffic.
+        """
+        by_op = sorted(self.op_counts.items(), key=lambda item: -item[1])
+        op_list = ", ".join([f"{opcode} x{count}" for (opcode, count) in by_op])
+        return (f'{self.name}: {self.ops} ops ({op_list}); {self.bytes_sent:,} bytes sent, '
+                f'{self.bytes_recv:,} received; {self.wire_time * 1000.0:.1f} ms on the wire')
+
+
+class WireStats(object):
+    """
+    Thread-safe collection of OpStats by opcode and CommandStats by REPL command.
+
+    The Debugger's connection listener thread calls record() for each command it completes.
+    The REPL brackets each command it runs with begin_command() and end_command() to attribute
+    that traffic to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None  # CommandStats for the REPL command running now.
+        self.reset()
+
+    def reset(self):
+        """ Discard all counts. A command in progress keeps counting from here. """
+        with self._lock:
+            self._ops = {}        # opcode => OpStats
+            self._commands = {}   # REPL command name => CommandStats
+            if self._current is not None:
+                self._current = CommandStats(self._current.name)
+                self._current.runs = 1
+
+    def begin_command(self, name):
+        """ Attribute the traffic from here until end_command() to the REPL command `name`. """
+        with self._lock:
+            self._current = CommandStats(name)
+            self._current.runs = 1
+
+    def end_command(self):
+        """
+        Stop attributing traffic to the current REPL command.
+
+        @return the CommandStats for this run of the command, or None if none was in progress.
+        """
+        with self._lock:
+            current = self._current
+            self._current = None
+            if current is not None:
+                self._commands.setdefault(current.name, CommandStats(current.name)).merge(current)
+            return current
+
+    def record(self, opcode, bytes_sent, bytes_recv, elapsed):
+        """
+        Record one command sent over the connection.
+
+        @param opcode the command's opcode, e.g. protocol.DBG_OP_RAMADDR.
+        @param bytes_sent the length of the command.
+        @param bytes_recv the length of all data read in response to the command.
+        @param elapsed seconds from sending the command to reading its full response.
+        """
+        with self._lock:
+            self._ops.setdefault(opcode, OpStats()).add(bytes_sent, bytes_recv, elapsed)
+            if self._current is not None:
+                self._current.add(opcode, bytes_sent, bytes_recv, elapsed)
+            else:
+                self._commands.setdefault(NO_COMMAND, CommandStats(NO_COMMAND)).add(
+                    opcode, bytes_sent, bytes_recv, elapsed)
+
+    def get_op_stats(self):
+        """ Return a dict from opcode to OpStats. """
+        with self._lock:
+            return dict(self._ops)
+
+    def get_command_stats(self):
+        """ Return a dict from REPL command name to CommandStats. """
+        with self._lock:
+            return dict(self._commands)
+
+    def report(self, histograms=False):
+        """
+        Return a list of lines that tabulate the counts by opcode and by REPL command.
+
+        @param histograms if True, follow the tables with the latency histogram of each opcode.
+        """
+        ops = self.get_op_stats()
+        commands = self.get_command_stats()
+        if len(ops) == 0:
+            return ['No commands sent to the device.']
+
+        lines = []
+        lines.append(f'{"Opcode":<16} {"Count":>7} {"Sent":>9} {"Recv":>9} {"Mean ms":>8} '
+                     f'{"p50 ms":>7} {"p90 ms":>7} {"Max ms":>8}')
+        for (opcode, stats) in sorted(ops.items(), key=lambda item: -item[1].total_time):
+            lines.append(f'{op_name(opcode):<16} {stats.count:>7} {stats.bytes_sent:>9} '
+                         f'{stats.bytes_recv:>9} {stats.mean_time() * 1000.0:>8.2f} '
+                         f'{_fmt_ms(stats.percentile_bucket(50)):>7} '
+                         f'{_fmt_ms(stats.percentile_bucket(90)):>7} {stats.max_time * 1000.0:>8.2f}')
+
+        lines.append('')
+        lines.append(f'{"Command":<16} {"Runs":>7} {"Ops":>7} {"Sent":>9} {"Recv":>9} {"Wire ms":>9}')
+        for (name, stats) in sorted(commands.items(), key=lambda item: -item[1].wire_time):
+            if stats.ops == 0:
+                continue
+            lines.append(f'{name:<16} {stats.runs:>7} {stats.ops:>7} {stats.bytes_sent:>9} '
+                         f'{stats.bytes_recv:>9} {stats.wire_time * 1000.0:>9.1f}')
+
+        if histograms:
+            for (opcode, stats) in sorted(ops.items()):
+                lines.append('')
+                lines.append(f'Latency of {op_name(opcode)} ({stats.count} commands):')
+                most = max(stats.buckets)
+                for (idx, n) in enumerate(stats.buckets):
+                    if n == 0:
+                        continue
+                    bar = '#' * max(1, n * 40 // most)
+                    lines.append(f'  {_fmt_ms(idx):>7} ms {n:>7}  {bar}')
+
+        return lines
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Measure backtrace latency and the cost of resolving each frame's source line.
+
+Compares resolving frame $PCs to source lines with one addr2line process per frame (the old
+binutils.pc_to_source_line()) against the in-process .debug_line table behind
+Debugger.source_line_for_pc().
+
+    PYTHONPATH=. python3 benchmarks/bench_backtrace.py
+"""
+
+import bench_common
+
+import arduino_dbg.binutils as binutils
+
+DUMP_FILE = 'get_byte.dump'
+BACKTRACES = 20
+
+
+def main():
+    with bench_common.DumpSession(DUMP_FILE) as debugger:
+        frames = debugger.get_backtrace()
+        pcs = [frame.addr for frame in frames]
+        print(f'Backtrace has {len(pcs)} frames.')
+
+        (_, elapsed) = bench_common.timed(lambda: [binutils.pc_to_source_line(debugger.elf_name, pc)
+                                                   for pc in pcs])
+        bench_common.report('addr2line per frame', len(pcs), 'frames', elapsed)
+
+        # Discard the line table built during the backtrace above, to time the first call.
+        debugger._line_table = None
+        (_, elapsed) = bench_common.timed(lambda: [debugger.source_line_for_pc(pc) for pc in pcs])
+        bench_common.report('source_line_for_pc() (first call)', len(pcs), 'frames', elapsed)
+
+        (_, elapsed) = bench_common.timed(lambda: [debugger.source_line_for_pc(pc) for pc in pcs],
+                                          repeat=BACKTRACES)
+        bench_common.report('source_line_for_pc() (decoded)', len(pcs) * BACKTRACES, 'frames', elapsed)
+
+        def backtrace():
+            debugger.clear_frame_cache()
+            return debugger.get_backtrace()
+
+        (_, elapsed) = bench_common.timed(backtrace, repeat=BACKTRACES)
+        bench_common.report('get_backtrace()', BACKTRACES, 'backtraces', elapsed)
+
+
+if __name__ == "__main__":
+    main()
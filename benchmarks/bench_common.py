@@ -0,0 +1,187 @@
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Shared fixture setup and reporting for arduino-dbg benchmarks.
+
+Benchmarks are standalone scripts that load one of the dump files in test/fixtures and time
+an operation against it. Run a benchmark from the repository root, e.g.:
+
+    PYTHONPATH=. python3 benchmarks/bench_flash_read.py
+"""
+
+import os
+import time
+
+import arduino_dbg.binutils as binutils
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.emulator as emulator
+import arduino_dbg.term as term
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test', 'fixtures')
+
+
+def fixture_path(name):
+    """
+    Return the path to the named file in test/fixtures.
+    """
+    return os.path.normpath(os.path.join(FIXTURES_DIR, name))
+
+
+class _Session(object):
+    """
+    Base for the context managers below: each sets up a Debugger (with a NullPrinter and the
+    demangler threads) on entry and tears it all down on exit.
+
+    Subclasses implement _open(), which returns the Debugger, and _close().
+    """
+
+    def __init__(self, config=None):
+        self._config = {
+            'dbg.verbose': False,
+            'dbg.colors': False,
+            'dbg.debuginfo.cachedir': None,
+        }
+        if config:
+            self._config.update(config)
+
+        self._printer = None
+        self._debugger = None
+
+    def _open(self):
+        raise NotImplementedError()
+
+    def _close(self):
+        raise NotImplementedError()
+
+    def __enter__(self):
+        self._printer = term.NullPrinter()
+        self._printer.start()
+        binutils.start_demangle_threads(self._printer.print_q)
+        try:
+            self._debugger = self._open()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self._debugger
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._close()
+        finally:
+            self._printer.shutdown()
+            binutils.close_demangle_threads()
+        return False
+
+
+class DumpSession(_Session):
+    """
+    Context manager that loads a dump file into a Debugger and tears it down on exit.
+
+        with DumpSession('get_byte.dump') as debugger:
+            ...
+    """
+
+    def __init__(self, dump_name, config=None):
+        super().__init__(config)
+        self._dump_name = dump_name
+        self._dbg_service = None
+
+    def _open(self):
+        (debugger, self._dbg_service) = dump.load_dump(
+            fixture_path(self._dump_name), self._printer.print_q, config=self._config)
+        return debugger
+
+    def _close(self):
+        if self._dbg_service:
+            self._dbg_service.shutdown()
+        if self._debugger:
+            self._debugger.release_cmd_lock()
+            self._debugger.close()
+
+
+class EmulatorSession(_Session):
+    """
+    Context manager that serves a dump file from a DeviceEmulator, paced like a serial link at
+    `baud` with `turnaround` seconds per command, and connects a Debugger to it through a
+    SerialConn. Both are torn down on exit.
+
+        with EmulatorSession('get_byte.dump', baud=115200) as debugger:
+            ...
+    """
+
+    def __init__(self, dump_name, baud=emulator.DEFAULT_BAUD, turnaround=emulator.DEFAULT_TURNAROUND,
+                 config=None):
+        super().__init__(config)
+        self._dump_name = dump_name
+        self._baud = baud
+        self._turnaround = turnaround
+        self._emulator = None
+
+    def _open(self):
+        self._emulator = emulator.DeviceEmulator(
+            fixture_path(self._dump_name), self._printer.print_q, baud=self._baud,
+            turnaround=self._turnaround, config=self._config)
+        return dbg.Debugger(
+            self._emulator.elf_name, None, self._printer.print_q,
+            arduino_platform=self._emulator.platform, force_config=self._config, is_locked=True,
+            port=self._emulator.port, baud=self._baud)
+
+    def _close(self):
+        if self._debugger:
+            self._debugger.release_cmd_lock()
+            self._debugger.close()
+        if self._emulator:
+            self._emulator.shutdown()
+
+
+class ElfSession(_Session):
+    """
+    Context manager that loads an ELF file (without any device connection or dump) into a
+    Debugger for the specified Arduino platform, and tears it down on exit.
+    """
+
+    def __init__(self, elf_name, platform, config=None):
+        super().__init__(config)
+        self._elf_name = elf_name
+        self._platform = platform
+
+    def _open(self):
+        return dbg.Debugger(fixture_path(self._elf_name), None, self._printer.print_q,
+                            arduino_platform=self._platform, force_config=self._config)
+
+    def _close(self):
+        if self._debugger:
+            self._debugger.close()
+
+
+def listen_to_running(debugger, timeout=1.0):
+    """
+    Have `debugger` treat its device as running, and hand the cmd lock (which the caller must
+    hold) to the connection listener, as after a `continue`. The caller can then time taking the
+    lock back with get_cmd_lock().
+
+    (The devices served from dumps are always paused; this only changes the Debugger's view.)
+    """
+    debugger.set_process_state(dbg.ProcessState.RUNNING)
+    if not debugger.release_cmd_lock_to_listener(timeout):
+        raise Exception('The connection listener did not take the cmd lock')
+
+
+def timed(fn, repeat=1):
+    """
+    Call fn() `repeat` times; return (last result, elapsed seconds).
+    """
+    result = None
+    start = time.perf_counter()
+    for _ in range(0, repeat):
+        result = fn()
+    return (result, time.perf_counter() - start)
+
+
+def report(name, amount, unit, elapsed):
+    """
+    Print a one-line throughput summary for `amount` units processed in `elapsed` seconds.
+    """
+    rate = amount / elapsed if elapsed > 0 else float('inf')
+    print(f'{name:<40} {amount:>10} {unit} in {elapsed:8.4f}s  ({rate:,.0f} {unit}/s)')
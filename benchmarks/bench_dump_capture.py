@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Compare the time and file size of full, sparse and minidump captures.
+
+Loads the 192KB SAMD51 RAM image in test/fixtures/cortex-m4-img.dump and captures it again
+over the wire from the hosted debug service (the in-process backend is detached so each RAM
+block is a round trip, as with a device): in full, skipping the unused RAM between the heap
+and the stack, and as a minidump of only the stack, globals and the memory they point to.
+
+    PYTHONPATH=. python3 benchmarks/bench_dump_capture.py
+"""
+
+import os
+import tempfile
+
+import bench_common
+
+import arduino_dbg.dump as dump
+
+DUMP_FILE = 'cortex-m4-img.dump'
+
+
+def main():
+    with bench_common.DumpSession(DUMP_FILE) as debugger, tempfile.TemporaryDirectory() as tmpdir:
+        memstats = debugger.get_memstats()
+        ram_len = memstats['RAMEND'] - memstats['RAMSTART'] + 1
+        print(f'RAM: {ram_len} bytes; heap top 0x{memstats["HeapEnd"]:x}; $SP 0x{memstats["SP"]:x}')
+
+        backend = debugger.get_backend()
+        debugger.set_backend(None)
+        try:
+            for mode in dump.DUMP_MODES:
+                filename = os.path.join(tmpdir, f'{mode}.dump')
+                (_, elapsed) = bench_common.timed(lambda: dump.capture_dump(debugger, filename, mode=mode))
+                bench_common.report(f'capture_dump() ({mode})', 1, 'captures', elapsed)
+                print(f'{mode} dump file: {os.path.getsize(filename)} bytes')
+        finally:
+            debugger.set_backend(backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Compare the size and load time of a dump file in the v1 text format and the binary format.
+
+Converts the 192KB SAMD51 RAM image in test/fixtures/cortex-m4-img.dump to the binary
+format, then times reading each file back with dump.read_dump_file().
+
+    PYTHONPATH=. python3 benchmarks/bench_dump_load.py
+"""
+
+import os
+import queue
+import tempfile
+
+import bench_common
+
+import arduino_dbg.dump as dump
+
+DUMP_FILE = 'cortex-m4-img.dump'
+LOADS = 20
+
+
+def main():
+    print_q = queue.Queue()
+    v1_filename = bench_common.fixture_path(DUMP_FILE)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        v2_filename = os.path.join(tmpdir, DUMP_FILE)
+        dump.write_dump_file(v2_filename, dump.read_dump_file(print_q, v1_filename))
+
+        ram_len = len(dump.read_dump_file(print_q, v1_filename)['ram_image'])
+        print(f'RAM image: {ram_len} bytes')
+        for (name, filename) in [('v1 text', v1_filename), ('binary', v2_filename)]:
+            print(f'{name} dump file: {os.path.getsize(filename)} bytes')
+            (_, elapsed) = bench_common.timed(lambda: dump.read_dump_file(print_q, filename), repeat=LOADS)
+            bench_common.report(f'read_dump_file() ({name})', LOADS, 'loads', elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Measure flash-read throughput in dump mode.
+
+Flash reads in dump mode are served from the ELF memory image by Debugger.get_image_bytes().
+This reports throughput for direct image lookups, and for Debugger.get_flash() both through
+the in-process dump backend and over the wire to the hosted debug service.
+
+    PYTHONPATH=. python3 benchmarks/bench_flash_read.py
+"""
+
+import bench_common
+
+DUMP_FILE = 'get_byte.dump'
+WORD_LEN = 2
+DIRECT_READS = 200000
+SERVICE_READS = 5000
+
+
+def main():
+    with bench_common.DumpSession(DUMP_FILE) as debugger:
+        text = debugger.get_section('.text')
+        start = text['addr']
+        span = text['size'] - WORD_LEN
+        addrs = [start + (i * 37) % span for i in range(0, DIRECT_READS)]
+
+        def direct_reads():
+            for addr in addrs:
+                debugger.get_image_bytes(addr, WORD_LEN)
+
+        (_, elapsed) = bench_common.timed(direct_reads)
+        bench_common.report('get_image_bytes() word reads', DIRECT_READS, 'reads', elapsed)
+
+        def service_reads():
+            for addr in addrs[0:SERVICE_READS]:
+                debugger.get_flash(addr, WORD_LEN)
+
+        (_, elapsed) = bench_common.timed(service_reads)
+        bench_common.report('get_flash() word reads', SERVICE_READS, 'reads', elapsed)
+
+        backend = debugger.get_backend()
+        debugger.set_backend(None)
+        (_, elapsed) = bench_common.timed(service_reads)
+        debugger.set_backend(backend)
+        bench_common.report('get_flash() word reads (wire)', SERVICE_READS, 'reads', elapsed)
+
+
+if __name__ == "__main__":
+    main()
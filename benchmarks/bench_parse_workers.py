@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Measure the time to parse all .debug_info compilation units of an ELF file, in-process and
+with different numbers of worker processes (dbg.debuginfo.workers).
+
+    PYTHONPATH=. python3 benchmarks/bench_parse_workers.py [max_workers]
+"""
+
+import os
+import sys
+
+import bench_common
+
+ELF_FILE = 'cortex-m4-test.elf'
+PLATFORM = 'feather_m4'
+
+
+def main(argv):
+    if len(argv) > 1:
+        max_workers = int(argv[1])
+    else:
+        max_workers = os.cpu_count() or 1
+
+    worker_counts = [1]
+    n = 2
+    while n <= max_workers:
+        worker_counts.append(n)
+        n *= 2
+
+    with bench_common.ElfSession(ELF_FILE, PLATFORM) as debugger:
+        print(f'{ELF_FILE}: {len(debugger.get_debug_info()._cu_namespaces)} compilation units')
+        baseline = None
+        for workers in worker_counts:
+            debugger.set_conf('dbg.debuginfo.workers', workers)
+            debugger.replace_elf_file(debugger.elf_name)  # Lazy load; indexes CUs only.
+
+            (_, elapsed) = bench_common.timed(debugger.get_debug_info().parseAllCUs)
+            if baseline is None:
+                baseline = elapsed
+            bench_common.report(f'parse all CUs, workers={workers}', 1, 'parse', elapsed)
+            print(f'{"":<40} speedup: {baseline / elapsed:0.2f}x')
+
+
+if __name__ == "__main__":
+    main(sys.argv)
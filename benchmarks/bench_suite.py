@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+End-to-end benchmark suite, with results in JSON for tracking across commits.
+
+Times the main debugger operations on the dump files in test/fixtures: loading an ELF file
+(parsing all its debug info), loading a dump file, a backtrace, the locals of every frame,
+printing large structs, and capturing a dump. It also times taking the cmd lock from the
+connection listener while it listens to a running device, alone and followed by a break (the
+first command after `continue`). Operations on a paused device run in one of
+three modes:
+
+    local     reads served in-process by the dump's backend (measures host-side CPU cost).
+    wire      every read sent over the connection to the hosted debug service.
+    emulator  a DeviceEmulator on a pty, paced at --baud with --turnaround per command, opened
+              through a SerialConn as a real board would be.
+
+Each case reports the best and mean time of --repeat runs, and the commands and bytes it sent
+over the connection. Caches are cleared before each run.
+
+    PYTHONPATH=. python3 benchmarks/bench_suite.py [--mode wire] [-o results.json]
+
+(or bin/bench-arduino-dbg)
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import bench_common
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.emulator as emulator
+import arduino_dbg.eval_location as el
+import arduino_dbg.types as types
+import arduino_dbg.version as version
+
+MODES = ['local', 'wire', 'emulator']
+
+AVR_DUMP = 'get_byte.dump'
+CORTEX_DUMP = 'cortex-m4-img.dump'
+
+# (ELF file, platform) to time loading of.
+ELF_FILES = [('fixture-0.elf', 'leonardo'), ('cortex-m4-test.elf', 'feather_m4')]
+
+# Large globals to print, in each dump.
+PRINT_SYMS = {
+    AVR_DUMP: ['_cdcInterface', 'linebuf'],
+    CORTEX_DUMP: ['Serial1', 'usbd'],
+}
+
+# Dump mode to capture each dump with. (A full capture of the 192KB SAMD51 RAM over an emulated
+# serial link would take minutes.)
+CAPTURE_MODES = {
+    AVR_DUMP: dump.DUMP_MODE_FULL,
+    CORTEX_DUMP: dump.DUMP_MODE_MINI,
+}
+
+
+def git_commit():
+    """
+    Return the commit hash of the working tree, or None if not available.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(results, name, fixture, fn, repeat, debugger=None, setup=None):
+    """
+    Time `repeat` calls of fn() and append the result to `results`.
+
+    @param debugger if not None, count the traffic it sends over its connection during the runs.
+    @param setup if not None, called before each run, outside of the timed region.
+    """
+    times = []
+    wire = None
+    if debugger is not None:
+        debugger.get_wire_stats().reset()
+    for _ in range(0, repeat):
+        if setup is not None:
+            setup()
+        (_, elapsed) = bench_common.timed(fn)
+        times.append(elapsed)
+
+    if debugger is not None:
+        ops = debugger.get_wire_stats().get_op_stats().values()
+        wire = {
+            'cmds': sum([op.count for op in ops]) // repeat,
+            'bytes_sent': sum([op.bytes_sent for op in ops]) // repeat,
+            'bytes_recv': sum([op.bytes_recv for op in ops]) // repeat,
+        }
+
+    result = {
+        'name': name,
+        'fixture': fixture,
+        'best': round(min(times), 6),
+        'mean': round(statistics.mean(times), 6),
+        'repeat': repeat,
+    }
+    if wire is not None:
+        result['wire'] = wire
+    results.append(result)
+    print(f'{name:<24} {fixture:<22} best {min(times):8.4f}s  mean {statistics.mean(times):8.4f}s'
+          + (f'  {wire["cmds"]:>6} cmds' if wire else ''), file=sys.stderr)
+
+
+def open_session(dump_name, args):
+    if args.mode == 'emulator':
+        return bench_common.EmulatorSession(dump_name, baud=args.baud, turnaround=args.turnaround / 1000.0)
+    return bench_common.DumpSession(dump_name)
+
+
+def load_elf(elf_name, platform_name):
+    with bench_common.ElfSession(elf_name, platform_name, config={'dbg.debuginfo.lazy': False}):
+        pass
+
+
+def load_dump(dump_name):
+    with bench_common.DumpSession(dump_name):
+        pass
+
+
+def all_locals(debugger):
+    """
+    Evaluate the formal args and locals of every frame in the backtrace.
+
+    @return the number of values that could not be evaluated.
+    """
+    errors = 0
+    frames = debugger.get_backtrace()
+    for frame_num in range(0, len(frames)):
+        frame_regs = debugger.get_frame_regs(frame_num)
+        for scope in debugger.get_frame_vars(frame_num) or []:
+            variables = list(scope.getFormals()) + [var for (_, var) in scope.getVariables()]
+            for var in variables:
+                try:
+                    var.getValue(frame_regs, frames[frame_num])
+                except Exception:
+                    errors += 1  # As in `locals`, a value we can't evaluate doesn't stop the rest.
+    return errors
+
+
+def break_from_running(debugger):
+    """
+    Take the cmd lock from the listener and interrupt the device.
+    """
+    debugger.get_cmd_lock()
+    debugger.send_break()
+
+
+def print_sym(debugger, name):
+    """
+    Read and format a global variable, as the `print` command does.
+    """
+    sym = debugger.lookup_sym(name)
+    val_type = sym.type_info.var_type if isinstance(sym.type_info, types.VariableInfo) else sym.type_info
+    (val, _) = el.Memory(debugger).access_address(sym.addr, val_type, is_flat_address=True)
+    return el.format_accessed_val(val, sym.type_info)
+
+
+def session_cases(results, dump_name, args, tmpdir):
+    with open_session(dump_name, args) as debugger:
+        backend = debugger.get_backend()
+        if args.mode == 'wire':
+            debugger.set_backend(None)
+
+        def clear_caches():
+            debugger.clear_frame_cache()
+            debugger.clear_mem_cache()
+
+        try:
+            run_case(results, 'lock handoff', dump_name, debugger.get_cmd_lock, args.repeat,
+                     debugger, lambda: bench_common.listen_to_running(debugger))
+            debugger.send_break()
+            run_case(results, 'break from running', dump_name, lambda: break_from_running(debugger),
+                     args.repeat, debugger, lambda: bench_common.listen_to_running(debugger))
+
+            run_case(results, 'backtrace', dump_name, debugger.get_backtrace, args.repeat,
+                     debugger, clear_caches)
+            run_case(results, 'locals', dump_name, lambda: all_locals(debugger), args.repeat,
+                     debugger, clear_caches)
+            for sym_name in PRINT_SYMS[dump_name]:
+                run_case(results, f'print {sym_name}', dump_name, lambda: print_sym(debugger, sym_name),
+                         args.repeat, debugger, clear_caches)
+
+            capture_mode = CAPTURE_MODES[dump_name]
+            filename = os.path.join(tmpdir, dump_name)
+            run_case(results, f'dump capture ({capture_mode})', dump_name,
+                     lambda: dump.capture_dump(debugger, filename, mode=capture_mode), args.repeat,
+                     debugger, clear_caches)
+        finally:
+            debugger.set_backend(backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="arduino-dbg benchmark suite")
+    parser.add_argument("--mode", choices=MODES, default='local',
+                        help="How the debugger reaches the device state (default: local)")
+    parser.add_argument("-b", "--baud", type=int, default=115200,
+                        help="Baud rate of the emulated serial link (emulator mode)")
+    parser.add_argument("-t", "--turnaround", type=float, default=emulator.DEFAULT_TURNAROUND * 1000.0,
+                        help="Device time per command in ms (emulator mode)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs of each case")
+    parser.add_argument("-o", "--output", metavar="json_file", help="Write results here, not stdout")
+    args = parser.parse_args()
+
+    results = []
+    for (elf_name, platform_name) in ELF_FILES:
+        run_case(results, 'elf load', elf_name, lambda: load_elf(elf_name, platform_name), args.repeat)
+    for dump_name in [AVR_DUMP, CORTEX_DUMP]:
+        run_case(results, 'dump load', dump_name, lambda: load_dump(dump_name), args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for dump_name in [AVR_DUMP, CORTEX_DUMP]:
+            session_cases(results, dump_name, args, tmpdir)
+
+    report = {
+        'version': version.DBG_VERSION_STR,
+        'commit': git_commit(),
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'mode': args.mode,
+        'results': results,
+    }
+    if args.mode == 'emulator':
+        report['baud'] = args.baud
+        report['turnaround_ms'] = args.turnaround
+    if args.mode != 'local':
+        report['protocol_version'] = dbg.HOST_MAX_PROTOCOL_VERSION
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
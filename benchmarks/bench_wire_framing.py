@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Compare bulk memory reads over the connection with text and with binary framed responses.
+
+Loads the 192KB SAMD51 RAM image in test/fixtures/cortex-m4-img.dump and reads all of RAM
+from the hosted debug service (with the in-process backend detached and the SRAM cache off),
+once with each response format. Reports the effective bytes/sec of memory read over the
+in-process pipe (which is limited by per-command overhead, not bandwidth), the bytes received
+on the connection per byte of memory, and the resulting effective bytes/sec of memory over a
+serial link at SERIAL_BAUD (8N1, so 10 bits per byte).
+
+    PYTHONPATH=. python3 benchmarks/bench_wire_framing.py
+"""
+
+import bench_common
+
+DUMP_FILE = 'cortex-m4-img.dump'
+REPEAT = 3
+SERIAL_BAUD = 115200
+
+
+def count_received(conn, counter):
+    """
+    Count the bytes `conn` receives in counter['bytes'].
+    """
+    real_read = conn.read
+    real_readline = conn.readline
+
+    def read(size):
+        data = real_read(size)
+        counter['bytes'] += len(data)
+        return data
+
+    def readline(*args, **kwargs):
+        data = real_readline(*args, **kwargs)
+        counter['bytes'] += len(data)
+        return data
+
+    conn.read = read
+    conn.readline = readline
+
+
+def main():
+    with bench_common.DumpSession(DUMP_FILE) as debugger:
+        ram_start = debugger.get_arch_conf('RAMSTART')
+        ram_len = debugger.get_arch_conf('RAMEND') - ram_start + 1
+
+        counter = {'bytes': 0}
+        count_received(debugger._conn, counter)
+
+        backend = debugger.get_backend()
+        debugger.set_backend(None)
+        debugger.set_conf('dbg.mem.cache', False)
+        try:
+            for framed in [False, True]:
+                debugger.set_conf('dbg.wire.framed', framed)
+                debugger.read_memory(ram_start, 64)  # Agree on the framing mode.
+                counter['bytes'] = 0
+
+                name = 'framed' if framed else 'text'
+                (_, elapsed) = bench_common.timed(lambda: debugger.read_memory(ram_start, ram_len), REPEAT)
+                bench_common.report(f'read_memory() ({name})', ram_len * REPEAT, 'bytes', elapsed)
+                wire_ratio = counter["bytes"] / (ram_len * REPEAT)
+                print(f'{name}: {wire_ratio:.2f} bytes received per byte of RAM; '
+                      f'{SERIAL_BAUD / 10 / wire_ratio:,.0f} bytes/s of RAM at {SERIAL_BAUD} baud')
+        finally:
+            debugger.set_backend(backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+"""
+Replay a recorded debugger session over simulated serial links.
+
+Records the wire traffic of a `backtrace` and `locals` session against the hosted debug
+service for test/fixtures/cortex-m4-img.dump (with the in-process backend detached, as with a
+device, and the SRAM cache off), then replays the recording to a fresh Debugger through a ReplayConn for each link
+profile in LINKS: a baud rate (8N1, so 10 bits per byte) and a per-command device turnaround
+time. This gives the time the same session would take on a board at that link speed, with
+the host-side cost of each command included.
+
+    PYTHONPATH=. python3 benchmarks/bench_wire_replay.py
+"""
+
+import os
+import tempfile
+
+import bench_common
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.io as io
+
+DUMP_FILE = 'cortex-m4-img.dump'
+
+# (name, baud, turnaround seconds)
+LINKS = [
+    ('instant', None, 0.0),
+    ('1Mbps, 0.2ms', 1000000, 0.0002),
+    ('115200, 1ms', 115200, 0.001),
+    ('57600, 2ms', 57600, 0.002),
+]
+
+
+def session(debugger):
+    """
+    The debugger operations to record and replay.
+    """
+    debugger.get_backtrace()
+    for frame_num in range(0, 2):
+        debugger.get_frame_vars(frame_num)
+
+
+def make_debugger(fixture, connection):
+    return dbg.Debugger(fixture.elf_name, connection, fixture.get_print_q(),
+                        arduino_platform=fixture.get_conf('arduino.platform'),
+                        force_config={'dbg.verbose': False, 'dbg.colors': False,
+                                      'dbg.debuginfo.cachedir': None,
+                                      # Parse debug info up front, not in the timed session.
+                                      'dbg.debuginfo.lazy': False,
+                                      # Send every memory read to the device.
+                                      'dbg.mem.cache': False},
+                        is_locked=True)
+
+
+def main():
+    with bench_common.DumpSession(DUMP_FILE) as fixture, tempfile.TemporaryDirectory() as tmpdir:
+        recording = os.path.join(tmpdir, 'session.wire')
+
+        (left, right) = io.make_bidi_pipe()
+        service = dump.HostedDebugService(fixture.get_backend(), fixture, right)
+        service.start()
+        recorder = make_debugger(fixture, io.RecordingConn(left, recording))
+        try:
+            (_, elapsed) = bench_common.timed(lambda: session(recorder))
+            stats = recorder.get_wire_stats().get_op_stats().values()
+        finally:
+            recorder.close()
+            service.shutdown()
+
+        n_cmds = sum([op.count for op in stats])
+        wire_bytes = sum([op.bytes_sent + op.bytes_recv for op in stats])
+        print(f'Recorded {n_cmds} commands, {wire_bytes} bytes on the wire, in {elapsed:.4f}s')
+
+        for (name, baud, turnaround) in LINKS:
+            byte_time = 10.0 / baud if baud else 0.0
+            replayer = make_debugger(
+                fixture, io.ReplayConn(recording, turnaround=turnaround, byte_time=byte_time))
+            try:
+                (_, elapsed) = bench_common.timed(lambda: session(replayer))
+            finally:
+                replayer.close()
+            bench_common.report(f'replay ({name})', n_cmds, 'cmds', elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,7 @@ class DbgTestCase(unittest.TestCase):
             'dbg.verbose': False,  # Don't spam terminal with debug output.
             'dbg.colors': False,   # Don't use VT100 colors on output.
             'dbg.internal.stack.frames': True,  # Show all stack frames.
+            'dbg.debuginfo.cachedir': None,  # Don't write debug info cache files into ~.
         }
 
         return config
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import asyncio
+import unittest
+
+import arduino_dbg.async_debugger as async_debugger
+import arduino_dbg.debugger as dbg
+import arduino_dbg.emulator as emulator
+import arduino_dbg.protocol as protocol
+from dbg_testcase import DbgTestCase
+
+
+class TestAsyncDebugger(DbgTestCase):
+    """
+    Tests the asyncio AsyncDebugger facade.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.ram_start = self.debugger.get_arch_conf("RAMSTART")
+        self.sync_results = (self.debugger.get_registers(), self.debugger.read_memory(self.ram_start, 64),
+                             [repr(frame) for frame in self.debugger.get_backtrace()])
+        self.debugger.release_cmd_lock()  # The AsyncDebugger's worker takes it for each call.
+
+    def tearDown(self):
+        self.debugger.get_cmd_lock()
+
+    def test_matches_sync(self):
+        adbg = async_debugger.AsyncDebugger(self.debugger)
+
+        async def session():
+            regs = await adbg.get_registers()
+            mem = await adbg.read_memory(self.ram_start, 64)
+            frames = await adbg.get_backtrace()
+            paused = await adbg.send_cmd(protocol.DBG_OP_BREAK, dbg.Debugger.RESULT_ONELINE)
+            return (regs, mem, [repr(frame) for frame in frames], paused)
+
+        (regs, mem, frames, paused) = asyncio.run(session())
+        self.assertEqual((regs, mem, frames), self.sync_results)
+        self.assertTrue(paused.startswith(protocol.DBG_PAUSE_MSG))
+
+    def test_concurrent_devices(self):
+        devices = [emulator.DeviceEmulator(self.getDumpFilename(), self.console_printer.print_q,
+                                           baud=115200, turnaround=0.002,
+                                           config=DbgTestCase.get_debug_config())
+                   for _ in range(0, 2)]
+        ticks = []
+
+        async def ticker(done):
+            while not done.is_set():
+                ticks.append(1)
+                await asyncio.sleep(0.005)
+
+        async def backtrace(device):
+            async with await async_debugger.open_serial(
+                    device.elf_name, device.port, self.console_printer.print_q, baud=115200,
+                    arduino_platform=device.platform,
+                    force_config=DbgTestCase.get_debug_config()) as adbg:
+                return [repr(frame) for frame in await adbg.get_backtrace()]
+
+        async def session():
+            done = asyncio.Event()
+            tick_task = asyncio.create_task(ticker(done))
+            try:
+                return await asyncio.gather(*[backtrace(device) for device in devices])
+            finally:
+                done.set()
+                await tick_task
+
+        try:
+            results = asyncio.run(session())
+        finally:
+            for device in devices:
+                device.shutdown()
+
+        self.assertEqual(results, [self.sync_results[2]] * 2)
+        self.assertGreater(len(ticks), 1)  # The event loop ran while the devices were read.
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
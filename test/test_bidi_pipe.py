@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import threading
+import time
+import unittest
+
+import arduino_dbg.io as io
+
+
+class TestBidiPipe(unittest.TestCase):
+
+    def setUp(self):
+        (self.left, self.right) = io.make_bidi_pipe()
+
+    def tearDown(self):
+        self.left.close()
+        self.right.close()
+
+    def test_lines(self):
+        """ Test that several lines in one write, and a line split across writes, are read back. """
+        self.left.write(b'one\ntwo\nthr')
+        self.left.write(b'ee\n')
+        self.assertEqual(self.right.readline(), b'one\n')
+        self.assertTrue(self.right.available())
+        self.assertEqual(self.right.readline(), b'two\n')
+        self.assertEqual(self.right.readline(), b'three\n')
+        self.assertFalse(self.right.available())
+
+    def test_long_line(self):
+        line = b'x' * 100000 + b'\n'
+
+        def send():
+            self.left.write(line)
+
+        sender = threading.Thread(target=send)
+        sender.start()
+        self.assertEqual(self.right.readline(), line)
+        sender.join()
+
+    def test_wakes_on_data(self):
+        """ Test that a blocked readline() returns as soon as the line arrives. """
+        def send():
+            time.sleep(0.02)
+            self.left.write(b'hello\n')
+
+        self.right.timeout = 5
+        sender = threading.Thread(target=send)
+        start = time.monotonic()
+        sender.start()
+        self.assertEqual(self.right.readline(), b'hello\n')
+        self.assertLess(time.monotonic() - start, 1)
+        sender.join()
+
+    def test_timeout(self):
+        """ Test that a readline() with no newline returns the partial line at timeout. """
+        self.left.write(b'partial')
+        self.assertEqual(self.right.readline(), b'partial')
+        self.assertEqual(self.right.readline(), b'')
+        self.assertFalse(self.right.at_eof())
+
+    def test_eof(self):
+        self.left.write(b'last\nbytes')
+        self.left.close()
+        self.assertEqual(self.right.readline(), b'last\n')
+        self.assertFalse(self.right.at_eof())
+        self.assertEqual(self.right.readline(), b'bytes')
+        self.assertTrue(self.right.at_eof())
+        self.assertEqual(self.right.readline(), b'')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import arduino_dbg.debuginfo_cache as debuginfo_cache
+from dbg_testcase import DbgTestCase
+
+
+class TestDebugInfoCache(DbgTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.orig_elf_name = self.debugger.elf_name
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.elf_copy = os.path.join(self.tmpdir, 'sketch.elf')
+        shutil.copyfile(self.orig_elf_name, self.elf_copy)
+        self.debugger.set_conf('dbg.debuginfo.cachedir', self.cache_dir)
+        self.debugger.set_conf('dbg.debuginfo.lazy', False)  # Cache the fully-parsed debug info.
+
+    def tearDown(self):
+        self.debugger.set_conf('dbg.debuginfo.cachedir', None)
+        self.debugger.set_conf('dbg.debuginfo.lazy', True)
+        self.debugger.replace_elf_file(self.orig_elf_name)
+        shutil.rmtree(self.tmpdir)
+
+    def _loaded_from_cache(self):
+        """ Cached type info refers to DIEs that have not yet been resolved. """
+        sym = self.debugger.lookup_sym('twi_init')
+        return isinstance(sym.type_info.__dict__['_die'], debuginfo_cache.DIERef)
+
+    def _cache_files(self):
+        return [f for f in os.listdir(self.cache_dir) if f.endswith(debuginfo_cache.CACHE_FILE_SUFFIX)]
+
+    def _frame_var_values(self, frame_num):
+        frame = self.debugger.get_backtrace(limit=frame_num + 1)[frame_num]
+        frame_regs = self.debugger.get_frame_regs(frame_num)
+        values = {}
+        for scope in self.debugger.get_frame_vars(frame_num):
+            for (varname, variable) in scope.getVariables():
+                values[varname] = variable.getValue(frame_regs, frame)[0]
+        return values
+
+    def test_reload_from_cache(self):
+        """ Test that a second load of an ELF file reads the cache with equivalent results. """
+        self.debugger.replace_elf_file(self.elf_copy)
+        self.assertFalse(self._loaded_from_cache())
+        self.assertEqual(len(self._cache_files()), 1)
+        backtrace = [repr(frame) for frame in self.debugger.get_backtrace()]
+        type_names = sorted([name for (name, typ) in self.debugger.get_debug_info().types()])
+        var_values = self._frame_var_values(2)
+
+        self.debugger.replace_elf_file(self.elf_copy)
+        self.assertTrue(self._loaded_from_cache())
+        self.assertEqual([repr(frame) for frame in self.debugger.get_backtrace()], backtrace)
+        self.assertEqual(sorted([name for (name, typ) in self.debugger.get_debug_info().types()]),
+                         type_names)
+        self.assertEqual(self._frame_var_values(2), var_values)
+
+        sym = self.debugger.lookup_sym('twi_init')
+        self.assertIsNotNone(sym.frame_info)
+        self.assertIs(self.debugger.function_sym_by_pc(sym.addr), sym)
+        self.assertEqual(sym.type_info.get_die().tag, 'DW_TAG_subprogram')
+
+    def test_mtime_change_reparses(self):
+        """ Test that a cache entry is not used if the ELF mtime differs. """
+        self.debugger.replace_elf_file(self.elf_copy)
+        st = os.stat(self.elf_copy)
+        os.utime(self.elf_copy, (st.st_atime, st.st_mtime + 10))
+
+        self.debugger.replace_elf_file(self.elf_copy)
+        self.assertFalse(self._loaded_from_cache())
+        self.debugger.replace_elf_file(self.elf_copy)  # Cache was rewritten with new mtime.
+        self.assertTrue(self._loaded_from_cache())
+
+    def test_corrupt_cache_file(self):
+        """ Test that an unreadable cache file is ignored and replaced. """
+        self.debugger.replace_elf_file(self.elf_copy)
+        cache_file = os.path.join(self.cache_dir, self._cache_files()[0])
+        with open(cache_file, 'wb') as f:
+            f.write(b'not a cache file')
+
+        self.debugger.replace_elf_file(self.elf_copy)
+        self.assertTrue(self.debugger.is_debug_info_loaded())
+        self.assertFalse(self._loaded_from_cache())
+        self.assertIsNotNone(self.debugger.lookup_sym('twi_init'))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
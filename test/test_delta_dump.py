@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+from dbg_testcase import DbgTestCase
+
+
+class TestDeltaDump(DbgTestCase):
+    """
+    Tests the CHECKSUM command and capturing a dump as a delta against an earlier dump.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.base_filename = os.path.join(self.tmpdir, 'base.dump')
+        self.delta_filename = os.path.join(self.tmpdir, 'delta.dump')
+        self.full_filename = os.path.join(self.tmpdir, 'full.dump')
+        self.changed_addr = self.debugger.get_arch_conf("RAMSTART") + 0x40
+        self.orig_byte = self.debugger.get_sram(self.changed_addr, 1)
+        self.orig_protocol_version = self.debugger._protocol_version
+        self.reads = []
+
+        dump.capture_dump(self.debugger, self.base_filename, mode=dump.DUMP_MODE_FULL)
+
+    def tearDown(self):
+        self.debugger.__dict__.pop('read_memory', None)
+        self.debugger._protocol_version = self.orig_protocol_version
+        self.debugger.set_sram(self.changed_addr, self.orig_byte, 1)
+        shutil.rmtree(self.tmpdir)
+
+    def _count_reads(self):
+        """ Record the (addr, length) of each read_memory() call in self.reads. """
+        real_read_memory = self.debugger.read_memory
+
+        def read_memory(addr, length):
+            self.reads.append((addr, length))
+            return real_read_memory(addr, length)
+
+        self.debugger.read_memory = read_memory
+
+    def _ram_image(self, filename):
+        return bytes(dump.read_dump_file(self.console_printer.print_q, filename)['ram_image'])
+
+    def _capture_delta(self):
+        """ Change a byte of RAM, then capture a delta and a full dump of the new state. """
+        self.debugger.set_sram(self.changed_addr, self.orig_byte ^ 0xFF, 1)
+        self._count_reads()
+        dump.capture_dump(self.debugger, self.delta_filename, mode=dump.DUMP_MODE_FULL,
+                          base_dump=self.base_filename)
+        self.debugger.__dict__.pop('read_memory', None)
+        dump.capture_dump(self.debugger, self.full_filename, mode=dump.DUMP_MODE_FULL)
+
+    def test_checksums(self):
+        ram_start = self.debugger.get_arch_conf("RAMSTART")
+        ranges = [(ram_start, 256), (ram_start + 3, 17), (ram_start + 256, 1)]
+        expected = [zlib.crc32(self.debugger.read_memory(addr, length)) for (addr, length) in ranges]
+        self.assertEqual(self.debugger.get_ram_checksums(ranges), expected)
+
+        backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        try:
+            # Sent to the HostedDebugService as CHECKSUM commands.
+            self.assertEqual(self.debugger.get_ram_checksums(ranges), expected)
+
+            self.debugger._protocol_version = 2
+            with self.assertRaises(dbg.UnsupportedDebuggerProtocolException):
+                self.debugger.get_ram_checksums(ranges)
+        finally:
+            self.debugger.set_backend(backend)
+
+    def test_delta_reads_changed_page(self):
+        self._capture_delta()
+        self.assertEqual(self._ram_image(self.delta_filename), self._ram_image(self.full_filename))
+
+        # Only the page holding the changed byte was read.
+        self.assertEqual(len(self.reads), 1)
+        (addr, length) = self.reads[0]
+        self.assertLessEqual(addr, self.changed_addr)
+        self.assertLess(self.changed_addr, addr + length)
+        self.assertLessEqual(length, dump.DUMP_DELTA_PAGE_SIZE)
+
+    def test_delta_over_wire(self):
+        backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        try:
+            self._capture_delta()
+        finally:
+            self.debugger.set_backend(backend)
+
+        self.assertEqual(self._ram_image(self.delta_filename), self._ram_image(self.full_filename))
+        self.assertEqual(len(self.reads), 1)
+
+    def test_delta_unsupported(self):
+        """ Test that a device without CHECKSUM support gets a full capture. """
+        backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        self.debugger._protocol_version = 2
+        try:
+            self._capture_delta()
+        finally:
+            self.debugger.set_backend(backend)
+
+        self.assertEqual(self._ram_image(self.delta_filename), self._ram_image(self.full_filename))
+        self.assertEqual(sum([length for (_, length) in self.reads]),
+                         len(self._ram_image(self.full_filename)) - self.debugger.get_arch_conf("general_regs"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.dump as dump
+from dbg_testcase import DbgTestCase
+
+
+class TestDumpBackend(DbgTestCase):
+    """
+    Tests that the in-process DumpImageBackend answers the same as the HostedDebugService does
+    over the wire.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.backend = self.debugger.get_backend()
+
+    def tearDown(self):
+        self.debugger.set_backend(self.backend)
+
+    def _direct_and_wire(self, fn):
+        """ Return the results of fn() with the backend, and without (over the wire). """
+        self.debugger.clear_frame_cache()
+        direct = fn()
+        self.debugger.set_backend(None)
+        try:
+            self.debugger.clear_frame_cache()
+            wire = fn()
+        finally:
+            self.debugger.set_backend(self.backend)
+        return (direct, wire)
+
+    def test_installed(self):
+        self.assertIsInstance(self.backend, dump.DumpImageBackend)
+
+    def test_registers(self):
+        (direct, wire) = self._direct_and_wire(self.debugger.get_registers)
+        self.assertEqual(direct, wire)
+        self.assertIn('SP', direct)
+
+    def test_memstats(self):
+        (direct, wire) = self._direct_and_wire(self.debugger.get_memstats)
+        self.assertEqual(direct, wire)
+
+    def test_memory_reads(self):
+        ram_start = self.debugger.get_arch_conf("RAMSTART")
+        ram_end = self.debugger.get_arch_conf("RAMEND")
+        text_addr = self.debugger.get_section('.text')['addr']
+
+        def reads():
+            return [
+                self.debugger.get_sram(ram_start + 0x20, 2),
+                self.debugger.get_sram(ram_start + 0x21, 4),
+                self.debugger.get_sram_multi([(ram_start, 1), (ram_start + 7, 2)]),
+                self.debugger.read_memory(ram_start + 0x10, 0x123),
+                self.debugger.read_memory(ram_end - 3, 8),  # Past end of RAM reads as zeros.
+                self.debugger.get_stack_sram(1, 2),
+                self.debugger.get_flash(text_addr + 0x40, 4),
+                self.debugger.get_gpio_value(3),
+            ]
+
+        (direct, wire) = self._direct_and_wire(reads)
+        self.assertEqual(direct, wire)
+
+    def test_backtrace(self):
+        def backtrace():
+            return [repr(frame) for frame in self.debugger.get_backtrace()]
+
+        (direct, wire) = self._direct_and_wire(backtrace)
+        self.assertEqual(direct, wire)
+
+    def test_set_sram(self):
+        addr = self.debugger.get_arch_conf("RAMSTART") + 0x30
+        orig = self.debugger.get_sram(addr, 2)
+        try:
+            self.debugger.set_sram(addr, 0x1234, 2)
+            (direct, wire) = self._direct_and_wire(lambda: self.debugger.get_sram(addr, 2))
+            self.assertEqual(direct, 0x1234)
+            self.assertEqual(wire, 0x1234)
+        finally:
+            self.debugger.set_sram(addr, orig, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.serialize as serialize
+from dbg_testcase import DbgTestCase
+
+
+class TestDumpFile(DbgTestCase):
+    """
+    Tests capturing a dump in the binary format and loading it back.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dump_filename = os.path.join(self.tmpdir, 'get_byte.dump')
+        self.reloaded = None
+        self.reloaded_service = None
+        # Capture the (2KB) RAM image in several blocks.
+        self.orig_block_size = dump.DUMP_CAPTURE_BLOCK_SIZE
+        dump.DUMP_CAPTURE_BLOCK_SIZE = 256
+
+    def tearDown(self):
+        dump.DUMP_CAPTURE_BLOCK_SIZE = self.orig_block_size
+        self._clear_faults()
+
+        if self.reloaded_service:
+            self.reloaded_service.shutdown()
+        if self.reloaded:
+            self.reloaded.release_cmd_lock()
+            self.reloaded.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _capture_and_reload(self):
+        dump.capture_dump(self.debugger, self.dump_filename)
+        (self.reloaded, self.reloaded_service) = dump.load_dump(
+            self.dump_filename, self.console_printer.print_q, config=DbgTestCase.get_debug_config())
+        return self.reloaded
+
+    def _clear_faults(self):
+        """ Remove any fault injection installed by _fail_reads(). """
+        for attr in ['read_memory', 'reconnect', 'is_open', 'get_registers']:
+            self.debugger.__dict__.pop(attr, None)
+
+    def _fail_reads(self, fail_at):
+        """
+        Make the debugger's memory reads raise DisconnectedException on the read calls whose
+        (0-based) numbers are in `fail_at`, and make the connection look closed until the next
+        reconnect(). Return a map that records the address of each read and a count of
+        reconnect() calls.
+        """
+        self._clear_faults()
+        real_read_memory = self.debugger.read_memory
+        real_is_open = self.debugger.is_open
+        calls = {'reads': [], 'reconnects': 0, 'closed': False}
+
+        def read_memory(addr, length):
+            calls['reads'].append(addr)
+            if len(calls['reads']) - 1 in fail_at:
+                calls['closed'] = True
+                raise dbg.DisconnectedException()
+            return real_read_memory(addr, length)
+
+        def reconnect():
+            calls['reconnects'] += 1
+            calls['closed'] = False
+            return True
+
+        self.debugger.read_memory = read_memory
+        self.debugger.reconnect = reconnect
+        self.debugger.is_open = lambda: not calls['closed'] and real_is_open()
+        return calls
+
+    def _reference_capture(self):
+        """ Capture a dump without interruption and return the file contents. """
+        ref_filename = os.path.join(self.tmpdir, 'reference.dump')
+        dump.capture_dump(self.debugger, ref_filename)
+        with open(ref_filename, 'rb') as f:
+            return f.read()
+
+    def _dump_contents(self):
+        with open(self.dump_filename, 'rb') as f:
+            return f.read()
+
+    def test_binary_format(self):
+        dump.capture_dump(self.debugger, self.dump_filename)
+        with open(self.dump_filename, 'rb') as f:
+            self.assertTrue(f.read().startswith(dump.DUMP_FILE_MAGIC))
+
+        dump_data = dump.read_dump_file(self.console_printer.print_q, self.dump_filename)
+        self.assertEqual(dump_data[dump.DUMP_SCHEMA_KEY], dump.DUMP_SCHEMA_VER)
+        self.assertIsInstance(dump_data['ram_image'], memoryview)
+
+        # The RAM image matches the v1 file it was captured from.
+        v1_data = serialize.load_config_file(self.console_printer.print_q, self.getDumpFilename(),
+                                             dump.SERIALIZED_STATE_KEY)
+        self.assertEqual(bytes(dump_data['ram_image']), v1_data['ram_image'])
+        for key in ['platform', 'arch', 'ram_image_start', 'registers']:
+            self.assertEqual(dump_data[key], v1_data[key], key)
+
+    def test_reload(self):
+        reloaded = self._capture_and_reload()
+        self.assertEqual(reloaded.get_registers(), self.debugger.get_registers())
+        ram_start = self.debugger.get_arch_conf("RAMSTART")
+        self.assertEqual(reloaded.read_memory(ram_start, 0x200), self.debugger.read_memory(ram_start, 0x200))
+
+        self.debugger.clear_frame_cache()
+        self.assertEqual([repr(frame) for frame in reloaded.get_backtrace()],
+                         [repr(frame) for frame in self.debugger.get_backtrace()])
+
+    def test_writes_do_not_change_file(self):
+        reloaded = self._capture_and_reload()
+        with open(self.dump_filename, 'rb') as f:
+            orig_contents = f.read()
+
+        addr = reloaded.get_arch_conf("RAMSTART") + 0x30
+        reloaded.set_sram(addr, 0x1234, 2)
+        self.assertEqual(reloaded.get_sram(addr, 2), 0x1234)
+        with open(self.dump_filename, 'rb') as f:
+            self.assertEqual(f.read(), orig_contents)
+
+    def test_truncated(self):
+        dump.capture_dump(self.debugger, self.dump_filename)
+        with open(self.dump_filename, 'r+b') as f:
+            f.truncate(dump.DUMP_PAGE_SIZE + 16)
+
+        with self.assertRaises(Exception):
+            dump.read_dump_file(self.console_printer.print_q, self.dump_filename)
+
+    def test_capture_reconnects(self):
+        """ Test that a capture reconnects after an I/O error and resumes where it failed. """
+        expected = self._reference_capture()
+        calls = self._fail_reads([2])
+        dump.capture_dump(self.debugger, self.dump_filename)
+
+        self.assertEqual(calls['reconnects'], 1)
+        self.assertEqual(calls['reads'][2], calls['reads'][3])  # Retried the failed block only.
+        self.assertEqual(self._dump_contents(), expected)
+        self.assertFalse(os.path.exists(self.dump_filename + dump.DUMP_CHECKPOINT_SUFFIX))
+
+    def test_state_changed_on_reconnect(self):
+        """ Test that a capture that cannot resume after reconnecting removes its partial dump. """
+        calls = self._fail_reads([3])
+        real_get_registers = self.debugger.get_registers
+        fail_reconnect = self.debugger.reconnect
+
+        def reconnect():
+            # The device came back somewhere else (e.g., it reset).
+            regs = real_get_registers()
+            regs['PC'] += 2
+            self.debugger.get_registers = lambda: regs
+            return fail_reconnect()
+
+        self.debugger.reconnect = reconnect
+        with self.assertRaises(dump.DumpStateChangedException):
+            dump.capture_dump(self.debugger, self.dump_filename)
+
+        self.assertEqual(calls['reconnects'], 1)
+        self.assertFalse(os.path.exists(self.dump_filename))
+        self.assertFalse(os.path.exists(self.dump_filename + dump.DUMP_CHECKPOINT_SUFFIX))
+
+    def test_resume_from_checkpoint(self):
+        """ Test that a failed capture can be resumed from its checkpoint. """
+        expected = self._reference_capture()
+        calls = self._fail_reads([3, 4])
+        with self.assertRaises(dbg.DisconnectedException):
+            dump.capture_dump(self.debugger, self.dump_filename)
+        self.assertTrue(os.path.exists(self.dump_filename + dump.DUMP_CHECKPOINT_SUFFIX))
+        failed_addr = calls['reads'][3]
+
+        calls = self._fail_reads([])
+        dump.capture_dump(self.debugger, self.dump_filename)
+        self.assertEqual(calls['reads'][0], failed_addr)  # Did not re-read completed blocks.
+        self.assertEqual(self._dump_contents(), expected)
+        self.assertFalse(os.path.exists(self.dump_filename + dump.DUMP_CHECKPOINT_SUFFIX))
+
+    def test_stale_checkpoint(self):
+        """ Test that a checkpoint for a different device state is not resumed. """
+        expected = self._reference_capture()
+        self._fail_reads([3, 4])
+        with self.assertRaises(dbg.DisconnectedException):
+            dump.capture_dump(self.debugger, self.dump_filename)
+
+        # Pretend the device moved on since the checkpoint was written.
+        ckpt_filename = self.dump_filename + dump.DUMP_CHECKPOINT_SUFFIX
+        with open(ckpt_filename, 'r') as f:
+            ckpt = json.load(f)
+        ckpt['capture']['registers']['PC'] += 2
+        with open(ckpt_filename, 'w') as f:
+            json.dump(ckpt, f)
+
+        calls = self._fail_reads([])
+        dump.capture_dump(self.debugger, self.dump_filename)
+        self.assertEqual(len(calls['reads']), len(set(calls['reads'])))
+        self.assertEqual(self._dump_contents(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
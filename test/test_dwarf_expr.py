@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+from elftools.dwarf.dwarf_expr import DWARFExprOp
+
+import arduino_dbg.eval_location as el
+from dbg_testcase import DbgTestCase
+
+
+class TestDwarfExpr(DbgTestCase):
+    """
+    Tests evaluating DWARF location expressions that read memory.
+    """
+
+    ADDR = 0x2000011c
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def _eval(self, opcodes):
+        regs = self.debugger.get_frame_regs(0)
+        (addrs, flags) = el.DWARFExprMachine(opcodes, regs, self.debugger).eval()
+        self.assertFalse(el.LookupFlags.has_errors(flags))
+        self.assertEqual(len(addrs), 1)
+        return addrs[0][0]
+
+    def test_deref(self):
+        addr_size = self.debugger.get_arch_conf('ret_addr_size')
+        opcodes = [DWARFExprOp(0x03, 'DW_OP_addr', [TestDwarfExpr.ADDR], 0),
+                   DWARFExprOp(0x06, 'DW_OP_deref', [], 5)]
+        self.assertEqual(self._eval(opcodes), self.debugger.get_sram(TestDwarfExpr.ADDR, addr_size))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+from dbg_testcase import DbgTestCase
+
+
+class TestElfImage(DbgTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint immediately before __user_setup().
+        return "fixtures/startup.dump"
+
+    def test_section_images_are_lazy(self):
+        """ Test that section images are not loaded until accessed. """
+        section = self.debugger.get_section('.debug_str')
+        self.assertNotIn('image', section)
+        image = section['image']
+        self.assertIsInstance(image, memoryview)
+        self.assertIn('image', section)
+        self.assertEqual(len(image), section['size'])
+
+    def test_section_image_matches_elf(self):
+        """ Test that the zero-copy section image holds the same data as pyelftools reports. """
+        section = self.debugger.get_section('.text')
+        self.assertEqual(section['image'], section['elf'].data()[0:section['size']])
+        self.assertTrue(section['image'].readonly)
+
+    def test_image_for_symbol(self):
+        """ Test that a method body is returned as a view of .text """
+        sym = self.debugger.lookup_sym('twi_init')
+        self.assertIsNotNone(sym)
+        body = self.debugger.image_for_symbol('twi_init')
+        self.assertIsInstance(body, memoryview)
+        self.assertEqual(len(body), sym.size)
+
+        text = self.debugger.get_section('.text')
+        start = sym.addr - text['addr']
+        self.assertEqual(body, text['elf'].data()[start:start + sym.size])
+
+    def test_get_image_bytes(self):
+        """ Test that flash reads are served from the section containing the address. """
+        text = self.debugger.get_section('.text')
+        text_data = text['elf'].data()
+        self.assertEqual(self.debugger.get_image_bytes(text['addr'], 4), text_data[0:4])
+        self.assertEqual(self.debugger.get_image_bytes(text['addr'] + 0x40, 16), text_data[0x40:0x50])
+
+        # Reads past the end of the last section are truncated.
+        last_addr = text['addr'] + text['size'] - 2
+        self.assertEqual(self.debugger.get_image_bytes(last_addr, 8), text_data[text['size'] - 2:text['size']])
+
+        # Addresses outside of any section return None.
+        self.assertIsNone(self.debugger.get_image_bytes(text['addr'] + text['size'], 2))
+        self.assertIsNone(self.debugger.get_image_bytes(0x7FFFFFFF, 2))
+
+    def test_get_image_bytes_spans_sections(self):
+        """ Test that a read continues into a section that immediately follows in memory. """
+        text = self.debugger.get_section('.text')
+        end_addr = text['addr'] + text['size']
+        following = {'name': '.following', 'addr': end_addr, 'size': 4, 'image': memoryview(b'\x01\x02\x03\x04')}
+
+        orig_addrs = self.debugger._image_section_addrs
+        orig_sections = self.debugger._image_sections
+        idx = orig_sections.index(text) + 1
+        self.debugger._image_section_addrs = orig_addrs[:idx] + [end_addr] + orig_addrs[idx:]
+        self.debugger._image_sections = orig_sections[:idx] + [following] + orig_sections[idx:]
+        try:
+            data = self.debugger.get_image_bytes(end_addr - 2, 4)
+            self.assertEqual(data, text['elf'].data()[text['size'] - 2:text['size']] + b'\x01\x02')
+            data = self.debugger.get_image_bytes(end_addr - 2, 10)
+            self.assertEqual(len(data), 6)  # Truncated at end of '.following'
+        finally:
+            self.debugger._image_section_addrs = orig_addrs
+            self.debugger._image_sections = orig_sections
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import time
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.emulator as emulator
+import arduino_dbg.protocol as protocol
+from dbg_testcase import DbgTestCase
+
+
+class TestEmulator(DbgTestCase):
+    """
+    Tests debugging a dump served by the DeviceEmulator over a pty, through a SerialConn.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.emulator = emulator.DeviceEmulator(
+            self.getDumpFilename(), self.console_printer.print_q, baud=115200, turnaround=0.005,
+            config=DbgTestCase.get_debug_config())
+        self.serial_dbg = dbg.Debugger(
+            self.emulator.elf_name, None, self.console_printer.print_q,
+            arduino_platform=self.emulator.platform, force_config=DbgTestCase.get_debug_config(),
+            is_locked=True, port=self.emulator.port, baud=115200)
+
+    def tearDown(self):
+        self.serial_dbg.close()
+        self.emulator.shutdown()
+
+    def test_matches_dump(self):
+        self.assertEqual(self.serial_dbg.get_registers(), self.debugger.get_registers())
+        self.assertEqual([repr(frame) for frame in self.serial_dbg.get_backtrace()],
+                         [repr(frame) for frame in self.debugger.get_backtrace()])
+
+    def test_turnaround(self):
+        self.serial_dbg.send_break()
+        start = time.monotonic()
+        for _ in range(0, 4):
+            self.serial_dbg.send_cmd(protocol.DBG_OP_BREAK, dbg.Debugger.RESULT_ONELINE)
+        self.assertGreaterEqual(time.monotonic() - start, 4 * 0.005)
+
+    def test_baud_mismatch(self):
+        self.serial_dbg.close()
+        self.serial_dbg = dbg.Debugger(
+            self.emulator.elf_name, None, self.console_printer.print_q,
+            arduino_platform=self.emulator.platform, force_config=DbgTestCase.get_debug_config(),
+            is_locked=True, port=self.emulator.port, baud=57600)
+        self.serial_dbg.set_conf('dbg.poll.retry', 2)
+        with self.assertRaises(dbg.DebuggerIOError):
+            self.serial_dbg.get_registers()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.debuginfo_cache as debuginfo_cache
+import arduino_dbg.types as types
+from dbg_testcase import DbgTestCase
+
+
+class TestLazyDebugInfo(DbgTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.debugger.set_conf('dbg.debuginfo.lazy', True)
+        self.debugger.replace_elf_file(self.debugger.elf_name)
+        self.debug_info = self.debugger.get_debug_info()
+
+    def tearDown(self):
+        self.debugger.set_conf('dbg.debuginfo.lazy', True)
+        self.debugger.set_conf('dbg.debuginfo.workers', 1)
+        self.debugger.replace_elf_file(self.debugger.elf_name)
+
+    def _parsed_cus(self):
+        return [cuns for cuns in self.debug_info._cu_namespaces if cuns.is_parsed()]
+
+    def _sym_bindings(self):
+        """ Return a map from symbol name to a description of its type binding. """
+        out = {}
+        for (name, sym) in self.debugger._symbols.items():
+            if sym.type_info is not None:
+                out[name] = (repr(sym.type_info), types.cu_order(sym.type_info))
+        return out
+
+    def test_load_parses_no_cus(self):
+        self.assertGreater(len(self.debug_info._cu_namespaces), 1)
+        self.assertEqual(len(self._parsed_cus()), 0)
+        self.assertFalse(self.debug_info.is_fully_parsed())
+
+    def test_backtrace_parses_some_cus(self):
+        frames = self.debugger.get_backtrace()
+        self.assertGreater(len(frames), 0)
+        self.assertGreater(len(self._parsed_cus()), 0)
+        self.assertLess(len(self._parsed_cus()), len(self.debug_info._cu_namespaces))
+
+    def test_lookup_function_sym(self):
+        sym = self.debugger.lookup_sym('twi_init')
+        self.assertIsInstance(sym.type_info, types.MethodInfo)
+        self.assertFalse(self.debug_info.is_fully_parsed())
+
+    def test_types_parses_all(self):
+        type_names = [name for (name, typ) in self.debug_info.types()]
+        self.assertIn('uint8_t', type_names)
+        self.assertTrue(self.debug_info.is_fully_parsed())
+
+    def test_matches_eager_parse(self):
+        """ Test that lazily parsing CUs out of order ends in the same state as an eager parse. """
+        self.debugger.set_conf('dbg.debuginfo.lazy', False)
+        self.debugger.replace_elf_file(self.debugger.elf_name)
+        eager_debug_info = self.debugger.get_debug_info()
+        self.assertTrue(eager_debug_info.is_fully_parsed())
+        eager_bindings = self._sym_bindings()
+        eager_globals = {name: types.cu_order(var) for (name, var) in eager_debug_info.getGlobalScope().getVariables()}
+        eager_backtrace = [repr(frame) for frame in self.debugger.get_backtrace()]
+
+        self.debugger.set_conf('dbg.debuginfo.lazy', True)
+        self.debugger.replace_elf_file(self.debugger.elf_name)
+        self.debug_info = self.debugger.get_debug_info()
+        self.assertEqual([repr(frame) for frame in self.debugger.get_backtrace()], eager_backtrace)
+
+        # Parse the remaining CUs in reverse order.
+        for cuns in reversed(self.debug_info._cu_namespaces):
+            if not cuns.is_parsed():
+                self.debug_info._parseCU(cuns)
+        self.assertTrue(self.debug_info.is_fully_parsed())
+
+        self.assertEqual(self._sym_bindings(), eager_bindings)
+        self.assertEqual({name: types.cu_order(var) for (name, var) in self.debug_info.getGlobalScope().getVariables()},
+                         eager_globals)
+
+    def test_merge_single_cu(self):
+        """ Test parsing one CU in a separate ParsedDebugInfo and merging it in, as the workers do. """
+        cuns = self.debug_info._cu_namespaces[0]
+        standalone = types.ParsedDebugInfo(self.debugger)
+        parsed_cuns = standalone.parseSingleCU(self.debug_info.getDwarfInfo(), cuns.getOffset())
+        self.assertTrue(parsed_cuns.is_parsed())
+        global_vars = [var for (_, var) in standalone.getGlobalScope().getVariables()]
+        global_methods = [method for (_, method) in standalone.getGlobalScope().getMethods()]
+        self.assertGreater(len(global_vars) + len(global_methods), 0)
+
+        self.debug_info.mergeParsedCU(cuns, parsed_cuns, global_vars, global_methods)
+        self.assertIs(self.debug_info._cu_namespaces[0], parsed_cuns)
+        self.assertEqual(len(self._parsed_cus()), 1)
+        for var in global_vars:
+            self.assertIs(self.debug_info.getGlobalScope().getVariable(var.name), var)
+        for method in global_methods:
+            self.assertIs(self.debug_info.getGlobalScope().getMethod(method.method_name), method)
+
+    def test_worker_parse_matches_serial(self):
+        """ Test that parsing in worker processes gives the same results as in-process. """
+        self.debug_info.parseAllCUs()
+        serial_bindings = self._sym_bindings()
+        serial_types = sorted([(name, repr(typ)) for (name, typ) in self.debug_info.types()])
+        serial_backtrace = [repr(frame) for frame in self.debugger.get_backtrace()]
+
+        self.debugger.set_conf('dbg.debuginfo.workers', 2)
+        self.debugger.replace_elf_file(self.debugger.elf_name)
+        self.debug_info = self.debugger.get_debug_info()
+        self.debug_info.parseAllCUs()
+        self.assertTrue(self.debug_info.is_fully_parsed())
+
+        # The CUs came from the workers, with DIEs to be resolved lazily in this process.
+        entries = self.debug_info._cu_namespaces[0]._addr_entries.values()
+        self.assertTrue(any([isinstance(e.__dict__.get('_die'), debuginfo_cache.DIERef) for e in entries]))
+
+        self.assertEqual(self._sym_bindings(), serial_bindings)
+        self.assertEqual(sorted([(name, repr(typ)) for (name, typ) in self.debug_info.types()]), serial_types)
+        self.debugger.clear_frame_cache()
+        self.assertEqual([repr(frame) for frame in self.debugger.get_backtrace()], serial_backtrace)
+
+        # Void type is shared with the main process's encodings table.
+        sym = self.debugger.lookup_sym('twi_init')
+        self.assertIs(sym.type_info.return_type, self.debug_info.getEncodings()[0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
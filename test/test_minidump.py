@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+from dbg_testcase import DbgTestCase
+
+
+class TestMinidump(DbgTestCase):
+    """
+    Tests capturing a minidump of only the stack, globals, and memory reachable from them.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dump_filename = os.path.join(self.tmpdir, 'mini.dump')
+        self.debugger.clear_frame_cache()
+
+        dump.capture_dump(self.debugger, self.dump_filename, mode=dump.DUMP_MODE_MINI)
+        (self.mini, self.mini_service) = dump.load_dump(
+            self.dump_filename, self.console_printer.print_q, config=DbgTestCase.get_debug_config())
+        self.memstats = self.debugger.get_memstats()
+
+    def tearDown(self):
+        self.mini_service.shutdown()
+        self.mini.release_cmd_lock()
+        self.mini.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_smaller_than_sparse(self):
+        sparse_filename = os.path.join(self.tmpdir, 'sparse.dump')
+        dump.capture_dump(self.debugger, sparse_filename, mode=dump.DUMP_MODE_SPARSE)
+        self.assertLessEqual(os.path.getsize(self.dump_filename), os.path.getsize(sparse_filename))
+
+        ram_size = self.memstats['RAMEND'] - self.memstats['RAMSTART'] + 1
+        self.assertLess(os.path.getsize(self.dump_filename), ram_size // 10)
+
+    def test_stack_and_globals_captured(self):
+        self.assertEqual(self.mini.get_registers(), self.debugger.get_registers())
+        self.assertEqual([repr(frame) for frame in self.mini.get_backtrace()],
+                         [repr(frame) for frame in self.debugger.get_backtrace()])
+
+        sp = self.memstats['SP']
+        ram_end = self.memstats['RAMEND']
+        self.assertEqual(self.mini.read_memory(sp, ram_end + 1 - sp),
+                         self.debugger.read_memory(sp, ram_end + 1 - sp))
+        self.assertEqual(self.mini.get_sram(0x2000011c, 1), 8)  # A global variable.
+
+    def test_free_ram_unknown(self):
+        heap_end = self.memstats['HeapEnd']
+        free_addr = heap_end + (self.memstats['SP'] - heap_end) // 2
+        with self.assertRaises(dbg.UnknownMemoryException):
+            self.mini.get_sram(free_addr, 4)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(Exception):
+            dump.capture_dump(self.debugger, os.path.join(self.tmpdir, 'bad.dump'), mode='tiny')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
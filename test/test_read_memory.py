@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import tempfile
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.protocol as protocol
+import arduino_dbg.serialize as serialize
+from dbg_testcase import DbgTestCase
+
+
+class TestReadMemory(DbgTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def _expected_bytes(self, addr, length):
+        """ Read the expected memory contents one byte at a time. """
+        return bytes([self.debugger.get_sram(a, 1) for a in range(addr, addr + length)])
+
+    def test_read_block(self):
+        """ Test that a block read matches the bytes read individually. """
+        addr = self.debugger.get_arch_conf("RAMSTART")
+        length = protocol.DBG_RAMBLOCK_MAX_LEN + 7  # Spans more than one RAMBLOCK cmd.
+        block = self.debugger.read_memory(addr, length)
+        self.assertIsInstance(block, bytes)
+        self.assertEqual(len(block), length)
+        self.assertEqual(block, self._expected_bytes(addr, length))
+
+    def test_read_empty_block(self):
+        """ Test that a zero-length read does not talk to the device. """
+        self.assertEqual(self.debugger.read_memory(0x100, 0), b'')
+
+    def test_word_read_fallback(self):
+        """ Test that a device speaking protocol v1 is read with RAMADDR word reads. """
+        addr = self.debugger.get_arch_conf("RAMSTART") + 3  # Unaligned start & length.
+        length = 13
+        expected = self.debugger.read_memory(addr, length)
+
+        orig_version = self.debugger._protocol_version
+        self.debugger._protocol_version = 1
+        try:
+            block = self.debugger.read_memory(addr, length)
+        finally:
+            self.debugger._protocol_version = orig_version
+
+        self.assertEqual(block, expected)
+
+    def test_stack_snapshot(self):
+        """ Test that get_stack_snapshot() returns words as stored in memory. """
+        word_len = self.debugger.get_arch_conf("push_word_len")
+        (sp, top, snapshot) = self.debugger.get_stack_snapshot(count=8, skip=0)
+        self.assertEqual(len(snapshot), 8)
+        for i, word in enumerate(snapshot):
+            self.assertEqual(word, self.debugger.get_sram(top + i * word_len, word_len))
+
+    def test_pipelined_cmds(self):
+        """ Test that pipelined commands resolve to the same results as send_cmd(). """
+        addr = self.debugger.get_arch_conf("RAMSTART")
+        cmds = [([protocol.DBG_OP_RAMADDR, 2, addr + i], dbg.Debugger.RESULT_ONELINE)
+                for i in range(0, 10)]
+        cmds.append((protocol.DBG_OP_REGISTERS, dbg.Debugger.RESULT_LIST))
+        expected = [self.debugger.send_cmd(cmd, result_type) for (cmd, result_type) in cmds]
+
+        for depth in [1, 3, 16]:
+            self.debugger.set_conf('dbg.pipeline.depth', depth)
+            futures = self.debugger.submit_cmds(cmds)
+            self.assertEqual(len(futures), len(cmds))
+            self.assertEqual(self.debugger.wait_results(futures), expected)
+
+        self.debugger.set_conf('dbg.pipeline.depth', dbg._DEFAULT_PIPELINE_DEPTH)
+
+    def test_get_sram_multi(self):
+        """ Test that get_sram_multi() matches a series of get_sram() calls. """
+        addr = self.debugger.get_arch_conf("RAMSTART")
+        reads = [(addr, 1), (addr + 1, 2), (addr + 7, 4), (addr + 64, 2)]
+        expected = [self.debugger.get_sram(a, size) for (a, size) in reads]
+        self.assertEqual(self.debugger.get_sram_multi(reads), expected)
+        self.assertEqual(self.debugger.get_sram_multi([]), [])
+
+    def test_capture_dump(self):
+        """ Test that re-capturing a dump from the hosted service reproduces its RAM image. """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump_filename = os.path.join(tmpdir, 'recapture.dump')
+            dump.capture_dump(self.debugger, dump_filename)
+            recaptured = dump.read_dump_file(self.console_printer.print_q, dump_filename)
+
+        orig = serialize.load_config_file(
+            self.console_printer.print_q, self.getDumpFilename(), dump.SERIALIZED_STATE_KEY)
+        self.assertEqual(recaptured['ram_image_start'], orig['ram_image_start'])
+        self.assertEqual(bytes(recaptured['ram_image']), orig['ram_image'])
+        self.assertEqual(recaptured['registers'], orig['registers'])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.emulator as emulator
+from dbg_testcase import DbgTestCase
+
+
+class TestSerialBaud(DbgTestCase):
+    """
+    Tests connecting to a device over a serial port at a fixed or negotiated baud rate.
+
+    The device is a HostedDebugService serving the dump fixture over a pseudo-terminal.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        self.device = None
+        self.service = None
+        self.serial_dbg = None
+
+    def tearDown(self):
+        if self.serial_dbg:
+            self.serial_dbg.close()
+        if self.service:
+            self.service.shutdown()
+        if self.device:
+            self.device.close()
+
+    def _connect(self, device_baud, max_baud, baud):
+        """
+        Start a device at device_baud and connect a new Debugger to it at `baud`.
+        """
+        self.device = emulator.PtyDeviceConn(device_baud, max_baud)
+        self.service = dump.HostedDebugService(self.debugger.get_backend(), self.debugger, self.device)
+        self.service.start()
+
+        self.serial_dbg = dbg.Debugger(
+            self.debugger.elf_name, None, self.console_printer.print_q,
+            arduino_platform=self.debugger.get_conf('arduino.platform'),
+            force_config=DbgTestCase.get_debug_config(), is_locked=True,
+            port=self.device.port, baud=baud)
+        return self.serial_dbg
+
+    def test_fixed_baud(self):
+        serial_dbg = self._connect(115200, None, 115200)
+        self.assertEqual(serial_dbg._conn.get_baud(), 115200)
+        self.assertTrue(serial_dbg.send_break())
+        self.assertEqual(serial_dbg.get_sram(0x2000011c, 1), 8)
+
+    def test_negotiate_fastest_working_rate(self):
+        serial_dbg = self._connect(57600, 500000, 57600)
+        self.assertEqual(serial_dbg.negotiate_baud([1000000, 500000, 115200]), 500000)
+        self.assertEqual(serial_dbg._conn.get_baud(), 500000)
+        self.assertEqual(self.device.get_baud(), 500000)
+        self.assertEqual(serial_dbg.get_sram(0x2000011c, 1), 8)
+
+    def test_auto_baud(self):
+        serial_dbg = self._connect(57600, 230400, 'auto')
+        self.assertEqual(serial_dbg._conn.get_baud(), 230400)
+        self.assertEqual(serial_dbg.get_sram(0x2000011c, 1), 8)
+
+    def test_reset_returns_to_base_rate(self):
+        serial_dbg = self._connect(57600, 230400, 'auto')
+        self.assertEqual(serial_dbg._conn.get_baud(), 230400)
+        serial_dbg.reset_sketch()
+        self.assertEqual(serial_dbg._conn.get_baud(), 57600)
+        self.assertEqual(self.device.get_baud(), 57600)
+        self.assertTrue(serial_dbg.send_break())
+        self.assertEqual(serial_dbg.get_sram(0x2000011c, 1), 8)
+
+    def test_negotiate_falls_back(self):
+        serial_dbg = self._connect(57600, 57600, 57600)
+        self.assertEqual(serial_dbg.negotiate_baud([1000000, 115200]), 57600)
+        self.assertEqual(serial_dbg._conn.get_baud(), 57600)
+        self.assertEqual(self.device.get_baud(), 57600)
+        self.assertEqual(serial_dbg.get_sram(0x2000011c, 1), 8)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.binutils as binutils
+from dbg_testcase import DbgTestCase
+
+
+class TestSourceLines(DbgTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def test_source_line_for_pc(self):
+        self.assertEqual(self.debugger.source_line_for_pc(0x18a2), 'I2CParallel.cpp:50')
+        self.assertIsNone(self.debugger.source_line_for_pc(0x7FFFFFFF))
+        self.assertIsNone(self.debugger.source_line_for_pc(None))
+
+    def test_backtrace_source_lines(self):
+        """ Test that all frames in the backtrace match the source lines from addr2line. """
+        for frame in self.debugger.get_backtrace():
+            self.assertEqual(frame.source_line, binutils.pc_to_source_line(self.debugger.elf_name, frame.addr))
+
+    def test_matches_addr2line(self):
+        """ Test a sample of $PCs throughout .text against addr2line. """
+        text = self.debugger.get_section('.text')
+        for pc in range(text['addr'], text['addr'] + text['size'], 94):
+            expected = binutils.pc_to_source_line(self.debugger.elf_name, pc)
+            if expected is not None and expected.endswith(':?'):
+                expected = None  # Not in .debug_line; addr2line reports the file from .symtab.
+            elif expected is not None:
+                expected = expected.split(' (discriminator')[0]
+            self.assertEqual(self.debugger.source_line_for_pc(pc), expected, f'At $PC {pc:#x}')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
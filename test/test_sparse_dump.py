@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+from dbg_testcase import DbgTestCase
+
+
+class TestSparseDump(DbgTestCase):
+    """
+    Tests capturing a dump that skips the unused RAM between the heap and the stack.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dump_filename = os.path.join(self.tmpdir, 'sparse.dump')
+        self.debugger.clear_frame_cache()
+
+        dump.capture_dump(self.debugger, self.dump_filename, mode=dump.DUMP_MODE_SPARSE)
+        (self.sparse, self.sparse_service) = dump.load_dump(
+            self.dump_filename, self.console_printer.print_q, config=DbgTestCase.get_debug_config())
+        self.memstats = self.debugger.get_memstats()
+
+    def tearDown(self):
+        self.sparse_service.shutdown()
+        self.sparse.release_cmd_lock()
+        self.sparse.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _hole(self):
+        dump_data = dump.read_dump_file(self.console_printer.print_q, self.dump_filename)
+        self.assertEqual(len(dump_data['ram_holes']), 1)
+        return dump_data['ram_holes'][0]
+
+    def test_hole_between_heap_and_stack(self):
+        (hole_start, hole_end) = self._hole()
+        self.assertGreaterEqual(hole_start, self.memstats['HeapEnd'])
+        self.assertLessEqual(hole_end, self.memstats['SP'])
+
+        # The file holds only the captured memory.
+        ram_size = self.memstats['RAMEND'] - self.memstats['RAMSTART'] + 1
+        self.assertLess(os.path.getsize(self.dump_filename), ram_size - (hole_end - hole_start) + 2 * 4096)
+
+    def test_captured_memory_matches(self):
+        (hole_start, hole_end) = self._hole()
+        ram_start = self.memstats['RAMSTART']
+        ram_end = self.memstats['RAMEND']
+        self.assertEqual(self.sparse.read_memory(ram_start, hole_start - ram_start),
+                         self.debugger.read_memory(ram_start, hole_start - ram_start))
+        self.assertEqual(self.sparse.read_memory(hole_end, ram_end + 1 - hole_end),
+                         self.debugger.read_memory(hole_end, ram_end + 1 - hole_end))
+        self.assertEqual(self.sparse.get_sram(0x2000011c, 1), 8)
+        self.assertEqual(self.sparse.get_registers(), self.debugger.get_registers())
+
+        self.assertEqual([repr(frame) for frame in self.sparse.get_backtrace()],
+                         [repr(frame) for frame in self.debugger.get_backtrace()])
+
+    def test_hole_reads_unknown(self):
+        (hole_start, hole_end) = self._hole()
+        with self.assertRaises(dbg.UnknownMemoryException):
+            self.sparse.get_sram(hole_start + 16, 4)
+        with self.assertRaises(dbg.UnknownMemoryException):
+            self.sparse.read_memory(hole_end - 8, 16)  # Straddles the end of the hole.
+        with self.assertRaises(dbg.UnknownMemoryException):
+            self.sparse.set_sram(hole_start, 1, 1)
+
+    def test_hole_reads_unknown_over_wire(self):
+        (hole_start, hole_end) = self._hole()
+        backend = self.sparse.get_backend()
+        self.sparse.set_backend(None)
+        try:
+            with self.assertRaises(dbg.UnknownMemoryException):
+                self.sparse.get_sram(hole_start + 16, 4)
+            with self.assertRaises(dbg.UnknownMemoryException):
+                self.sparse.read_memory(hole_start, 64)
+            self.assertEqual(self.sparse.get_sram(0x2000011c, 1), 8)
+        finally:
+            self.sparse.set_backend(backend)
+
+    def test_capture_of_hole_is_not_io_error(self):
+        # Capturing all of RAM from the sparse dump reads its hole. That's not a lost connection
+        # to reconnect over; the capture stops at once.
+        reconnects = []
+        real_reconnect = dump._StreamingCapture._reconnect
+        dump._StreamingCapture._reconnect = lambda capture, dioe, bytes_done: reconnects.append(dioe)
+        try:
+            with self.assertRaises(dbg.UnknownMemoryException):
+                dump.capture_dump(self.sparse, os.path.join(self.tmpdir, 'full.dump'),
+                                  mode=dump.DUMP_MODE_FULL)
+        finally:
+            dump._StreamingCapture._reconnect = real_reconnect
+        self.assertEqual(reconnects, [])
+        self.assertEqual(self.sparse.get_sram(0x2000011c, 1), 8)
+
+
+class TestSparseDumpAvr(DbgTestCase):
+    """
+    Tests a sparse capture on AVR, where the heap pointers are 0 until something is malloc'd.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dump_filename = os.path.join(self.tmpdir, 'sparse.dump')
+        self.debugger.clear_frame_cache()
+
+        dump.capture_dump(self.debugger, self.dump_filename, mode=dump.DUMP_MODE_SPARSE)
+        (self.sparse, self.sparse_service) = dump.load_dump(
+            self.dump_filename, self.console_printer.print_q, config=DbgTestCase.get_debug_config())
+
+    def tearDown(self):
+        self.sparse_service.shutdown()
+        self.sparse.release_cmd_lock()
+        self.sparse.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_globals_captured(self):
+        memstats = self.debugger.get_memstats()
+        self.assertEqual(memstats['HeapEnd'], 0)  # No heap.
+
+        dump_data = dump.read_dump_file(self.console_printer.print_q, self.dump_filename)
+        self.assertEqual(len(dump_data['ram_holes']), 1)
+        (hole_start, hole_end) = dump_data['ram_holes'][0]
+        bss = self.debugger.get_section('.bss')
+        bss_end = self.debugger.arch_iface.memory_map().logical_to_physical_addr(bss['addr']) + bss['size']
+        self.assertGreaterEqual(hole_start, bss_end)
+        self.assertLessEqual(hole_end, memstats['SP'])
+
+        ram_start = memstats['RAMSTART']
+        self.assertEqual(self.sparse.read_memory(ram_start, hole_start - ram_start),
+                         self.debugger.read_memory(ram_start, hole_start - ram_start))
+        self.assertEqual([repr(frame) for frame in self.sparse.get_backtrace()],
+                         [repr(frame) for frame in self.debugger.get_backtrace()])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
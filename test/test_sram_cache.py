@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.sram_cache as sram_cache
+from dbg_testcase import DbgTestCase
+
+
+class TestSramPageCache(unittest.TestCase):
+    """
+    Tests of the SramPageCache data structure itself, against a fake 'device' memory.
+    """
+
+    RAM_START = 0x100
+    RAM_END = 0x2FF
+
+    def setUp(self):
+        self.device_mem = bytes([i & 0xFF for i in range(0, self.RAM_END + 1)])
+        self.fetches = []
+        self.cache = sram_cache.SramPageCache(self.RAM_START, self.RAM_END, page_size=16)
+
+    def _fetch(self, addr, length):
+        self.fetches.append((addr, length))
+        return self.device_mem[addr:addr + length]
+
+    def test_read_fetches_whole_pages(self):
+        data = self.cache.read(0x105, 4, self._fetch)
+        self.assertEqual(data, self.device_mem[0x105:0x109])
+        self.assertEqual(self.fetches, [(0x100, 16)])
+        self.assertEqual(self.cache.misses, 1)
+
+        # Another read within the same page is served locally.
+        data = self.cache.read(0x10C, 4, self._fetch)
+        self.assertEqual(data, self.device_mem[0x10C:0x110])
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_read_coalesces_missing_pages(self):
+        self.cache.read(0x120, 1, self._fetch)
+        self.fetches = []
+
+        # Spans pages 0x100, 0x110 (missing), 0x120 (cached), 0x130, 0x140 (missing).
+        data = self.cache.read(0x108, 0x40, self._fetch)
+        self.assertEqual(data, self.device_mem[0x108:0x148])
+        self.assertEqual(self.fetches, [(0x100, 0x20), (0x130, 0x20)])
+
+    def test_read_last_page(self):
+        data = self.cache.read(self.RAM_END - 1, 2, self._fetch)
+        self.assertEqual(data, self.device_mem[self.RAM_END - 1:self.RAM_END + 1])
+
+    def test_cacheable_range(self):
+        self.assertTrue(self.cache.is_cacheable(self.RAM_START, 4))
+        self.assertTrue(self.cache.is_cacheable(self.RAM_END, 1))
+        self.assertFalse(self.cache.is_cacheable(self.RAM_START - 1, 4))
+        self.assertFalse(self.cache.is_cacheable(self.RAM_END, 2))
+        self.assertFalse(self.cache.is_cacheable(self.RAM_START, 0))
+
+    def test_write_through(self):
+        self.cache.read(0x100, 16, self._fetch)
+        self.cache.write(0x104, b'\xAA\xBB')
+        data = self.cache.read(0x103, 4, self._fetch)
+        self.assertEqual(data, b'\x03\xAA\xBB\x06')
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_discard_and_invalidate(self):
+        self.cache.read(0x100, 0x20, self._fetch)
+        self.cache.discard(0x112, 1)
+        self.cache.read(0x100, 0x20, self._fetch)
+        self.assertEqual(self.fetches, [(0x100, 0x20), (0x110, 0x10)])
+
+        self.cache.invalidate()
+        self.cache.read(0x100, 0x20, self._fetch)
+        self.assertEqual(self.fetches[-1], (0x100, 0x20))
+
+    def test_stack_reads(self):
+        fetch_fn = lambda offset, size: offset * 10 + size  # noqa: E731
+        self.assertEqual(self.cache.read_stack(4, 2, fetch_fn), 42)
+        self.assertEqual(self.cache.read_stack(4, 2, lambda offset, size: 0), 42)  # cached
+        self.cache.write(0x100, b'\x00')  # Any write clears SP-relative entries.
+        self.assertEqual(self.cache.read_stack(4, 2, lambda offset, size: 0), 0)
+
+
+class TestDebuggerSramCache(DbgTestCase):
+    """
+    Tests that the Debugger serves SRAM reads through its cache.
+
+    The cache only applies to reads sent over the connection, so these tests detach the
+    in-process dump backend.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured at breakpoint in I2CParallel::getByte()
+        return "fixtures/get_byte.dump"
+
+    def setUp(self):
+        self.backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        self.debugger.set_conf('dbg.mem.cache', True)
+        self.debugger.clear_mem_cache()
+        self.cache = self.debugger.get_sram_cache()
+        self.cache.reset_stats()
+
+    def tearDown(self):
+        self.debugger.set_backend(self.backend)
+
+    def test_repeated_reads_hit_cache(self):
+        addr = self.debugger.get_arch_conf("RAMSTART") + 0x20
+        v1 = self.debugger.get_sram(addr, 2)
+        self.assertEqual(self.cache.misses, 1)
+        v2 = self.debugger.get_sram(addr, 2)
+        self.assertEqual(v1, v2)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+        # Same result with the cache disabled.
+        self.debugger.set_conf('dbg.mem.cache', False)
+        self.assertEqual(self.debugger.get_sram(addr, 2), v1)
+        self.assertEqual(self.cache.hits + self.cache.misses, 2)
+
+    def test_backtrace_uses_cache(self):
+        self.debugger.clear_frame_cache()
+        self.debugger.get_backtrace()
+        self.assertGreater(self.cache.hits, 0)
+
+    def test_set_sram_writes_through(self):
+        addr = self.debugger.get_arch_conf("RAMSTART") + 0x30
+        orig = self.debugger.get_sram(addr, 2)
+        try:
+            self.debugger.set_sram(addr, 0x1234, 2)
+            self.assertEqual(self.debugger.get_sram(addr, 2), 0x1234)
+
+            # Device agrees with the cache.
+            self.debugger.set_conf('dbg.mem.cache', False)
+            self.assertEqual(self.debugger.get_sram(addr, 2), 0x1234)
+        finally:
+            self.debugger.set_sram(addr, orig, 2)
+
+    def test_stack_sram_cached(self):
+        v1 = self.debugger.get_stack_sram(2, 2)
+        v2 = self.debugger.get_stack_sram(2, 2)
+        self.assertEqual(v1, v2)
+        self.assertEqual(self.cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
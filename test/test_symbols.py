@@ -3,6 +3,7 @@
 
 import unittest
 
+import arduino_dbg.binutils as binutils
 import arduino_dbg.types as types
 from dbg_testcase import DbgTestCase
 
@@ -44,6 +45,36 @@ class TestSymbols(DbgTestCase):
         self.assertEqual(typ.var_name, 'debug_status')
         self.assertEqual(typ.var_type.name, 'uint8_t')
 
+    def test_function_sym_by_pc(self):
+        sym = self.debugger.lookup_sym("twi_init")
+        self.assertIs(self.debugger.function_sym_by_pc(sym.addr), sym)
+        self.assertIs(self.debugger.function_sym_by_pc(sym.addr + sym.size - 1), sym)
+        next_sym = self.debugger.function_sym_by_pc(sym.addr + sym.size)
+        self.assertIsNot(next_sym, sym)
+        self.assertIsNone(self.debugger.function_sym_by_pc(0x7FFFFFFF))
+
+    def test_demangle_batch(self):
+        names = ['_ZN11I2CParallel7getByteEv', 'twi_init', None, '', '_ZN11I2CParallel7getByteEv']
+        self.assertEqual(binutils.demangle_batch(names),
+                         ['I2CParallel::getByte()', 'twi_init', None, '', 'I2CParallel::getByte()'])
+        self.assertEqual(binutils.demangle_batch(names[0:2], hide_params=True),
+                         ['I2CParallel::getByte', 'twi_init'])
+        self.assertEqual(binutils.demangle(names[0]), 'I2CParallel::getByte()')
+        self.assertEqual(binutils.demangle(names[0], hide_params=True), 'I2CParallel::getByte')
+
+    def test_demangle_large_batch(self):
+        """ Test a batch larger than the c++filt pipe buffers. """
+        names = [f'_ZN8BigBatch{len(str(i)) + 6}method{i}Ev' for i in range(20000)]
+        demangled = binutils.demangle_batch(names)
+        self.assertEqual(len(demangled), len(names))
+        self.assertEqual(demangled[12345], 'BigBatch::method12345()')
+
+    def test_symbols_demangled(self):
+        sym = self.debugger.lookup_sym('_ZN11I2CParallel7getByteEv')
+        self.assertIsNotNone(sym)
+        self.assertEqual(sym.demangled, 'I2CParallel::getByte()')
+        self.assertIs(self.debugger.lookup_sym('I2CParallel::getByte()'), sym)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.protocol as protocol
+from dbg_testcase import DbgTestCase
+
+
+class TestWireFraming(DbgTestCase):
+    """
+    Tests reading memory over the connection with and without binary framing of responses.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        # Send all reads over the connection to the HostedDebugService.
+        self.backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        self.debugger.set_conf('dbg.mem.cache', False)
+        self.orig_protocol_version = self.debugger._protocol_version
+
+    def tearDown(self):
+        self.dbg_service.__dict__.pop('_send_frame', None)
+        self.debugger._protocol_version = self.orig_protocol_version
+        self.debugger.set_conf('dbg.wire.framed', True)
+        self.debugger.set_conf('dbg.mem.cache', True)
+        self.debugger.set_backend(self.backend)
+
+    def _reads(self):
+        """ Return the results of each kind of memory read. """
+        ram_start = self.debugger.get_arch_conf("RAMSTART")
+        return [
+            self.debugger.read_memory(ram_start, 3 * protocol.DBG_RAMBLOCK_MAX_LEN + 5),
+            self.debugger.get_sram(0x2000011c, 1),
+            self.debugger.get_sram_multi([(ram_start, 4), (ram_start + 6, 2)]),
+            self.debugger.get_stack_sram(4, 4),
+            self.debugger.get_flash(self.debugger.get_section('.text')['addr'] + 0x10, 4),
+            self.debugger.get_ram_checksums([(ram_start, 256)]),
+        ]
+
+    def test_framed_matches_text(self):
+        framed = self._reads()
+        self.assertTrue(self.debugger._framing)
+        self.assertEqual(framed[1], 8)
+
+        self.debugger.set_conf('dbg.wire.framed', False)
+        text = self._reads()
+        self.assertFalse(self.debugger._framing)
+        self.assertEqual(framed, text)
+
+        self.assertEqual(self._reads_from_backend(), text)
+
+        self.debugger.set_conf('dbg.wire.framed', True)
+        self.assertEqual(self._reads(), framed)
+        self.assertTrue(self.debugger._framing)
+
+    def _reads_from_backend(self):
+        self.debugger.set_backend(self.backend)
+        try:
+            return self._reads()
+        finally:
+            self.debugger.set_backend(None)
+
+    def test_old_protocol_not_framed(self):
+        self.debugger.send_break()  # Framing is off after a pause.
+        self.debugger._protocol_version = protocol.DBG_FRAMING_MIN_PROTOCOL_VERSION - 1
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+        self.assertFalse(self.debugger._framing)
+
+    def test_bad_crc(self):
+        real_send_frame = self.dbg_service._send_frame
+        conn = self.dbg_service._conn
+
+        def send_corrupt_frame(opcode, payload):
+            # Capture the frame and flip a bit of its payload.
+            frames = []
+            self.dbg_service._conn = type('FrameCapture', (), {'write': lambda _, data: frames.append(data)})()
+            try:
+                real_send_frame(opcode, payload)
+            finally:
+                self.dbg_service._conn = conn
+            frame = bytearray(frames[0])
+            frame[4] ^= 1
+            conn.write(bytes(frame))
+
+        self.debugger.get_sram(0x2000011c, 1)  # Agree on framing.
+        self.dbg_service._send_frame = send_corrupt_frame
+        with self.assertRaises(dbg.MalformedResponseException):
+            self.debugger.get_sram(0x2000011c, 1)
+        with self.assertRaises(dbg.MalformedResponseException):
+            self.debugger.read_memory(0x20000100, 16)
+
+        # The connection is still in step with the service.
+        self.dbg_service.__dict__.pop('_send_frame')
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+
+    def test_lost_header_byte(self):
+        real_send_frame = self.dbg_service._send_frame
+        conn = self.dbg_service._conn
+
+        def send_short_frame(opcode, payload):
+            # Capture the frame and drop a byte of its length, so the rest reads as a huge length.
+            frames = []
+            self.dbg_service._conn = type('FrameCapture', (), {'write': lambda _, data: frames.append(data)})()
+            try:
+                real_send_frame(opcode, payload)
+            finally:
+                self.dbg_service._conn = conn
+            conn.write(frames[0][0:1] + frames[0][2:])
+
+        self.debugger.get_sram(0x2000011c, 1)  # Agree on framing.
+        self.dbg_service._send_frame = send_short_frame
+        with self.assertRaises(dbg.MalformedResponseException):
+            self.debugger.get_sram(0x2000011c, 1)
+
+        # The connection is back in step with the service.
+        self.dbg_service.__dict__.pop('_send_frame')
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+
+    def test_empty_payload(self):
+        # The service answers a read past the end of the RAM image with an empty frame; that's
+        # a response, not a timeout.
+        past_end = self.debugger.get_arch_conf("RAMEND") + 0x1000
+        self.assertEqual(self.debugger.get_sram(past_end, 2), 0)
+        self.assertTrue(self.debugger._framing)
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import arduino_dbg.debugger as dbg
+import arduino_dbg.dump as dump
+import arduino_dbg.io as io
+from dbg_testcase import DbgTestCase
+
+
+class TestWireReplay(DbgTestCase):
+    """
+    Tests recording a Debugger's traffic with the HostedDebugService and replaying it.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.recording = os.path.join(self.tmpdir, 'session.wire')
+        self.debuggers = []
+        self.service = None
+
+    def tearDown(self):
+        for debugger in self.debuggers:
+            debugger.close()
+        if self.service:
+            self.service.shutdown()
+        shutil.rmtree(self.tmpdir)
+
+    def _make_debugger(self, connection):
+        debugger = dbg.Debugger(
+            self.debugger.elf_name, connection, self.console_printer.print_q,
+            arduino_platform=self.debugger.get_conf('arduino.platform'),
+            force_config=DbgTestCase.get_debug_config(), is_locked=True)
+        self.debuggers.append(debugger)
+        return debugger
+
+    def _session(self, debugger):
+        """ The debugger operations to record and replay. """
+        return [
+            debugger.get_sram(0x2000011c, 1),
+            debugger.get_registers(),
+            [repr(frame) for frame in debugger.get_backtrace()],
+        ]
+
+    def _record(self):
+        (left, right) = io.make_bidi_pipe()
+        self.service = dump.HostedDebugService(self.debugger.get_backend(), self.debugger, right)
+        self.service.start()
+        recorder = self._make_debugger(io.RecordingConn(left, self.recording))
+        results = self._session(recorder)
+        recorder.close()
+        return results
+
+    def test_replay_matches_recording(self):
+        recorded = self._record()
+        self.assertEqual(recorded[0], 8)
+
+        replay_conn = io.ReplayConn(self.recording)
+        replayed = self._session(self._make_debugger(replay_conn))
+        self.assertEqual(replayed, recorded)
+        self.assertTrue(replay_conn.at_eof())
+
+    def test_simulated_latency(self):
+        self._record()
+        turnaround = 0.02
+        replayer = self._make_debugger(io.ReplayConn(self.recording, turnaround=turnaround))
+        start = time.monotonic()
+        self._session(replayer)
+        elapsed = time.monotonic() - start
+
+        n_cmds = sum([stats.count for stats in replayer.get_wire_stats().get_op_stats().values()])
+        self.assertGreater(n_cmds, 2)
+        self.assertGreaterEqual(elapsed, n_cmds * turnaround)
+
+    def test_mismatched_command(self):
+        self._record()
+        replay_conn = io.ReplayConn(self.recording)
+        with self.assertRaises(io.ReplayMismatchException):
+            replay_conn.write(b'r\n')  # The recording starts with a BREAK.
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
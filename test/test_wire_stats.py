@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# (c) Copyright 2022 Aaron Kimball
+
+import unittest
+
+import arduino_dbg.protocol as protocol
+import arduino_dbg.wire_stats as wire_stats
+from dbg_testcase import DbgTestCase
+
+
+class TestWireStats(DbgTestCase):
+    """
+    Tests counting the commands sent over the connection and attributing them to REPL commands.
+    """
+
+    def __init__(self, methodName='runTest'):
+        super().__init__(methodName)
+
+    @classmethod
+    def getDumpFilename(cls):
+        # Dump captured in empty.elf; 192KB RAM with a small heap.
+        return "fixtures/cortex-m4-img.dump"
+
+    def setUp(self):
+        # Send all reads over the connection to the HostedDebugService.
+        self.backend = self.debugger.get_backend()
+        self.debugger.set_backend(None)
+        self.debugger.set_conf('dbg.mem.cache', False)
+        self.stats = self.debugger.get_wire_stats()
+        self.stats.reset()
+
+    def tearDown(self):
+        self.stats.end_command()
+        self.debugger.set_conf('dbg.mem.cache', True)
+        self.debugger.set_backend(self.backend)
+
+    def test_counts_by_opcode(self):
+        self.assertEqual(self.debugger.get_sram(0x2000011c, 1), 8)
+        self.debugger.get_sram(0x2000011c, 1)
+        self.debugger.get_registers()
+
+        ops = self.stats.get_op_stats()
+        ramaddr = ops[protocol.DBG_OP_RAMADDR]
+        self.assertEqual(ramaddr.count, 2)
+        self.assertEqual(ramaddr.bytes_sent, 2 * len('@ 1 536871196\n'))
+        self.assertGreater(ramaddr.bytes_recv, 0)
+        self.assertEqual(sum(ramaddr.buckets), 2)
+        self.assertGreater(ramaddr.max_time, 0)
+        self.assertEqual(ops[protocol.DBG_OP_REGISTERS].count, 1)
+
+        # Nothing was attributed to a REPL command.
+        self.assertEqual(list(self.stats.get_command_stats().keys()), [wire_stats.NO_COMMAND])
+
+    def test_pipelined_reads_counted(self):
+        ram_start = self.debugger.get_arch_conf("RAMSTART")
+        self.debugger.get_sram_multi([(ram_start, 4), (ram_start + 8, 4), (ram_start + 16, 2)])
+        self.assertEqual(self.stats.get_op_stats()[protocol.DBG_OP_RAMADDR].count, 3)
+
+    def test_attribute_to_command(self):
+        self.stats.begin_command('backtrace')
+        frames = self.debugger.get_backtrace()
+        cmd_stats = self.stats.end_command()
+
+        self.assertGreater(len(frames), 0)
+        self.assertEqual(cmd_stats.name, 'backtrace')
+        self.assertGreater(cmd_stats.ops, 0)
+        self.assertEqual(cmd_stats.ops, sum(cmd_stats.op_counts.values()))
+        self.assertTrue(cmd_stats.summary().startswith('backtrace: '))
+
+        # Totals for the command accumulate over runs.
+        self.stats.begin_command('backtrace')
+        self.debugger.get_sram(0x2000011c, 1)
+        self.stats.end_command()
+        totals = self.stats.get_command_stats()['backtrace']
+        self.assertEqual(totals.runs, 2)
+        self.assertEqual(totals.ops, cmd_stats.ops + 1)
+
+    def test_report_and_reset(self):
+        self.debugger.get_sram(0x2000011c, 1)
+        report = self.stats.report(histograms=True)
+        self.assertTrue(any([line.startswith('@ RAMADDR') for line in report]))
+        self.assertTrue(any([line.startswith('Latency of @ RAMADDR') for line in report]))
+
+        self.stats.reset()
+        self.assertEqual(self.stats.get_op_stats(), {})
+        self.assertEqual(self.stats.report(), ['No commands sent to the device.'])
+
+    def test_reset_during_command(self):
+        # As when the `stats reset` command itself runs.
+        self.stats.begin_command('stats reset')
+        self.debugger.get_sram(0x2000011c, 1)
+        self.stats.reset()
+        self.debugger.get_sram(0x2000011c, 1)
+        cmd_stats = self.stats.end_command()
+
+        self.assertEqual(cmd_stats.name, 'stats reset')
+        self.assertEqual(cmd_stats.ops, 1)  # Only the read after the reset.
+        self.assertEqual(self.stats.get_command_stats()['stats reset'].runs, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)